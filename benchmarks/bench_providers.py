@@ -0,0 +1,174 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+"""
+Micro-benchmarks for the WSGI providers of raptor. Calls the WSGI
+application of every provider in-process with prebuilt environments, so that
+only the overhead of the provider and the routing is measured, without any
+server or socket involved. Results are written as JSON, like the results of
+`bench_routing.py`.
+
+Usage:
+  python benchmarks/bench_providers.py --requests 20000 --output out.json
+"""
+
+# -- STL
+import argparse
+import io
+import json
+import logging
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# -- PROJECT
+import raptor
+from raptor.tools import io as raptor_io
+
+PROVIDERS = {
+    "flask": lambda router: router.build_provider("flask")._flask,
+    "wsgi": lambda router: router.build_provider("wsgi"),
+}
+"""dict[str, Callable[[Router], Callable]]: WSGI application per provider."""
+
+
+def _handler(*args: Any) -> str:
+  return "ok"
+
+
+def build_router(size: int) -> raptor.Router:
+  router = raptor.Router()
+  for i in range(size):
+    router.mount(f"/api/g{i % 10}/r{i}/{{id:int}}", _handler, ["GET"])
+    router.mount(f"/api/g{i % 10}/r{i}/static", _handler, ["GET"])
+  return router.freeze()
+
+
+def environ(method: str, path: str) -> dict[str, Any]:
+  return {
+      "REQUEST_METHOD": method,
+      "PATH_INFO": path,
+      "QUERY_STRING": "",
+      "SERVER_NAME": "localhost",
+      "SERVER_PORT": "8080",
+      "SERVER_PROTOCOL": "HTTP/1.1",
+      "REMOTE_ADDR": "127.0.0.1",
+      "HTTP_HOST": "localhost:8080",
+      "wsgi.url_scheme": "http",
+      "wsgi.input": io.BytesIO(),
+      "wsgi.errors": sys.stderr,
+      "wsgi.multithread": False,
+      "wsgi.multiprocess": False,
+      "wsgi.run_once": False,
+  }
+
+
+def measure(app: Callable, requests: list[tuple[str, str]],
+            count: int) -> float:
+  """
+  Measures the mean latency of a WSGI application over a list of requests.
+
+  Args:
+    app (Callable): WSGI application
+    requests (list[tuple[str, str]]): pairs of HTTP method and path
+    count (int): number of requests, repeated if necessary
+
+  Returns:
+    float: mean latency per request in microseconds
+  """
+  environs = [environ(method, path) for method, path in requests]
+  environs = (environs * (count // len(environs) + 1))[:count]
+
+  def start_response(status: str, headers: list) -> None:
+    pass
+
+  start = time.perf_counter_ns()
+  for env in environs:
+    for _ in app(dict(env), start_response):
+      pass
+  return (time.perf_counter_ns() - start) / len(environs) / 1e3
+
+
+def run(providers: list[str], size: int, count: int) -> dict[str, Any]:
+  router = build_router(size)
+  hits = [("GET", f"/api/g{i % 10}/r{i}/{i}") for i in range(size)]
+  static = [("GET", f"/api/g{i % 10}/r{i}/static") for i in range(size)]
+  misses = [("GET", f"/wp-admin/r{i}.php") for i in range(size)]
+  wrong_method = [("POST", f"/api/g{i % 10}/r{i}/{i}") for i in range(size)]
+
+  results = []
+  for name in providers:
+    app = PROVIDERS[name](router)
+    results.append({
+        "provider": name,
+        "routes": len(router.routes),
+        "request_us": {
+            "hit": measure(app, hits, count),
+            "static": measure(app, static, count),
+            "miss": measure(app, misses, count),
+            "wrong_method": measure(app, wrong_method, count),
+        },
+    })
+    print(f"{name:>6}: {results[-1]['request_us']['hit']:.1f}us per hit",
+          file=sys.stderr)
+
+  return {
+      "python": platform.python_version(),
+      "implementation": platform.python_implementation(),
+      "raptor": raptor.__version__,
+      "requests": count,
+      "results": results,
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+      description=__doc__,
+      formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--providers",
+                      nargs="+",
+                      default=list(PROVIDERS),
+                      choices=list(PROVIDERS))
+  parser.add_argument("--routes", type=int, default=100)
+  parser.add_argument("--requests",
+                      type=int,
+                      default=20000,
+                      help="number of requests per measurement")
+  parser.add_argument("--output", help="write JSON to file instead of stdout")
+  args = parser.parse_args()
+
+  # measure the providers, not the handlers of the logger
+  raptor_io._logger.setLevel(logging.CRITICAL)
+
+  report = run(args.providers, args.routes, args.requests)
+  if args.output:
+    Path(args.output).write_text(json.dumps(report, indent=2))
+  else:
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+  main()
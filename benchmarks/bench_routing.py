@@ -0,0 +1,263 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+"""
+Micro-benchmarks for the routing of raptor. Builds routers with synthetic
+route tables covering every RouteVariableType and measures the time of
+`Router.mount()` and `Router.mount_many()` against restoring the same
+router by `Router.load()`, the latency of `Router.match()`
+for hits, misses and wrong HTTP methods and the memory per route for every
+dispatch engine. Results are written as JSON, so that engines and releases
+can be compared.
+
+Usage:
+  python benchmarks/bench_routing.py --sizes 10 100 1000 --output out.json
+"""
+
+# -- STL
+import argparse
+import gc
+import json
+import platform
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# -- PROJECT
+import raptor
+from raptor.engines import ENGINES
+from raptor.routing import RouteVariableType
+from raptor.tools.errors import RaptorAbortException
+
+SAMPLES = {
+    "hex": "1f3a",
+    "str": "some-name",
+    "path": "some/nested/file.txt",
+    "int": "-42",
+    "uint": "42",
+    "float": "3.14",
+    "uuid0": "123e4567-e89b-02d3-a456-426614174000",
+    "uuid": "123e4567-e89b-12d3-a456-426614174000",
+    "uuid4": "123e4567-e89b-42d3-a456-426614174000",
+    "md5": "d41d8cd98f00b204e9800998ecf8427e",
+    "sha1": "da39a3ee5e6b4b0d3255bfef95601890afd80709",
+    "sha224": "a" * 56,
+    "sha256": "b" * 64,
+    "sha384": "c" * 96,
+    "sha512": "d" * 128,
+}
+"""dict[str, str]: Valid path value for every type of RouteVariableType."""
+
+TYPES = [RouteVariableType.as_string(ty) for ty in RouteVariableType]
+"""list[str]: Names of all variable types, that can be used in templates."""
+
+
+def _handler(*args: Any) -> None:
+  pass
+
+
+def generate_table(size: int) -> list[tuple[str, str]]:
+  """
+  Generates a synthetic route table. Routes are spread over 10 groups, every
+  fourth route has no variables, every fifth route has a module mixing
+  literals and variables and all other routes cycle through all types.
+
+  Args:
+    size (int): number of routes
+
+  Returns:
+    list[tuple[str, str]]: pairs of template and a path matching it
+  """
+  table = []
+  for i in range(size):
+    base = f"api/g{i % 10}/r{i}"
+    if i % 4 == 0:
+      table.append((f"/{base}/static", f"{base}/static"))
+    elif i % 5 == 0:
+      table.append((f"/{base}/{{name:str}}_{{size:uint}}.jpg",
+                    f"{base}/{SAMPLES['str']}_{SAMPLES['uint']}.jpg"))
+    else:
+      ty = TYPES[i % len(TYPES)]
+      table.append((f"/{base}/{{var:{ty}}}/item", f"{base}/{SAMPLES[ty]}/item"))
+  return table
+
+
+def build_router(engine: str, table: list[tuple[str, str]]) -> raptor.Router:
+  router = raptor.Router(engine=engine)
+  for tpl, _ in table:
+    router.mount(tpl, _handler, ["GET", "POST"])
+  return router.freeze()
+
+
+def build_router_bulk(engine: str,
+                      table: list[tuple[str, str]]) -> raptor.Router:
+  router = raptor.Router(engine=engine)
+  router.mount_many((tpl, _handler, ["GET", "POST"]) for tpl, _ in table)
+  return router.freeze()
+
+
+def measure_mount(build: Any, engine: str, table: list[tuple[str,
+                                                            str]]) -> float:
+  # builds have to compile all regexes, not take them from the cache of re
+  re.purge()
+  gc.collect()
+  start = time.perf_counter()
+  build(engine, table)
+  return time.perf_counter() - start
+
+
+def measure_load(engine: str, table: list[tuple[str, str]]) -> float:
+  """
+  Measures the time of restoring a frozen router by `Router.load()`, which
+  is compared against the time of building it (see `measure_mount()`).
+
+  Args:
+    engine (str): name of dispatch engine
+    table (list[tuple[str, str]]): generated route table
+
+  Returns:
+    float: duration of load in seconds
+  """
+  with tempfile.TemporaryDirectory() as tmp:
+    path = Path(tmp) / "router.pickle"
+    build_router(engine, table).save(path)
+    re.purge()
+    gc.collect()
+    start = time.perf_counter()
+    router = raptor.Router.load(path)
+    duration = time.perf_counter() - start
+  assert router is not None and router.frozen
+  return duration
+
+
+def measure_memory(engine: str, table: list[tuple[str, str]]) -> int:
+  gc.collect()
+  tracemalloc.start()
+  router = build_router(engine, table)
+  size, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del router
+  return size
+
+
+def measure_match(router: raptor.Router, requests: list[tuple[str, str]],
+                  lookups: int) -> float:
+  """
+  Measures the mean latency of `Router.match()` over a list of requests.
+
+  Args:
+    router (Router): frozen router
+    requests (list[tuple[str, str]]): pairs of path and HTTP method
+    lookups (int): number of lookups, requests are repeated if necessary
+
+  Returns:
+    float: mean latency per lookup in nanoseconds
+  """
+  requests = (requests * (lookups // len(requests) + 1))[:lookups]
+  match = router.match
+
+  start = time.perf_counter_ns()
+  for path, method in requests:
+    try:
+      match(path, method)
+    except RaptorAbortException:
+      pass
+  return (time.perf_counter_ns() - start) / len(requests)
+
+
+def run(engines: list[str], sizes: list[int], lookups: int) -> dict[str, Any]:
+  results = []
+  for size in sizes:
+    table = generate_table(size)
+    hits = [(path, "GET") for _, path in table]
+    misses = [(f"api/g{i % 10}/missing{i}/item", "GET") for i in range(size)]
+    wrong_method = [(path, "DELETE") for _, path in table]
+
+    for engine in engines:
+      mount = measure_mount(build_router, engine, table)
+      mount_many = measure_mount(build_router_bulk, engine, table)
+      load = measure_load(engine, table)
+      memory = measure_memory(engine, table)
+      router = build_router(engine, table)
+
+      results.append({
+          "engine": engine,
+          "routes": size,
+          "mount_s": mount,
+          "mount_us_per_route": mount / size * 1e6,
+          "mount_many_s": mount_many,
+          "mount_many_us_per_route": mount_many / size * 1e6,
+          "load_s": load,
+          "match_ns": {
+              "hit": measure_match(router, hits, lookups),
+              "miss": measure_match(router, misses, lookups),
+              "wrong_method": measure_match(router, wrong_method, lookups),
+          },
+          "memory_bytes_per_route": memory / size,
+      })
+      print(f"{engine:>10} {size:>6} routes: mount {mount:.3f}s, "
+            f"mount_many {mount_many:.3f}s, load {load:.3f}s",
+            file=sys.stderr)
+
+  return {
+      "python": platform.python_version(),
+      "implementation": platform.python_implementation(),
+      "raptor": raptor.__version__,
+      "lookups": lookups,
+      "results": results,
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+      description=__doc__,
+      formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--engines",
+                      nargs="+",
+                      default=list(ENGINES),
+                      choices=list(ENGINES))
+  parser.add_argument("--sizes",
+                      nargs="+",
+                      type=int,
+                      default=[10, 100, 1000, 10000])
+  parser.add_argument("--lookups",
+                      type=int,
+                      default=2000,
+                      help="number of lookups per measurement")
+  parser.add_argument("--output", help="write JSON to file instead of stdout")
+  args = parser.parse_args()
+
+  report = run(args.engines, args.sizes, args.lookups)
+  if args.output:
+    Path(args.output).write_text(json.dumps(report, indent=2))
+  else:
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,40 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+# export Engines from parent `raptor.engines` package
+# -- PROJECT
+from raptor.engines.engine import AbstractEngine, EngineMatch, TraceStep
+from raptor.engines.combined import CombinedEngine
+from raptor.engines.codegen import CodegenEngine
+from raptor.engines.regex import RegexEngine
+from raptor.engines.trie import TrieEngine
+
+# -- PACKAGE
+from . import codegen
+from . import combined
+from . import engine
+from . import regex
+from . import trie
+
+ENGINES = {
+    "regex": RegexEngine,
+    "trie": TrieEngine,
+    "combined": CombinedEngine,
+    "codegen": CodegenEngine,
+}
+"""dict[str, type]: Dispatch engines selectable by name in Router."""
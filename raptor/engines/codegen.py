@@ -0,0 +1,268 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+import marshal
+from types import CodeType
+from typing import Any, Callable, Optional
+
+# -- PROJECT
+from raptor.engines.engine import EngineMatch
+from raptor.engines.trie import TrieEngine, _TrieNode, _SegmentMatcher
+
+_INLINE_CHECKS = {
+    "uint": "{v}.isdecimal()",
+    "int": "({v}.isdecimal() or ({v}[:1] in '+-' and {v}[1:].isdecimal()))",
+}
+"""
+dict[str, str]: Validators of built-in variable types, that are inlined
+    instead of calling the validator of the type. `\\d` matches exactly the
+    characters for which `str.isdecimal()` is True, so these checks accept the
+    same strings as the regex of the type.
+"""
+
+
+class _CodeGenerator():
+  """
+  Generates the python source of a lookup function for a segment trie. Every
+  node of the trie becomes one function, trying literal segments, segments
+  with variables and tails in the same order as `TrieEngine.lookup()`.
+
+  Attributes:
+    lines (list[str]): Lines of generated source.
+    namespace (dict[str, Any]): Objects referenced by the generated source.
+  """
+
+  lines: list[str]
+  namespace: dict[str, Any]
+  _names: int
+
+  def __init__(self) -> None:
+    self.lines = []
+    self.namespace = {"_M": EngineMatch}
+    self._names = 0
+
+  def bind(self, value: Any, prefix: str) -> str:
+    """
+    Makes an object available to the generated source.
+
+    Args:
+      value (Any): object that should be referenced
+      prefix (str): prefix of generated name
+
+    Returns:
+      str: name of object in generated source
+    """
+    name = f"_{prefix}{self._names}"
+    self._names += 1
+    self.namespace[name] = value
+    return name
+
+  def convert(self, ty: type, expr: str) -> str:
+    if ty is str:
+      return expr
+    if ty is int or ty is float:
+      return f"{ty.__name__}({expr})"
+    return f"{self.bind(ty, 'c')}({expr})"
+
+  def check(self, signature: tuple, matcher: _SegmentMatcher) -> str:
+    rxt = signature[0]
+    if rxt.name in _INLINE_CHECKS:
+      return _INLINE_CHECKS[rxt.name].format(v="v")
+    if matcher.validate is not None:
+      return f"{self.bind(matcher.validate, 'v')}(v)"
+    return f"{self.bind(matcher.pattern.fullmatch, 'p')}(v) is not None"
+
+  def checks(self, matcher: _SegmentMatcher) -> str:
+    return "".join(f" and {self.bind(validate, 'v')}(m[{i + 1}])"
+                   for i, validate in matcher.checks)
+
+  def groups(self, matcher: _SegmentMatcher) -> str:
+    return ", ".join(
+        self.convert(ty, f"m[{i}]")
+        for i, ty in enumerate(matcher.converters, start=1))
+
+  def node(self, node: _TrieNode) -> str:
+    """
+    Generates the function for a node and all of its children.
+
+    Args:
+      node (_TrieNode): node of the trie
+
+    Returns:
+      str: name of generated function
+    """
+    name = f"_n{self._names}"
+    self._names += 1
+
+    static = {seg: self.node(child) for seg, child in node.static.items()}
+    dynamic = [(sig, matcher, self.node(child))
+               for sig, matcher, child in node.dynamic]
+
+    code = []
+    if len(static) > 1:
+      # functions of children are defined above, so the table can be built
+      # right before the function of this node
+      table = f"_s{self._names}"
+      self._names += 1
+      entries = ", ".join(f"{seg!r}: {child}" for seg, child in static.items())
+      code.append(f"{table} = {{{entries}}}")
+
+    code.append(f"def {name}(s, n, i, a):")
+    if node.route is not None:
+      code.append("  if i == n:")
+      code.append(f"    return _M({self.bind(node.route, 'r')}, a)")
+
+    if static or dynamic:
+      code.append("  if i < n:")
+      code.append("    v = s[i]")
+
+    if len(static) == 1:
+      seg, child = next(iter(static.items()))
+      code.append(f"    if v == {seg!r}:")
+      code.append(f"      r = {child}(s, n, i + 1, a)")
+      code.append("      if r is not None:")
+      code.append("        return r")
+    elif static:
+      code.append(f"    f = {table}.get(v)")
+      code.append("    if f is not None:")
+      code.append("      r = f(s, n, i + 1, a)")
+      code.append("      if r is not None:")
+      code.append("        return r")
+
+    for sig, matcher, child in dynamic:
+      if len(sig) == 1:
+        code.append(f"    if {self.check(sig, matcher)}:")
+        code.append(f"      r = {child}(s, n, i + 1, "
+                    f"a + [{self.convert(matcher.converters[0], 'v')}])")
+      else:
+        code.append(f"    m = {self.bind(matcher.pattern.fullmatch, 'p')}(v)")
+        code.append(f"    if m is not None{self.checks(matcher)}:")
+        code.append(f"      r = {child}(s, n, i + 1, a + [{self.groups(matcher)}])")
+      code.append("      if r is not None:")
+      code.append("        return r")
+
+    if node.tails:
+      code.append("  t = '/'.join(s[i:])")
+      for matcher, route in node.tails:
+        code.append(f"  m = {self.bind(matcher.pattern.fullmatch, 'p')}(t)")
+        code.append(f"  if m is not None{self.checks(matcher)}:")
+        code.append(f"    return _M({self.bind(route, 'r')}, "
+                    f"a + [{self.groups(matcher)}])")
+
+    code.append("  return None")
+    code.append("")
+    self.lines.extend(code)
+    return name
+
+  def generate(self, root: _TrieNode) -> CodeType:
+    """
+    Generates and compiles the source of the lookup function for a trie. The
+    objects it references are collected in `namespace`.
+
+    Args:
+      root (_TrieNode): root node of the trie
+
+    Returns:
+      CodeType: compiled module defining the function `lookup`
+    """
+    entry = self.node(root)
+    code = [
+        "def lookup(path):",
+        "  s = path.split('/') if path else []",
+        f"  return {entry}(s, len(s), 0, [])",
+        "",
+    ]
+    self.lines.extend(code)
+    return compile("\n".join(self.lines), "<raptor.engines.codegen>", "exec")
+
+
+def _define_lookup(code: CodeType,
+                   namespace: dict[str, Any]) -> Callable[[str],
+                                                         Optional[EngineMatch]]:
+  """
+  Runs generated code and returns the lookup function it defines.
+
+  Args:
+    code (CodeType): compiled module generated by `_CodeGenerator`
+    namespace (dict[str, Any]): objects referenced by the code
+
+  Returns:
+    Callable[[str], Optional[EngineMatch]]: lookup function
+  """
+  # the namespace is copied, so that it only holds the referenced objects
+  # and can be persisted together with the code
+  scope = dict(namespace)
+  exec(code, scope)
+  return scope["lookup"]
+
+
+class CodegenEngine(TrieEngine):
+  """
+  Dispatch engine that generates specialized python source for the segment
+  trie of TrieEngine, once the engine is frozen. The generated functions
+  compare literal segments directly or through a dictionary, validate and
+  convert integers inline and call the validators of other variable types,
+  using a regex only for types without a validator or segments with more
+  than one token.
+  Until the engine is frozen, lookups are resolved by the generic walk of
+  TrieEngine.
+
+  The engine can be pickled after it has been frozen. The compiled code is
+  persisted as bytecode (see `marshal`), so it is neither generated nor
+  compiled again when the engine is restored by the same version of python.
+
+  Attributes:
+    source (Optional[str]): Generated python source, None if not frozen.
+    code (Optional[CodeType]): Compiled generated source, None if not frozen.
+    namespace (dict[str, Any]): Objects referenced by the generated source.
+  """
+
+  source: Optional[str]
+  code: Optional[CodeType]
+  namespace: dict[str, Any]
+
+  def __init__(self) -> None:
+    super().__init__()
+    self.source = None
+    self.code = None
+    self.namespace = {}
+
+  def freeze(self) -> None:
+    super().freeze()
+    generator = _CodeGenerator()
+    self.code = generator.generate(self.root)
+    self.namespace = generator.namespace
+    self.source = "\n".join(generator.lines)
+    # shadow `lookup()` of the class with the generated function
+    self.lookup = _define_lookup(self.code, self.namespace)
+
+  def __getstate__(self) -> dict[str, Any]:
+    state = dict(self.__dict__)
+    state.pop("lookup", None)
+    if self.code is not None:
+      state["code"] = marshal.dumps(self.code)
+    return state
+
+  def __setstate__(self, state: dict[str, Any]) -> None:
+    self.__dict__.update(state)
+    if self.code is not None:
+      self.code = marshal.loads(self.code)
+      self.lookup = _define_lookup(self.code, self.namespace)
@@ -0,0 +1,184 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+import re
+from time import perf_counter_ns
+from typing import Any, NamedTuple, Optional, Pattern, Sequence
+
+# -- PROJECT
+from raptor.engines.engine import (AbstractEngine, EngineMatch, TraceStep,
+                                   explain_routes)
+
+
+class _Alternation(NamedTuple):
+  """
+  Combined regex of CombinedEngine together with the routes it was built
+  from, so that lookups never pair a regex with the routes of another one.
+
+  Attributes:
+    pattern (Pattern): Combined regex of all routes.
+    branches (dict[int, tuple[int, Route, tuple, tuple]]): Maps the group
+        index of each route to its position, the route, pairs of converter
+        and group index for its variables and pairs of validator and group
+        index for variables, that have to be validated after the regex.
+    routes (tuple[Route, ...]): Routes the regex was built from.
+    version (int): Version of the routes of the engine, that were copied.
+  """
+
+  pattern: Pattern
+  branches: dict[int, tuple[int, Any, tuple, tuple]]
+  routes: tuple[Any, ...]
+  version: int
+
+
+class CombinedEngine(AbstractEngine):
+  """
+  Dispatch engine that compiles the regexes of all routes into a single
+  alternation, where every route is wrapped in its own named group `r<i>`.
+  One `fullmatch` call scans all routes inside the regex engine of python and
+  the index of the last closed group identifies the matched route. Routes are
+  tried in order of mounting, so the first matching route wins, like in
+  RegexEngine.
+
+  The combined regex is compiled lazily on the first lookup after a change of
+  the routes or when the engine is frozen.
+
+  Attributes:
+    routes (Sequence[Route]): Routes in the order of mounting.
+    compiled (Optional[_Alternation]): Combined regex, None if outdated.
+  """
+
+  routes: Sequence[Any]
+  compiled: Optional[_Alternation]
+  # incremented by every change of the routes, after the change
+  _version: int
+
+  def __init__(self) -> None:
+    self.routes = []
+    self.compiled = None
+    self._version = 0
+
+  def insert(self, route: Any) -> None:
+    self.routes.append(route)
+    self._changed()
+
+  def insert_many(self, routes: list[Any]) -> None:
+    self.routes.extend(routes)
+    self._changed()
+
+  def remove(self, route: Any) -> None:
+    self.routes.remove(route)
+    self._changed()
+
+  def _changed(self) -> None:
+    self._version += 1
+    self.compiled = None
+
+  def compile(self) -> _Alternation:
+    """
+    Builds the combined regex and the group index of all routes.
+
+    Returns:
+      _Alternation: combined regex of all routes
+    """
+    # a regex compiled concurrently with a change of the routes carries the
+    # old version, so it is recognized as outdated even if published last
+    version = self._version
+    routes = tuple(self.routes)
+    parts = []
+    branches = {}
+    group = 1
+    for i, route in enumerate(routes):
+      # every variable of a route is exactly one group in its regex
+      groups = len(route.var_filter.type_map)
+      parts.append(f"(?P<r{i}>{route.pattern})")
+      converters = tuple(
+          zip(route.var_filter.type_map, range(group + 1, group + 1 + groups)))
+      checks = tuple(
+          (validate, group + 1 + j) for j, validate in route.var_filter.checks)
+      branches[group] = (i, route, converters, checks)
+      group += groups + 1
+
+    # an empty alternation would match the empty path, so use a regex that
+    # never matches instead
+    pattern = re.compile("|".join(parts) if parts else r"(?!)")
+    # regex, branches and routes are published by a single assignment
+    self.compiled = _Alternation(pattern, branches, routes, version)
+    return self.compiled
+
+  def _current(self) -> _Alternation:
+    compiled = self.compiled
+    if compiled is None or compiled.version != self._version:
+      compiled = self.compile()
+    return compiled
+
+  def freeze(self) -> None:
+    self.routes = tuple(self.routes)
+    self.compile()
+
+  def lookup(self, path: str) -> Optional[EngineMatch]:
+    compiled = self._current()
+    m = compiled.pattern.fullmatch(path)
+    if m is None:
+      return None
+
+    i, route, converters, checks = compiled.branches[m.lastindex]
+    for validate, j in checks:
+      if not validate(m.group(j)):
+        # the alternation can not be resumed after the rejected route, so
+        # the remaining routes are tried one by one
+        return self._scan(compiled.routes[i + 1:], path)
+    return EngineMatch(route, [t(m.group(j)) for t, j in converters])
+
+  def explain(self, path: str,
+              steps: list[TraceStep]) -> Optional[EngineMatch]:
+    compiled = self._current()
+    start = perf_counter_ns()
+    m = compiled.pattern.fullmatch(path)
+    branch = m and compiled.branches[m.lastindex]
+    steps.append(
+        TraceStep("pattern", f"<{len(compiled.routes)} combined routes>",
+                  branch and branch[1].tpl,
+                  perf_counter_ns() - start))
+    if m is None:
+      return None
+
+    i, route, converters, checks = branch
+    for validate, j in checks:
+      start = perf_counter_ns()
+      valid = validate(m.group(j))
+      steps.append(
+          TraceStep("validate", route.tpl, valid, perf_counter_ns() - start))
+      if not valid:
+        return explain_routes(compiled.routes[i + 1:], path, steps)
+
+    start = perf_counter_ns()
+    args = [t(m.group(j)) for t, j in converters]
+    steps.append(TraceStep("convert", route.tpl, args,
+                           perf_counter_ns() - start))
+    return EngineMatch(route, args)
+
+  def _scan(self, routes: Sequence[Any], path: str) -> Optional[EngineMatch]:
+    for route in routes:
+      m = route.compile().fullmatch(path)
+      if m is not None and route.var_filter.check(m.groups()):
+        return EngineMatch(route, route.var_filter.use(m.groups()))
+    return None
@@ -0,0 +1,224 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+import re
+from abc import ABC, abstractmethod
+from time import perf_counter_ns
+from typing import Any, NamedTuple, Optional
+
+
+def segments_to_rx(segments: list[list]) -> str:
+  """
+  Builds the regular expression for a list of parsed template segments.
+  Literals are escaped and every variable becomes one capturing group.
+
+  Args:
+    segments (list[list]): Segments of a template, each a list of literal
+        strings and RouteVariable objects.
+
+  Returns:
+    str: Regular expression (without anchors) matching the segments.
+  """
+  return "/".join("".join(
+      re.escape(tk) if isinstance(tk, str) else f"({tk.rxt.rx})"
+      for tk in tokens) for tokens in segments)
+
+
+class EngineMatch(NamedTuple):
+  """
+  Result of a successful lookup inside a dispatch engine.
+
+  Attributes:
+    route (Route): Matched route of the router.
+    args (list): Path-variables of the request, already converted to their
+        python types.
+  """
+
+  route: Any
+  args: list
+
+
+class TraceStep(NamedTuple):
+  """
+  Single step of a traced lookup (see `Router.explain()`).
+
+  Attributes:
+    action (str): Kind of step, e.g. `static`, `pattern` or `convert`.
+    target (str): What the step was applied to, e.g. a regex or a segment.
+    outcome (Any): Result of the step, e.g. converted path-variables, None if
+        the step did not match.
+    ns (int): Duration of the step in nanoseconds.
+  """
+
+  action: str
+  target: str
+  outcome: Any
+  ns: int
+
+
+def explain_routes(routes: Any, path: str,
+                   steps: list[TraceStep]) -> Optional[EngineMatch]:
+  """
+  Traces the regex of every route in order, until one matches the path and
+  its variables are valid.
+
+  Args:
+    routes (Iterable[Route]): routes in the order they are tried
+    path (str): Request path without prefix and leading `/`.
+    steps (list[TraceStep]): Trace the steps are appended to.
+
+  Returns:
+    Optional[EngineMatch]: Matched route and converted path-variables, None
+        if no route matches the path.
+  """
+  for route in routes:
+    start = perf_counter_ns()
+    m = route.compile().fullmatch(path)
+    steps.append(
+        TraceStep("pattern", route.pattern, m and m.groups(),
+                  perf_counter_ns() - start))
+    if m is None:
+      continue
+
+    if route.var_filter.checks:
+      start = perf_counter_ns()
+      valid = route.var_filter.check(m.groups())
+      steps.append(
+          TraceStep("validate", route.tpl, valid, perf_counter_ns() - start))
+      if not valid:
+        continue
+
+    start = perf_counter_ns()
+    args = route.var_filter.use(m.groups())
+    steps.append(TraceStep("convert", route.tpl, args,
+                           perf_counter_ns() - start))
+    return EngineMatch(route, args)
+
+  return None
+
+
+class AbstractEngine(ABC):
+  """
+  Base class for dispatch engines. An engine is an index over the routes of a
+  Router, that resolves a request path to the first matching route. The Router
+  itself stays the owner of all routes and only informs the engine about
+  changes to its table.
+  """
+
+  @abstractmethod
+  def insert(self, route: Any) -> None:
+    """
+    Adds a new route to the index of the engine.
+
+    Args:
+      route (Route): Route that has been mounted on the router.
+    """
+
+  def insert_many(self, routes: list[Any]) -> None:
+    """
+    Adds many new routes to the index at once, in order of mounting. Engines
+    override this, if they can build their index for a whole batch cheaper
+    than route by route.
+
+    Args:
+      routes (list[Route]): Routes that have been mounted on the router.
+    """
+    for route in routes:
+      self.insert(route)
+
+  @abstractmethod
+  def remove(self, route: Any) -> None:
+    """
+    Removes a route from the index of the engine. Engines should update their
+    index incrementally where possible. Engines, whose index can only be
+    built for all routes at once, may rebuild it on the next lookup instead.
+
+    Args:
+      route (Route): Route that has been unmounted from the router.
+    """
+
+  @abstractmethod
+  def lookup(self, path: str) -> Optional[EngineMatch]:
+    """
+    Resolves a request path to a route.
+
+    Args:
+      path (str): Request path without prefix and leading `/`.
+
+    Returns:
+      Optional[EngineMatch]: Matched route and converted path-variables, None
+          if no route matches the path.
+    """
+
+  def classify(self, path: str) -> Optional[EngineMatch]:
+    """
+    Resolves a request path like `lookup()`, but never changes the state of
+    the engine, e.g. the hits of routes. Used for batches of requests, that
+    are not served, like `Router.match_many()`.
+
+    Args:
+      path (str): Request path without prefix and leading `/`.
+
+    Returns:
+      Optional[EngineMatch]: Matched route and converted path-variables, None
+          if no route matches the path.
+    """
+    return self.lookup(path)
+
+  def explain(self, path: str,
+              steps: list[TraceStep]) -> Optional[EngineMatch]:
+    """
+    Resolves a request path like `lookup()`, but records every decision as a
+    step of the trace. Engines without a detailed trace record the whole
+    lookup as a single step. Tracing never changes the state of the engine,
+    e.g. the hits of routes.
+
+    Args:
+      path (str): Request path without prefix and leading `/`.
+      steps (list[TraceStep]): Trace the steps are appended to.
+
+    Returns:
+      Optional[EngineMatch]: Matched route and converted path-variables, None
+          if no route matches the path.
+    """
+    start = perf_counter_ns()
+    result = self.lookup(path)
+    steps.append(
+        TraceStep("lookup", type(self).__name__, result and result.args,
+                  perf_counter_ns() - start))
+    return result
+
+  def get_hits(self) -> dict[Any, int]:
+    """
+    Returns the number of lookups resolved to each route, for engines that
+    count them.
+
+    Returns:
+      dict[Route, int]: hits per route, empty if engine does not count hits.
+    """
+    return {}
+
+  def freeze(self) -> None:
+    """
+    Finalizes the index for serving, after which no more routes will be
+    inserted. Engines may use this to convert their index into immutable
+    or precompiled structures.
+    """
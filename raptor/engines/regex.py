@@ -0,0 +1,199 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+import heapq
+import re
+from typing import Any, Optional, Sequence
+
+# -- PROJECT
+from raptor.engines.engine import (AbstractEngine, EngineMatch, TraceStep,
+                                   explain_routes, segments_to_rx)
+from raptor.engines.trie import _spans_segments
+
+
+def _may_overlap(a: Any, b: Any) -> bool:
+  """
+  Conservatively checks, if there is a path that is matched by the templates
+  of both routes. False is only returned, if the templates are guaranteed to
+  be mutually exclusive.
+
+  Args:
+    a (Route): first route
+    b (Route): second route
+
+  Returns:
+    bool: False if no path can match both routes, True otherwise.
+  """
+  if any(_spans_segments(tk) for seg in a.segments for tk in seg) or \
+     any(_spans_segments(tk) for seg in b.segments for tk in seg):
+    return True
+  if len(a.segments) != len(b.segments):
+    return False
+
+  for sa, sb in zip(a.segments, b.segments):
+    la = len(sa) == 1 and isinstance(sa[0], str)
+    lb = len(sb) == 1 and isinstance(sb[0], str)
+    if la and lb and sa[0] != sb[0]:
+      return False
+    if la and not lb and re.fullmatch(segments_to_rx([sb]), sa[0]) is None:
+      return False
+    if lb and not la and re.fullmatch(segments_to_rx([sa]), sb[0]) is None:
+      return False
+
+  return True
+
+
+class RegexEngine(AbstractEngine):
+  """
+  Linear dispatch engine. Tries the regular expression of every route in the
+  order of mounting, until one matches the request path.
+
+  With a `reorder_interval`, the engine counts the hits of every route and
+  reorders the routes after that many hits, so that popular routes are tried
+  first. Two routes only swap their order, if their templates are mutually
+  exclusive, so the route that wins for a path never changes.
+
+  Attributes:
+    routes (Sequence[Route]): Routes in the order they are tried.
+    mounted (list[Route]): Routes in the order of mounting.
+    reorder_interval (int): Number of hits between reorders, 0 if disabled.
+    hits (dict[Route, int]): Number of hits per route, only counted if
+        reordering is enabled.
+
+  Args:
+    reorder_interval (int, optional): Number of hits between reorders.
+        Defaults to 0, which disables counting and reordering.
+  """
+
+  routes: Sequence[Any]
+  mounted: list[Any]
+  reorder_interval: int
+  hits: dict[Any, int]
+  _countdown: int
+  _successors: Optional[dict[Any, list[Any]]]
+
+  def __init__(self, reorder_interval: int = 0) -> None:
+    self.routes = []
+    self.mounted = []
+    self.reorder_interval = reorder_interval
+    self.hits = {}
+    self._countdown = reorder_interval
+    self._successors = None
+
+  def insert(self, route: Any) -> None:
+    route.compile()
+    self.routes.append(route)
+    self.mounted.append(route)
+    self.hits[route] = 0
+    self._successors = None
+
+  def insert_many(self, routes: list[Any]) -> None:
+    for route in routes:
+      route.compile()
+      self.hits[route] = 0
+    self.routes.extend(routes)
+    self.mounted.extend(routes)
+    self._successors = None
+
+  def remove(self, route: Any) -> None:
+    # replace instead of mutate, so concurrent lookups are not affected
+    self.routes = [r for r in self.routes if r is not route]
+    self.mounted.remove(route)
+    self.hits.pop(route, None)
+    if self._successors is not None:
+      self._successors.pop(route, None)
+      for successors in self._successors.values():
+        if route in successors:
+          successors.remove(route)
+
+  def lookup(self, path: str) -> Optional[EngineMatch]:
+    result = self.classify(path)
+    if result is not None and self.reorder_interval:
+      self._count(result.route)
+    return result
+
+  def classify(self, path: str) -> Optional[EngineMatch]:
+    # get first template whose precompiled regex matches the path
+    for route in self.routes:
+      m = route.rx.fullmatch(path)
+      if m is not None:
+        if route.var_filter.checks and not route.var_filter.check(m.groups()):
+          continue
+        return EngineMatch(route, route.var_filter.use(m.groups()))
+
+    return None
+
+  def explain(self, path: str,
+              steps: list[TraceStep]) -> Optional[EngineMatch]:
+    return explain_routes(self.routes, path, steps)
+
+  def freeze(self) -> None:
+    self.routes = tuple(self.routes)
+
+  def get_hits(self) -> dict[Any, int]:
+    return self.hits
+
+  def _count(self, route: Any) -> None:
+    # counters are not synchronized between threads, as only their
+    # approximate distribution is of interest
+    self.hits[route] += 1
+    self._countdown -= 1
+    if self._countdown <= 0:
+      self._countdown = self.reorder_interval
+      self.reorder()
+
+  def reorder(self) -> None:
+    """
+    Sorts the routes by their hits, while keeping the order of mounting for
+    all pairs of routes that may match the same path.
+    """
+    if self._successors is None:
+      # edges from every route to all later mounted routes it may overlap
+      self._successors = {route: [] for route in self.mounted}
+      for i, a in enumerate(self.mounted):
+        for b in self.mounted[i + 1:]:
+          if _may_overlap(a, b):
+            self._successors[a].append(b)
+
+    position = {route: i for i, route in enumerate(self.mounted)}
+    blockers = dict.fromkeys(self.mounted, 0)
+    for successors in self._successors.values():
+      for route in successors:
+        blockers[route] += 1
+
+    # pick the route with most hits, whose overlapping predecessors have all
+    # been placed already
+    ready = [(-self.hits[r], position[r], r)
+             for r in self.mounted
+             if blockers[r] == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+      _, _, route = heapq.heappop(ready)
+      order.append(route)
+      for successor in self._successors[route]:
+        blockers[successor] -= 1
+        if blockers[successor] == 0:
+          heapq.heappush(
+              ready, (-self.hits[successor], position[successor], successor))
+
+    # replace instead of mutate, so concurrent lookups are not affected
+    self.routes = tuple(order) if isinstance(self.routes, tuple) else order
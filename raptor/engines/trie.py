@@ -0,0 +1,332 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+import re
+from time import perf_counter_ns
+from types import MappingProxyType
+from typing import Any, Callable, Optional, Pattern, Sequence
+
+# -- PROJECT
+from raptor.engines.engine import (AbstractEngine, EngineMatch, TraceStep,
+                                   segments_to_rx)
+
+
+def _spans_segments(token: Any) -> bool:
+  """
+  Checks if a template token can match across `/`, like variables of type
+  `path` do.
+
+  Args:
+    token (Union[str, RouteVariable]): literal or variable of a segment
+
+  Returns:
+    bool: True if token is a variable, whose type accepts a `/`.
+  """
+  return not isinstance(token, str) and token.rxt.spans
+
+
+class _SegmentMatcher():
+  """
+  Matcher for segments, that are not a single literal. Holds the compiled
+  regex of the segment(s), the converters of its variables and validators,
+  that are called instead of or after the regex.
+
+  Attributes:
+    pattern (Pattern): Compiled regex of the segment(s).
+    converters (tuple[type]): Python types of the variables in order.
+    validate (Optional[Callable[[str], bool]]): Validator of the variable, if
+        the segment is a single variable whose type has one. Replaces the
+        regex.
+    checks (tuple[tuple[int, Callable[[str], bool]], ...]): Index and
+        validator of variables, that have to be validated after the regex.
+
+  Args:
+    segments (list[list]): Parsed template segments covered by this matcher.
+  """
+
+  __slots__ = ("pattern", "converters", "validate", "checks")
+
+  pattern: Pattern
+  converters: tuple[type]
+  validate: Optional[Callable[[str], bool]]
+  checks: tuple[tuple[int, Callable[[str], bool]], ...]
+
+  def __init__(self, segments: list[list]) -> None:
+    self.pattern = re.compile(segments_to_rx(segments))
+    variables = [
+        tk for tokens in segments for tk in tokens if not isinstance(tk, str)
+    ]
+    self.converters = tuple(tk.rxt.ty for tk in variables)
+
+    single = len(segments) == 1 and len(segments[0]) == 1
+    self.validate = variables[0].rxt.validate if single else None
+    self.checks = () if single else tuple(
+        (i, tk.rxt.validate)
+        for i, tk in enumerate(variables)
+        if not tk.rxt.exact)
+
+  def match(self, value: str) -> Optional[list]:
+    if self.validate is not None:
+      return [self.converters[0](value)] if self.validate(value) else None
+
+    m = self.pattern.fullmatch(value)
+    if m is None:
+      return None
+    values = m.groups()
+    for i, validate in self.checks:
+      if not validate(values[i]):
+        return None
+    return [t(v) for t, v in zip(self.converters, values)]
+
+
+_EMPTY = MappingProxyType({})
+"""MappingProxyType: Shared children of nodes without literal children."""
+
+_MATCHERS: dict[tuple, _SegmentMatcher] = {}
+"""dict[tuple, _SegmentMatcher]: Shared matchers by signature of segment."""
+
+
+class _TrieNode():
+  """
+  Node of the segment trie.
+
+  Attributes:
+    static (dict[str, _TrieNode]): Children for literal segments.
+    dynamic (tuple[tuple[tuple, _SegmentMatcher, _TrieNode], ...]): Children
+        for segments with variables, in order of mounting. The first element
+        of each entry is the signature of the segment.
+    tails (tuple[tuple[_SegmentMatcher, Route], ...]): Routes whose remaining
+        segments contain a variable spanning multiple segments.
+    route (Optional[Route]): Route ending at this node.
+  """
+
+  __slots__ = ("static", "dynamic", "tails", "route")
+
+  static: dict[str, _TrieNode]
+  dynamic: Sequence[tuple[tuple, _SegmentMatcher, _TrieNode]]
+  tails: Sequence[tuple[_SegmentMatcher, Any]]
+  route: Optional[Any]
+
+  def __init__(self) -> None:
+    # most nodes are leaves, so they share empty containers until a child is
+    # added
+    self.static = _EMPTY
+    self.dynamic = ()
+    self.tails = ()
+    self.route = None
+
+  def static_child(self, segment: str) -> _TrieNode:
+    if self.static is _EMPTY:
+      self.static = {}
+    return self.static.setdefault(segment, _TrieNode())
+
+  def dynamic_child(self, tokens: list) -> _TrieNode:
+    signature = tuple(tk if isinstance(tk, str) else tk.rxt for tk in tokens)
+    for sig, _, child in self.dynamic:
+      if sig == signature:
+        return child
+
+    # segments of the same signature match the same strings, so their
+    # matchers are shared between all nodes
+    matcher = _MATCHERS.get(signature)
+    if matcher is None:
+      matcher = _MATCHERS[signature] = _SegmentMatcher([tokens])
+    child = _TrieNode()
+    self.dynamic += ((signature, matcher, child),)
+    return child
+
+  def add_tail(self, segments: list, route: Any) -> None:
+    self.tails += ((_SegmentMatcher(segments), route),)
+
+  def is_empty(self) -> bool:
+    return self.route is None and not (self.static or self.dynamic or
+                                       self.tails)
+
+  def remove_child(self, segment: Optional[str], child: _TrieNode) -> None:
+    if segment is not None:
+      del self.static[segment]
+      if not self.static:
+        self.static = _EMPTY
+    else:
+      self.dynamic = tuple(
+          entry for entry in self.dynamic if entry[2] is not child)
+
+  def freeze(self) -> None:
+    if self.static:
+      self.static = MappingProxyType(self.static)
+    for child in self.static.values():
+      child.freeze()
+    for _, _, child in self.dynamic:
+      child.freeze()
+
+
+class TrieEngine(AbstractEngine):
+  """
+  Segment trie dispatch engine. The request path is split at `/` and walked
+  through the trie segment by segment. Literal segments are resolved through
+  a dictionary, segments with variables are tried afterwards in order of
+  mounting. Variables spanning multiple segments (`path`) are matched against
+  the rest of the path as a whole.
+
+  Literal segments take precedence over variables, so on overlapping
+  templates `/user/me` wins over `/user/{name:str}` regardless of the order
+  of mounting.
+
+  Attributes:
+    root (_TrieNode): Root node of the trie, matching the empty path.
+  """
+
+  root: _TrieNode
+
+  def __init__(self) -> None:
+    self.root = _TrieNode()
+
+  def insert(self, route: Any) -> None:
+    node = self.root
+    for i, tokens in enumerate(route.segments):
+      if any(_spans_segments(tk) for tk in tokens):
+        node.add_tail(route.segments[i:], route)
+        return
+
+      if len(tokens) == 1 and isinstance(tokens[0], str):
+        node = node.static_child(tokens[0])
+      else:
+        node = node.dynamic_child(tokens)
+
+    if node.route is None:
+      node.route = route
+
+  def remove(self, route: Any) -> None:
+    # only the nodes on the path of the template are visited, nodes left
+    # without routes are pruned bottom-up
+    path = []
+    node = self.root
+    for tokens in route.segments:
+      if any(_spans_segments(tk) for tk in tokens):
+        node.tails = tuple(t for t in node.tails if t[1] is not route)
+        break
+
+      parent = node
+      if len(tokens) == 1 and isinstance(tokens[0], str):
+        segment = tokens[0]
+        node = node.static.get(segment)
+      else:
+        segment = None
+        signature = tuple(
+            tk if isinstance(tk, str) else tk.rxt for tk in tokens)
+        node = next(
+            (child for sig, _, child in node.dynamic if sig == signature), None)
+      if node is None:
+        return
+      path.append((parent, segment, node))
+    else:
+      if node.route is route:
+        node.route = None
+
+    for parent, segment, child in reversed(path):
+      if not child.is_empty():
+        break
+      parent.remove_child(segment, child)
+
+  def freeze(self) -> None:
+    self.root.freeze()
+
+  def lookup(self, path: str) -> Optional[EngineMatch]:
+    segments = path.split("/") if path else []
+    return self._walk(self.root, segments, 0, [])
+
+  def explain(self, path: str,
+              steps: list[TraceStep]) -> Optional[EngineMatch]:
+    segments = path.split("/") if path else []
+    return self._explain_walk(self.root, segments, 0, [], steps)
+
+  def _explain_walk(self, node: _TrieNode, segments: list[str], i: int,
+                    args: list,
+                    steps: list[TraceStep]) -> Optional[EngineMatch]:
+    if i == len(segments):
+      steps.append(TraceStep("end", "/".join(segments), node.route and
+                             node.route.tpl, 0))
+      if node.route is not None:
+        return EngineMatch(node.route, args)
+    else:
+      segment = segments[i]
+
+      start = perf_counter_ns()
+      child = node.static.get(segment)
+      steps.append(TraceStep("static", segment, child is not None,
+                             perf_counter_ns() - start))
+      if child is not None:
+        result = self._explain_walk(child, segments, i + 1, args, steps)
+        if result is not None:
+          return result
+
+      for _, matcher, child in node.dynamic:
+        start = perf_counter_ns()
+        values = matcher.match(segment)
+        steps.append(TraceStep("segment", matcher.pattern.pattern, values,
+                               perf_counter_ns() - start))
+        if values is not None:
+          result = self._explain_walk(child, segments, i + 1, args + values,
+                                      steps)
+          if result is not None:
+            return result
+
+    if node.tails:
+      rest = "/".join(segments[i:])
+      for matcher, route in node.tails:
+        start = perf_counter_ns()
+        values = matcher.match(rest)
+        steps.append(TraceStep("tail", matcher.pattern.pattern, values,
+                               perf_counter_ns() - start))
+        if values is not None:
+          return EngineMatch(route, args + values)
+
+    return None
+
+  def _walk(self, node: _TrieNode, segments: list[str], i: int,
+            args: list) -> Optional[EngineMatch]:
+    if i == len(segments):
+      if node.route is not None:
+        return EngineMatch(node.route, args)
+    else:
+      segment = segments[i]
+
+      child = node.static.get(segment)
+      if child is not None:
+        result = self._walk(child, segments, i + 1, args)
+        if result is not None:
+          return result
+
+      for _, matcher, child in node.dynamic:
+        values = matcher.match(segment)
+        if values is not None:
+          result = self._walk(child, segments, i + 1, args + values)
+          if result is not None:
+            return result
+
+    if node.tails:
+      rest = "/".join(segments[i:])
+      for matcher, route in node.tails:
+        values = matcher.match(rest)
+        if values is not None:
+          return EngineMatch(route, args + values)
+
+    return None
@@ -20,7 +20,13 @@
 # -- PROJECT
 from raptor.providers.provider import AbstractProvider
 from raptor.providers.flask import FlaskProvider
+from raptor.providers.wsgi import WsgiProvider
+from raptor.providers.asgi import AsgiProvider
+from raptor.providers.asyncio import AsyncioProvider
 
 # -- PACKAGE
+from . import asgi
+from . import asyncio
 from . import flask
-from . import provider
\ No newline at end of file
+from . import provider
+from . import wsgi
\ No newline at end of file
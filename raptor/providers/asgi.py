@@ -0,0 +1,259 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from dataclasses import dataclass
+from functools import partial
+import inspect
+from typing import Any, Awaitable, Callable
+
+# -- PROJECT
+from raptor.providers.provider import AbstractProvider
+from raptor.providers.wsgi import (CORS_HEADERS, NOT_FOUND,
+                                   _factory_build_error_response, _log_outcome,
+                                   _relative_path)
+from raptor.tools import io
+from raptor.tools.http import (Request, Response, _request, make_allow_response,
+                               make_response)
+
+
+class AsgiRequest(Request):
+  """
+  Request read from the scope of an ASGI connection. Headers are decoded on
+  first access, the body is received completely before the handler is
+  called.
+
+  Attributes:
+    scope (dict): ASGI scope of request.
+  """
+
+  __slots__ = ("scope",)
+
+  scope: dict
+
+  def __init__(self, scope: dict, body: bytes) -> None:
+    client = scope.get("client")
+    super().__init__(scope["method"],
+                     scope["path"],
+                     scope.get("query_string", b"").decode("latin-1"),
+                     body=body,
+                     remote_addr=client[0] if client else None,
+                     scheme=scope.get("scheme", "http"))
+    self.scope = scope
+
+  def read_headers(self) -> dict[str, str]:
+    return {
+        name.decode("latin-1").lower(): value.decode("latin-1")
+        for name, value in self.scope.get("headers", ())
+    }
+
+
+@dataclass
+class AsgiProvider(AbstractProvider):
+  """
+  Provider exposing the Router as ASGI application. Handlers may be `async
+  def` functions, which are awaited on the event loop, or plain functions,
+  which are run on a bounded thread pool, so that blocking handlers do not
+  stall the event loop. Both see the current request through
+  `raptor.tools.http.get_request()`.
+
+  The provider object is the ASGI application itself, so it can be served by
+  any ASGI server or driven in-process by calling it with a scope and the
+  `receive` and `send` callables.
+
+  Examples:
+
+    >>> async def get_user(id):
+    ...   return await db.fetch_user(id)
+    >>> router.mount("/users/{id:int}", get_user, ["GET"])
+    >>> router.build_provider("asgi").serve("0.0.0.0", 8080)
+
+  Attributes:
+    cors (bool): Allow requests from all origins.
+    executor (ThreadPoolExecutor): Thread pool for synchronous handlers.
+    rejected (io.AggregateLog): Counter of requests answered with 404, logged
+        as a summary at most once a minute.
+
+  Args:
+    router (Router): Router requests are dispatched to.
+    cors (bool, optional): Allow requests from all origins. Defaults to False.
+    max_workers (int, optional): Maximum number of threads running
+        synchronous handlers. Defaults to 16.
+  """
+
+  cors: bool
+  executor: ThreadPoolExecutor
+  rejected: io.AggregateLog
+
+  def __init__(self,
+               router: Any,
+               cors: bool = False,
+               max_workers: int = 16) -> None:
+    super().__init__(router)
+    self.cors = cors
+    self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                       thread_name_prefix="raptor-asgi")
+    self.rejected = io.AggregateLog("Rejected requests to unknown paths")
+
+  def serve(self,
+            host: str,
+            port: int,
+            provider: str = "uvicorn",
+            freeze: bool = False) -> None:
+    """
+    Serves the provider with one of the supported ASGI servers. By default
+    the router stays mutable while it is served, so routes can still be
+    mounted and unmounted at runtime. With `freeze`, the route table is
+    locked first (see `Router.freeze()`).
+
+    Args:
+      host (str): address to listen on
+      port (int): port to listen on
+      provider (str, optional): `uvicorn` or `hypercorn`. Defaults to
+          `uvicorn`.
+      freeze (bool, optional): freeze router before serving. Defaults to
+          False.
+    """
+    super().serve(host, port)
+    if freeze:
+      self.router.freeze()
+    self.router.print_debug_information(host, port, self)
+
+    # servers are optional dependencies, so only the used one is imported
+    if provider == "hypercorn":
+      from hypercorn.asyncio import serve
+      from hypercorn.config import Config
+      config = Config()
+      config.bind = [f"{host}:{port}"]
+      asyncio.run(serve(self, config))
+    else:
+      import uvicorn
+      uvicorn.run(self, host=host, port=port)
+
+  async def __call__(self, scope: dict, receive: Callable[[], Awaitable[dict]],
+                     send: Callable[[dict], Awaitable[None]]) -> None:
+    if scope["type"] == "lifespan":
+      await self._lifespan(receive, send)
+      return
+    if scope["type"] != "http":
+      raise RuntimeError(f"unsupported ASGI scope: {scope['type']}")
+
+    path = scope["path"]
+    rel = _relative_path(self.router.prefix, path)
+    if rel is None or self.router.rejects(rel):
+      # paths known to match no route are answered before the body is read
+      self.rejected.add(path)
+      resp = NOT_FOUND
+    else:
+      chunks = []
+      while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+          break
+      resp = await self.dispatch(AsgiRequest(scope, b"".join(chunks)), rel)
+
+    headers = [(name.encode("latin-1"), value.encode("latin-1"))
+               for name, value in resp.wsgi_headers()]
+    if self.cors:
+      headers.extend((name.encode("latin-1"), value.encode("latin-1"))
+                     for name, value in CORS_HEADERS)
+    await send({
+        "type": "http.response.start",
+        "status": resp.status,
+        "headers": headers
+    })
+    await send({
+        "type": "http.response.body",
+        "body": b"" if scope["method"] == "HEAD" else resp.body
+    })
+
+  async def respond(self, req: Request) -> Response:
+    """
+    Dispatches a request through the router and awaits the matched handler or
+    runs it on the thread pool. Aborts and unhandled exceptions are turned
+    into status responses like in WsgiProvider.
+
+    Args:
+      req (Request): request to handle
+
+    Returns:
+      Response: response for request
+    """
+    rel = _relative_path(self.router.prefix, req.path)
+    if rel is None or self.router.rejects(rel):
+      io.debug(f"{req.method} {req.path} {req.scheme}")
+      self.rejected.add(req.path)
+      _log_outcome(req, NOT_FOUND.status)
+      return NOT_FOUND
+    return await self.dispatch(req, rel)
+
+  async def dispatch(self, req: Request, rel: str) -> Response:
+    """
+    Matches a request, that has not been rejected by `Router.rejects()`, and
+    calls the matched handler (see `respond()`).
+
+    Args:
+      req (Request): request to handle
+      rel (str): path of request relative to the prefix of router
+
+    Returns:
+      Response: response for request
+    """
+    io.debug(f"{req.method} {req.path} {req.scheme}")
+
+    token = _request.set(req)
+    try:
+      handle = self.router.match(rel, req.method, checked=True)
+      if handle.func is None:
+        resp = make_allow_response(handle.allow)
+      elif handle.awaitable:
+        resp = make_response(await handle.func(*handle.args))
+      else:
+        # the thread runs in a copy of the context, to see the request
+        ctx = contextvars.copy_context()
+        rv = await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(ctx.run, handle.func, *handle.args))
+        if inspect.isawaitable(rv):
+          # e.g. wrappers of coroutine functions, that are no coroutine
+          # functions themselves
+          rv = await rv
+        resp = make_response(rv)
+    except Exception as ex:
+      resp = _factory_build_error_response(self, req, ex)
+    finally:
+      _request.reset(token)
+
+    _log_outcome(req, resp.status)
+    return resp
+
+  async def _lifespan(self, receive: Callable[[], Awaitable[dict]],
+                      send: Callable[[dict], Awaitable[None]]) -> None:
+    while True:
+      message = await receive()
+      if message["type"] == "lifespan.startup":
+        await send({"type": "lifespan.startup.complete"})
+      elif message["type"] == "lifespan.shutdown":
+        self.executor.shutdown(wait=False)
+        await send({"type": "lifespan.shutdown.complete"})
+        return
@@ -0,0 +1,285 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+import asyncio
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import unquote
+
+# -- PROJECT
+from raptor.providers.asgi import AsgiProvider
+from raptor.providers.provider import AbstractProvider
+from raptor.providers.wsgi import CORS_HEADERS
+from raptor.tools.http import Request, Response, make_status_response
+
+
+class _HttpError(Exception):
+  """
+  Malformed or oversized request, answered with a status response after which
+  the connection is closed.
+  """
+
+  http_status: HTTPStatus
+
+  def __init__(self, http_status: HTTPStatus) -> None:
+    super().__init__(http_status.phrase)
+    self.http_status = http_status
+
+
+def _parse_head(head: bytes) -> tuple[str, str, str, dict[str, str]]:
+  """
+  Parses the request line and headers of a request.
+
+  Args:
+    head (bytes): request head including the terminating empty line
+
+  Returns:
+    tuple[str, str, str, dict[str, str]]: method, target, HTTP version and
+        headers with lowercase names
+
+  Raises:
+    _HttpError: If head is malformed.
+  """
+  lines = head.decode("latin-1").split("\r\n")
+  parts = lines[0].split(" ")
+  if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+    raise _HttpError(HTTPStatus.BAD_REQUEST)
+  method, target, version = parts
+
+  headers = {}
+  for line in lines[1:]:
+    if not line:
+      continue
+    name, sep, value = line.partition(":")
+    if not sep or not name or name != name.strip():
+      raise _HttpError(HTTPStatus.BAD_REQUEST)
+    name = name.lower()
+    value = value.strip()
+    headers[name] = f"{headers[name]}, {value}" if name in headers else value
+  return method, target, version, headers
+
+
+@dataclass
+class AsyncioProvider(AsgiProvider):
+  """
+  Provider running a minimal HTTP/1.1 server on asyncio streams, without any
+  dependency outside the standard library. Handlers are called like in
+  AsgiProvider, `async def` handlers on the event loop and all others on the
+  thread pool.
+
+  Connections are persistent, unless the client asks to close them or speaks
+  HTTP/1.0 without `Connection: keep-alive`. Pipelined requests are answered
+  in order, one after another. After every response the server waits until
+  the socket has accepted the buffered data, so slow clients cannot make the
+  server buffer unbounded amounts of responses. Request heads and bodies are
+  bounded, larger requests are answered with 431 or 413 and the connection
+  is closed.
+
+  Examples:
+
+    >>> router.build_provider("asyncio").serve("0.0.0.0", 8080)
+
+  Attributes:
+    max_header_size (int): Maximum size of request line and headers in bytes.
+    max_body_size (int): Maximum size of request body in bytes.
+    timeout (float): Seconds to wait for the next request on a persistent
+        connection and for every read of a request.
+
+  Args:
+    router (Router): Router requests are dispatched to.
+    cors (bool, optional): Allow requests from all origins. Defaults to False.
+    max_workers (int, optional): Maximum number of threads running
+        synchronous handlers. Defaults to 16.
+    max_header_size (int, optional): Defaults to 16 KiB.
+    max_body_size (int, optional): Defaults to 1 MiB.
+    timeout (float, optional): Defaults to 5 seconds.
+  """
+
+  max_header_size: int
+  max_body_size: int
+  timeout: float
+
+  def __init__(self,
+               router: Any,
+               cors: bool = False,
+               max_workers: int = 16,
+               max_header_size: int = 16 * 1024,
+               max_body_size: int = 1024 * 1024,
+               timeout: float = 5.0) -> None:
+    super().__init__(router, cors, max_workers)
+    self.max_header_size = max_header_size
+    self.max_body_size = max_body_size
+    self.timeout = timeout
+
+  def serve(self, host: str, port: int, freeze: bool = False) -> None:
+    """
+    Serves the provider on host and port, until the process is interrupted.
+    By default the router stays mutable while it is served, so routes can
+    still be mounted and unmounted at runtime. With `freeze`, the route table
+    is locked first (see `Router.freeze()`).
+
+    Args:
+      host (str): address to listen on
+      port (int): port to listen on
+      freeze (bool, optional): freeze router before serving. Defaults to
+          False.
+    """
+    AbstractProvider.serve(self, host, port)
+    if freeze:
+      self.router.freeze()
+    self.router.print_debug_information(host, port, self)
+    asyncio.run(self.serve_forever(host, port))
+
+  async def serve_forever(self, host: str, port: int) -> None:
+    """
+    Accepts connections on host and port, until the task is cancelled.
+
+    Args:
+      host (str): address to listen on
+      port (int): port to listen on
+    """
+    server = await asyncio.start_server(self.handle_connection,
+                                        host,
+                                        port,
+                                        limit=self.max_header_size)
+    async with server:
+      await server.serve_forever()
+
+  async def handle_connection(self, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> None:
+    """
+    Answers the requests of one connection, until it is closed by either
+    side.
+
+    Args:
+      reader (asyncio.StreamReader): incoming stream of connection
+      writer (asyncio.StreamWriter): outgoing stream of connection
+    """
+    peer = writer.get_extra_info("peername")
+    remote_addr = peer[0] if isinstance(peer, tuple) else None
+    try:
+      while True:
+        try:
+          head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"),
+                                        self.timeout)
+        except asyncio.LimitOverrunError:
+          raise _HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+          break
+
+        method, target, version, headers = _parse_head(head)
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+          keep_alive = "keep-alive" in connection
+        else:
+          keep_alive = "close" not in connection
+
+        body = await self._read_body(reader, writer, headers)
+        path, _, query_string = target.partition("?")
+        req = Request(method, unquote(path), query_string, headers, body,
+                      remote_addr)
+        resp = await self.respond(req)
+
+        writer.write(self._serialize(resp, keep_alive, version, method))
+        # backpressure, waits only if the transport buffers too much data
+        await writer.drain()
+        if not keep_alive:
+          break
+    except _HttpError as ex:
+      writer.write(
+          self._serialize(make_status_response(ex.http_status), False,
+                          "HTTP/1.1", ""))
+      try:
+        await writer.drain()
+      except ConnectionError:
+        pass
+    except ConnectionError:
+      pass
+    finally:
+      writer.close()
+
+  async def _read_body(self, reader: asyncio.StreamReader,
+                       writer: asyncio.StreamWriter,
+                       headers: dict[str, str]) -> bytes:
+    encoding = headers.get("transfer-encoding")
+    if encoding is not None:
+      if encoding.lower() != "chunked":
+        raise _HttpError(HTTPStatus.NOT_IMPLEMENTED)
+      return await self._read_chunked(reader)
+
+    try:
+      length = int(headers.get("content-length", 0))
+    except ValueError:
+      raise _HttpError(HTTPStatus.BAD_REQUEST)
+    if length < 0:
+      raise _HttpError(HTTPStatus.BAD_REQUEST)
+    if length > self.max_body_size:
+      raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    if length == 0:
+      return b""
+
+    if headers.get("expect", "").lower() == "100-continue":
+      writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+    return await self._read(reader.readexactly(length))
+
+  async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    size = 0
+    while True:
+      line = await self._read(reader.readuntil(b"\r\n"))
+      try:
+        length = int(line.split(b";", 1)[0], 16)
+      except ValueError:
+        raise _HttpError(HTTPStatus.BAD_REQUEST)
+      size += length
+      if length < 0 or size > self.max_body_size:
+        raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+      if length == 0:
+        break
+      chunk = await self._read(reader.readexactly(length + 2))
+      chunks.append(chunk[:-2])
+
+    # skip trailers
+    while await self._read(reader.readuntil(b"\r\n")) != b"\r\n":
+      pass
+    return b"".join(chunks)
+
+  async def _read(self, read: Any) -> bytes:
+    try:
+      return await asyncio.wait_for(read, self.timeout)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+            asyncio.LimitOverrunError):
+      raise _HttpError(HTTPStatus.BAD_REQUEST)
+
+  def _serialize(self, resp: Response, keep_alive: bool, version: str,
+                 method: str) -> bytes:
+    lines = [f"HTTP/1.1 {resp.status_line}"]
+    lines.extend(f"{name}: {value}" for name, value in resp.wsgi_headers())
+    if self.cors:
+      lines.extend(f"{name}: {value}" for name, value in CORS_HEADERS)
+    if not keep_alive:
+      lines.append("Connection: close")
+    elif version == "HTTP/1.0":
+      lines.append("Connection: keep-alive")
+    lines.append("\r\n")
+    head = "\r\n".join(lines).encode("latin-1")
+    return head if method == "HEAD" else head + resp.body
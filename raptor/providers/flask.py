@@ -18,8 +18,9 @@
 
 # -- STL
 from dataclasses import dataclass
+import socket
 import traceback
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from http import HTTPStatus
 
 # -- LIBRARY
@@ -31,9 +32,25 @@ import bjoern
 
 # -- PROJECT
 from raptor.providers.provider import AbstractProvider
-from raptor.tools import io
+from raptor.tools import io, prefork
 from raptor.tools.errors import RaptorAbortException
-from raptor.tools.flask import make_status_response
+from raptor.tools.flask import make_allow_response, make_status_response
+
+NOT_FOUND_STATUS = "404 Not Found"
+"""str: Status line of precomputed response for rejected paths."""
+
+NOT_FOUND_BODY = b"404 Not Found"
+"""bytes: Body of precomputed response for rejected paths."""
+
+NOT_FOUND_HEADERS = [
+    ("Content-Type", "text/plain; charset=utf-8"),
+    ("Content-Length", str(len(NOT_FOUND_BODY))),
+]
+"""list[tuple[str, str]]: Headers of precomputed response for rejected paths."""
+
+CHECKED_ENVIRON_KEY = "raptor.checked"
+"""str: Key of WSGI environ holding the path, that has passed
+`Router.rejects()` in the reject middleware."""
 
 
 @dataclass
@@ -43,6 +60,8 @@ class FlaskProvider(AbstractProvider):
 
   Attributes:
     _flask (Flask): flask app for routing through the library
+    rejected (io.AggregateLog): Counter of requests answered with 404, logged
+        as a summary at most once a minute.
 
   Args:
     router (Router):
@@ -50,25 +69,72 @@ class FlaskProvider(AbstractProvider):
 
   _flask: Flask
   cors: bool
+  rejected: io.AggregateLog
 
   def __init__(self, router: Any, cors: bool = False) -> None:
     super().__init__(router)
     self.cors = cors
+    self.rejected = io.AggregateLog("Rejected requests to unknown paths")
     self._flask = _factory_build_flask_from_provider(self)
-
-  def serve(self, host: str, port: int, provider: str = "waitress") -> None:
+    self._flask.wsgi_app = _factory_build_reject_middleware(
+        self, self._flask.wsgi_app)
+
+  def serve(self,
+            host: str,
+            port: int,
+            provider: str = "waitress",
+            workers: int = 1,
+            freeze: bool = False) -> None:
+    """
+    Serves the flask app with one of the supported WSGI servers. By default
+    the router stays mutable while it is served, so routes can still be
+    mounted and unmounted at runtime. With `freeze`, the route table is
+    locked first (see `Router.freeze()`).
+
+    With more than one worker, the router is built once and then the process
+    is forked into a supervisor and workers (see
+    `raptor.tools.prefork.Supervisor`). waitress workers share one listening
+    socket bound before the fork, fastwsgi and bjoern workers bind the port
+    themselves with `SO_REUSEPORT`. Changes made to the router of the
+    supervisor after the fork never reach the workers, so the router is
+    always sealed right before the fork (see `Router.seal()`), which freezes
+    it and lets the workers share the memory of the route table. Sending
+    `SIGUSR1` to the supervisor logs the shared and private memory of every
+    worker.
+
+    Args:
+      host (str): address to listen on
+      port (int): port to listen on
+      provider (str, optional): `waitress`, `fastwsgi` or `bjoern`. Defaults
+          to `waitress`.
+      workers (int, optional): number of worker processes. Defaults to 1.
+      freeze (bool, optional): freeze router before serving. Defaults to
+          False.
+    """
     super().serve(host, port)
+    if freeze:
+      self.router.freeze()
     self.router.print_debug_information(host, port, self)
 
-    if provider == "fastwsgi":
-      fastwsgi.run(wsgi_app=self._flask, host=host, port=port)
-    elif provider == "bjoern":
-      bjoern.run(self._flask, host, port)
+    if workers <= 1:
+      _factory_build_server(self, provider, host, port)()
+      return
+
+    if provider in ("fastwsgi", "bjoern"):
+      run = _factory_build_server(self, provider, host, port, _reuse_port=True)
     else:
-      waitress.serve(app=self._flask, host=host, port=port)
+      sock = prefork.bind_socket(host, port)
+      run = _factory_build_server(self, provider, host, port, sock)
+    self.router.seal()
+    io.info(f"Forking {workers} workers")
+    prefork.Supervisor(run, workers).run()
 
   def handle_func(self, path: str, http_method: str) -> Response:
-    handle = self.router.match(path, http_method)
+    # paths, that have passed the reject middleware, are not filtered again
+    checked = request.environ.get(CHECKED_ENVIRON_KEY) == path
+    handle = self.router.match(path, http_method, checked)
+    if handle.func is None:
+      return make_allow_response(handle.allow)
     return handle.func(*handle.args)
 
 
@@ -86,6 +152,75 @@ def _tools_capitalize_all_string(_s: str) -> str:
   return " ".join([word.capitalize() for word in _s.split(" ")])
 
 
+def _factory_build_server(_prv: FlaskProvider,
+                          _provider: str,
+                          _host: str,
+                          _port: int,
+                          _sock: Optional[socket.socket] = None,
+                          _reuse_port: bool = False) -> Callable:
+  """
+  Builds a function running the selected WSGI server for the flask app of a
+  provider.
+
+  Args:
+    _prv (FlaskProvider): refrence to parent provider object
+    _provider (str): `waitress`, `fastwsgi` or `bjoern`
+    _host (str): address to listen on
+    _port (int): port to listen on
+    _sock (Optional[socket.socket], optional): listening socket shared by
+        waitress workers
+    _reuse_port (bool, optional): bind the port with `SO_REUSEPORT`, so that
+        every bjoern worker can bind it
+
+  Returns:
+    Callable: function running the server until it is stopped
+  """
+  if _provider == "fastwsgi":
+    # fastwsgi binds its socket with `SO_REUSEPORT`
+    return lambda: fastwsgi.run(wsgi_app=_prv._flask, host=_host, port=_port)
+  elif _provider == "bjoern":
+    return lambda: bjoern.run(
+        _prv._flask, _host, _port, reuse_port=_reuse_port)
+  elif _sock is not None:
+    return lambda: waitress.serve(app=_prv._flask, sockets=[_sock])
+  else:
+    return lambda: waitress.serve(app=_prv._flask, host=_host, port=_port)
+
+
+def _factory_build_reject_middleware(_prv: FlaskProvider,
+                                     _app: Callable) -> Callable:
+  """
+  Wraps the WSGI application of flask, so that paths known to match no route
+  (see `Router.rejects()`) are answered with a precomputed 404 response,
+  before flask builds a request context or an exception is raised.
+
+  Args:
+    _prv (FlaskProvider): refrence to parent provider object
+    _app (Callable): WSGI application of flask
+
+  Returns:
+    Callable: wrapped WSGI application
+  """
+  prefix = f"{_prv.router.prefix}/"
+  router = _prv.router
+  rejected = _prv.rejected
+
+  def _reject_middleware(environ: dict, start_response: Callable) -> Any:
+    path = environ.get("PATH_INFO", "")
+    if path.startswith(prefix):
+      rel = path[len(prefix):]
+      # paths with empty segments are left to flask, which redirects them
+      if rel[:1] != "/":
+        if router.rejects(rel):
+          rejected.add(path)
+          start_response(NOT_FOUND_STATUS, list(NOT_FOUND_HEADERS))
+          return [NOT_FOUND_BODY]
+        environ[CHECKED_ENVIRON_KEY] = rel
+    return _app(environ, start_response)
+
+  return _reject_middleware
+
+
 def _factory_build_flask_from_provider(_prv: FlaskProvider) -> Flask:
   """
   Capsules the Router inside a Flask application. All changes made to
@@ -99,7 +234,9 @@ def _factory_build_flask_from_provider(_prv: FlaskProvider) -> Flask:
   """
   # constant list of all supported REST HTTP method types currently supported by
   # flask.
-  FLASK_HTTP_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
+  FLASK_HTTP_METHODS = [
+      "GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"
+  ]
 
   # create a new Flask app.
   flask = Flask(__name__)
@@ -137,6 +274,10 @@ def _factory_build_flask_from_provider(_prv: FlaskProvider) -> Flask:
     if status_code < 400:
       io.info(f"{request.method} {request.path} {request.scheme}, "
               f"{request.remote_addr} - {status_code}")
+    elif status_code == HTTPStatus.NOT_FOUND:
+      # unknown paths are mostly scanner traffic, `rejected` logs a summary
+      io.debug(f"{request.method} {request.path} {request.scheme}, "
+               f"{request.remote_addr} - {status_code}")
     elif status_code >= 500:
       io.error(f"{request.method} {request.path} {request.scheme}, "
                f"{request.remote_addr} - {status_code}")
@@ -155,7 +296,8 @@ def _factory_build_flask_from_provider(_prv: FlaskProvider) -> Flask:
       if status_code < 400:
         io.debug(
             f"    => Called abort(): But why? (HTTP STATUS < 400): {str(_ex)}")
-        return make_response(jsonify(_ex.payload()), _ex.http_status.value)
+        return make_response(jsonify(_ex.payload()), _ex.http_status.value,
+                             _ex.headers)
       elif status_code >= 500:
         io.debug(f"    => Called abort(): Internal Error: {str(_ex)}")
         io.debug(f"    => Backtrace Error:")
@@ -163,6 +305,9 @@ def _factory_build_flask_from_provider(_prv: FlaskProvider) -> Flask:
         for line in _ex.backtrace_lines():
           io.debug(f"       ⋮ {line}")
         io.error(f"RaptorAbortExcpetion: INTERNAL SERVER ERROR: {str(_ex)}")
+      elif status_code == HTTPStatus.NOT_FOUND:
+        io.debug(f"    => Called abort(): Not Found: {str(_ex)}")
+        _prv.rejected.add(request.path)
       else:
         io.debug(f"    => Called abort(): User Error: {str(_ex)}")
         io.warning(
@@ -173,7 +318,9 @@ def _factory_build_flask_from_provider(_prv: FlaskProvider) -> Flask:
         io.warning(f"⋮ Exception: {str(_ex)}")
         io.warning(f"⋮ Response: {status_code} {status_text}")
 
-      return make_status_response(_ex.http_status)
+      resp = make_status_response(_ex.http_status)
+      resp.headers.update(_ex.headers)
+      return resp
     else:
       io.error("Caught unhandled Exception. Please fix issue in code.")
       io.error("Will treat exception as Internal Server Error (CODE 500).")
@@ -0,0 +1,324 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+from dataclasses import dataclass
+from http import HTTPStatus
+import traceback
+from typing import Any, Callable, Iterable, Optional
+
+# -- PROJECT
+from raptor.providers.provider import AbstractProvider
+from raptor.tools import io
+from raptor.tools.errors import RaptorAbortException
+from raptor.tools.http import (Request, Response, _request, make_allow_response,
+                               make_response, make_status_response)
+
+CORS_HEADERS = [("Access-Control-Allow-Origin", "*")]
+"""list[tuple[str, str]]: Headers added to every response, if CORS is enabled."""
+
+NOT_FOUND = make_status_response(HTTPStatus.NOT_FOUND)
+"""Response: Precomputed response for rejected paths."""
+
+
+class WsgiRequest(Request):
+  """
+  Request read from a WSGI environment. Headers are collected from the
+  `HTTP_*` keys of the environment and the body is read from `wsgi.input` on
+  first access.
+
+  Attributes:
+    environ (dict): WSGI environment of request.
+  """
+
+  __slots__ = ("environ",)
+
+  environ: dict
+
+  def __init__(self, environ: dict, path: Optional[str] = None) -> None:
+    super().__init__(environ.get("REQUEST_METHOD", "GET"),
+                     _path_info(environ) if path is None else path,
+                     environ.get("QUERY_STRING", ""),
+                     remote_addr=environ.get("REMOTE_ADDR"),
+                     scheme=environ.get("wsgi.url_scheme", "http"))
+    self.environ = environ
+
+  def read_headers(self) -> dict[str, str]:
+    headers = {
+        key[5:].replace("_", "-").lower(): value
+        for key, value in self.environ.items()
+        if key.startswith("HTTP_")
+    }
+    for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+      if self.environ.get(key):
+        headers[key.replace("_", "-").lower()] = self.environ[key]
+    return headers
+
+  def read_body(self) -> bytes:
+    try:
+      length = int(self.environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+      length = 0
+    return self.environ["wsgi.input"].read(length) if length > 0 else b""
+
+
+@dataclass
+class WsgiProvider(AbstractProvider):
+  """
+  Provider implementing the WSGI callable directly on top of the Router. In
+  contrast to FlaskProvider, every request is routed only once and no
+  framework contexts or hooks are involved. Handlers access the request
+  through `raptor.tools.http.get_request()` and return values, that are
+  converted by `raptor.tools.http.make_response()`.
+
+  Examples:
+
+    >>> provider = router.build_provider("wsgi")
+    >>> provider.serve("0.0.0.0", 8080, provider="bjoern")
+
+  Attributes:
+    cors (bool): Allow requests from all origins.
+    rejected (io.AggregateLog): Counter of requests answered with 404, logged
+        as a summary at most once a minute.
+
+  Args:
+    router (Router): Router requests are dispatched to.
+    cors (bool, optional): Allow requests from all origins. Defaults to False.
+  """
+
+  cors: bool
+  rejected: io.AggregateLog
+
+  def __init__(self, router: Any, cors: bool = False) -> None:
+    super().__init__(router)
+    self.cors = cors
+    self.rejected = io.AggregateLog("Rejected requests to unknown paths")
+
+  def serve(self,
+            host: str,
+            port: int,
+            provider: str = "waitress",
+            freeze: bool = False) -> None:
+    """
+    Serves the provider with one of the supported WSGI servers. By default
+    the router stays mutable while it is served, so routes can still be
+    mounted and unmounted at runtime. With `freeze`, the route table is
+    locked first (see `Router.freeze()`).
+
+    Args:
+      host (str): address to listen on
+      port (int): port to listen on
+      provider (str, optional): `waitress`, `fastwsgi` or `bjoern`. Defaults
+          to `waitress`.
+      freeze (bool, optional): freeze router before serving. Defaults to
+          False.
+    """
+    super().serve(host, port)
+    if freeze:
+      self.router.freeze()
+    self.router.print_debug_information(host, port, self)
+
+    # servers are optional dependencies, so only the used one is imported
+    if provider == "fastwsgi":
+      import fastwsgi
+      fastwsgi.run(wsgi_app=self, host=host, port=port)
+    elif provider == "bjoern":
+      import bjoern
+      bjoern.run(self, host, port)
+    else:
+      import waitress
+      waitress.serve(app=self, host=host, port=port)
+
+  def __call__(self, environ: dict,
+               start_response: Callable) -> Iterable[bytes]:
+    # paths known to match no route are answered before a request object is
+    # built (see `Router.rejects()`)
+    path = _path_info(environ)
+    rel = _relative_path(self.router.prefix, path)
+    if rel is None or self.router.rejects(rel):
+      self.rejected.add(path)
+      resp = NOT_FOUND
+      start_response(resp.status_line, resp.wsgi_headers())
+      return [resp.body]
+
+    req = WsgiRequest(environ, path)
+    resp = self.dispatch(req, rel)
+    headers = resp.wsgi_headers()
+    if self.cors:
+      headers.extend(CORS_HEADERS)
+    start_response(resp.status_line, headers)
+    # servers do not strip the body of responses to HEAD themselves
+    return [] if req.method == "HEAD" else [resp.body]
+
+  def respond(self, req: Request) -> Response:
+    """
+    Dispatches a request through the router and calls the matched handler.
+    Aborts and unhandled exceptions are turned into status responses and
+    every request is logged like in FlaskProvider.
+
+    Args:
+      req (Request): request to handle
+
+    Returns:
+      Response: response for request
+    """
+    rel = _relative_path(self.router.prefix, req.path)
+    if rel is None or self.router.rejects(rel):
+      io.debug(f"{req.method} {req.path} {req.scheme}")
+      self.rejected.add(req.path)
+      _log_outcome(req, NOT_FOUND.status)
+      return NOT_FOUND
+    return self.dispatch(req, rel)
+
+  def dispatch(self, req: Request, rel: str) -> Response:
+    """
+    Matches a request, that has not been rejected by `Router.rejects()`, and
+    calls the matched handler (see `respond()`).
+
+    Args:
+      req (Request): request to handle
+      rel (str): path of request relative to the prefix of router
+
+    Returns:
+      Response: response for request
+    """
+    io.debug(f"{req.method} {req.path} {req.scheme}")
+
+    token = _request.set(req)
+    try:
+      handle = self.router.match(rel, req.method, checked=True)
+      if handle.func is None:
+        resp = make_allow_response(handle.allow)
+      else:
+        resp = make_response(handle.func(*handle.args))
+    except Exception as ex:
+      resp = _factory_build_error_response(self, req, ex)
+    finally:
+      _request.reset(token)
+
+    _log_outcome(req, resp.status)
+    return resp
+
+
+def _path_info(_environ: dict) -> str:
+  """
+  Returns the requested path of a WSGI environment.
+
+  Args:
+    _environ (dict): WSGI environment of request
+
+  Returns:
+    str: requested path
+  """
+  path = _environ.get("PATH_INFO", "")
+  if not path.isascii():
+    # WSGI passes the raw path decoded as latin-1
+    path = path.encode("latin-1").decode("utf-8", "replace")
+  return path
+
+
+def _relative_path(_prefix: str, _path: str) -> Optional[str]:
+  """
+  Strips the prefix of the router from a requested path.
+
+  Args:
+    _prefix (str): prefix of router
+    _path (str): requested path
+
+  Returns:
+    Optional[str]: path relative to prefix, None if path is not below prefix
+  """
+  if _path == _prefix or _path.startswith(f"{_prefix}/"):
+    return _path[len(_prefix) + 1:]
+  return None
+
+
+def _log_outcome(_req: Request, _status: int) -> None:
+  """
+  Logs the outcome of a request with raptors internal logging tool `io`.
+
+  Args:
+    _req (Request): handled request
+    _status (int): HTTP status code of response
+  """
+  io.debug(f"    => Outcome: {_status}")
+  if _status < 400:
+    io.info(f"{_req.method} {_req.path} {_req.scheme}, "
+            f"{_req.remote_addr} - {_status}")
+  elif _status == HTTPStatus.NOT_FOUND:
+    # unknown paths are mostly scanner traffic, `rejected` logs a summary
+    io.debug(f"{_req.method} {_req.path} {_req.scheme}, "
+             f"{_req.remote_addr} - {_status}")
+  elif _status >= 500:
+    io.error(f"{_req.method} {_req.path} {_req.scheme}, "
+             f"{_req.remote_addr} - {_status}")
+  else:
+    io.warning(f"{_req.method} {_req.path} {_req.scheme}, "
+               f"{_req.remote_addr} - {_status}")
+
+
+def _factory_build_error_response(_prv: Any, _req: Request,
+                                  _ex: Exception) -> Response:
+  """
+  Converts an exception raised while handling a request into a response,
+  like the error handler of FlaskProvider.
+
+  Args:
+    _prv (Any): provider handling the request
+    _req (Request): handled request
+    _ex (Exception): raised exception
+
+  Returns:
+    Response: response for exception
+  """
+  if isinstance(_ex, RaptorAbortException):
+    status_code = _ex.http_status
+
+    if status_code < 400:
+      io.debug(
+          f"    => Called abort(): But why? (HTTP STATUS < 400): {str(_ex)}")
+      return make_response((_ex.payload(), status_code.value, _ex.headers))
+    elif status_code >= 500:
+      io.debug(f"    => Called abort(): Internal Error: {str(_ex)}")
+      io.error(f"RaptorAbortExcpetion: INTERNAL SERVER ERROR: {str(_ex)}")
+    elif status_code == HTTPStatus.NOT_FOUND:
+      io.debug(f"    => Called abort(): Not Found: {str(_ex)}")
+      _prv.rejected.add(_req.path)
+    else:
+      io.debug(f"    => Called abort(): User Error: {str(_ex)}")
+      io.warning(
+          "User Error may be investigated. Is something suspicious happening?")
+      io.warning(f"⋮ Ip: {_req.remote_addr}")
+      io.warning(f"⋮ On: {_req.path}")
+      io.warning(f"⋮ Exception: {str(_ex)}")
+      io.warning(f"⋮ Response: {status_code.value} {status_code.phrase}")
+
+    resp = make_status_response(status_code)
+    resp.headers.extend(_ex.headers.items())
+    return resp
+
+  io.error("Caught unhandled Exception. Please fix issue in code.")
+  io.error("Will treat exception as Internal Server Error (CODE 500).")
+  io.error("Program won't terminate, handling Exception gracefully.")
+  io.error("⋮")
+  for part in traceback.format_exception(_ex):
+    for line in part.split("\n"):
+      io.error(f"⋮  {line}")
+  return make_status_response(HTTPStatus.INTERNAL_SERVER_ERROR)
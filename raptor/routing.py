@@ -27,29 +27,67 @@
 
 # -- FUTURE (subject to change, handle with care)
 from __future__ import annotations
-from ctypes import Union
 from mimetypes import types_map
 
 # -- STL
 import re
 import os
 import sys
+import hashlib
+import json
+import pickle
+import copyreg
+import itertools
+import gc
+from collections.abc import Hashable
+import inspect
+from functools import lru_cache, partial
+from time import perf_counter_ns
 from types import FunctionType
-from typing import NamedTuple, Optional, Any, OrderedDict, Pattern
+from typing import (NamedTuple, Optional, Any, Pattern, Union,
+                    Iterable, Callable)
 from enum import Enum
 from dataclasses import dataclass, field
 from http import HTTPStatus
 from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import quote
 from xml.dom.minidom import NamedNodeMap
 
+# the parser of re is private and only used to analyze templates, which
+# falls back to a conservative answer without it (see `_contains()`)
+try:
+  from re import _parser as _sre_parse  # python >= 3.11
+except ImportError:
+  try:
+    import sre_parse as _sre_parse
+  except ImportError:
+    _sre_parse = None
+
 # -- PROJECT
-from raptor.tools import io
+from raptor.tools import io, prefork
+from raptor.tools.cache import LruCache
 from raptor.tools.errors import RaptorAbortException
-from raptor.providers import AbstractProvider, FlaskProvider
-
-SUPPORTED_HTTP_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
+from raptor.providers import (AbstractProvider, AsgiProvider, AsyncioProvider,
+                              FlaskProvider, WsgiProvider)
+from raptor.engines import (ENGINES, AbstractEngine, EngineMatch, TraceStep,
+                            TrieEngine)
+from raptor.engines.trie import _EMPTY
+from raptor.engines.engine import segments_to_rx
+
+SUPPORTED_HTTP_METHODS = [
+    "GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"
+]
 """list[str]: All supported HTTP methods by raptor.routing package."""
 
+ARTIFACT_FORMAT = 6
+"""int: Version of the file format written by `Router.save()`."""
+
+HTTP_METHOD_BITS = {
+    method: 1 << i for i, method in enumerate(SUPPORTED_HTTP_METHODS)
+}
+"""dict[str, int]: Bit of every supported HTTP method in method bitmasks."""
+
 
 @dataclass
 class _RouteVariableTypeRepr():
@@ -99,7 +137,7 @@ class RouteVariableType(Enum):
   PATH = _RouteVariableTypeRepr(str, r"[-a-zA-Z0-9@:%._\+~#=/]+")
   INT = _RouteVariableTypeRepr(int, r"[-+]?\d+")
   UINT = _RouteVariableTypeRepr(int, r"\d+")
-  FLOAT = _RouteVariableTypeRepr(float, r"[-+]?\d*\.?\d+|\d+")
+  FLOAT = _RouteVariableTypeRepr(float, r"[-+]?(?:\d+(?:\.\d+)?|\.\d+)")
   UUID0 = _RouteVariableTypeRepr(
       str, r"[a-f0-9]{8}-?[a-f0-9]{4}-?[a-f0-9]{4}-?[a-f0-9]{4}-?[a-f0-9]{12}")
   UUID = _RouteVariableTypeRepr(
@@ -155,6 +193,171 @@ class RouteVariableType(Enum):
     return RouteVariableType.__dict__.get(ty, RouteVariableType.STR)
 
 
+_HEX_CHARS = "0123456789abcdefABCDEF"
+_STR_CHARS = ("-0123456789abcdefghijklmnopqrstuvwxyz"
+              "ABCDEFGHIJKLMNOPQRSTUVWXYZ@:%._+~#=")
+
+
+def _consists_of(chars: str) -> Callable[[str], bool]:
+  """
+  Returns a validator accepting non-empty strings of the given characters.
+  `str.strip()` only returns an empty string, if all characters are part of
+  `chars`, and runs without a regex.
+
+  Args:
+    chars (str): accepted characters
+
+  Returns:
+    Callable[[str], bool]: validator
+  """
+
+  def validate(value: str) -> bool:
+    return value != "" and not value.strip(chars)
+
+  return validate
+
+
+def _hex_of_length(length: int) -> Callable[[str], bool]:
+  """
+  Returns a validator for hexadecimal strings of fixed length, e.g. hashes.
+
+  Args:
+    length (int): number of hexadecimal digits
+
+  Returns:
+    Callable[[str], bool]: validator
+  """
+
+  def validate(value: str) -> bool:
+    return len(value) == length and not value.strip(_HEX_CHARS)
+
+  return validate
+
+
+def _is_int(value: str) -> bool:
+  return value.isdecimal() or (value[:1] in "+-" and value[1:].isdecimal())
+
+
+@dataclass(frozen=True, eq=False)
+class VariableType():
+  """
+  Type of variables in template routes, registered under its name in
+  `VARIABLE_TYPES`. Variables are matched by the regex of their type, but
+  engines that look at single segments call the validator directly instead,
+  if the type has one.
+
+  Attributes:
+    name (str): Name of type in template routes, e.g. `int` in `{id:int}`.
+    ty (Callable[[str], Any]): Converter from matched string to python value.
+    rx (str): Regular expression for type, must not contain capturing groups.
+    validate (Optional[Callable[[str], bool]]): Checks if a string is a valid
+        value of type, without a regex.
+    exact (bool): True if `rx` accepts exactly the strings accepted by
+        `validate`, otherwise `validate` has to be called after `rx` matched.
+    spans (bool): True if variables of type can match across `/`.
+  """
+
+  name: str
+  ty: Callable[[str], Any]
+  rx: str
+  validate: Optional[Callable[[str], bool]] = None
+  exact: bool = True
+  spans: bool = False
+
+
+_VALIDATORS = {
+    "HEX": _consists_of(_HEX_CHARS),
+    "STR": _consists_of(_STR_CHARS),
+    "PATH": _consists_of(_STR_CHARS + "/"),
+    "INT": _is_int,
+    "UINT": str.isdecimal,
+    "MD5": _hex_of_length(32),
+    "SHA1": _hex_of_length(40),
+    "SHA224": _hex_of_length(56),
+    "SHA256": _hex_of_length(64),
+    "SHA384": _hex_of_length(96),
+    "SHA512": _hex_of_length(128),
+}
+"""
+dict[str, Callable[[str], bool]]: Validators of built-in types, that can be
+    checked faster than by their regex. Each accepts the same strings as the
+    regex of its type. `\\d` matches exactly the characters for which
+    `str.isdecimal()` is True.
+"""
+
+VARIABLE_TYPES: dict[str, VariableType] = {
+    name.lower(): VariableType(name.lower(),
+                               ty.value.ty,
+                               ty.value.rx,
+                               _VALIDATORS.get(name),
+                               spans=ty is RouteVariableType.PATH)
+    for name, ty in RouteVariableType.__members__.items()
+}
+"""dict[str, VariableType]: Registry of variable types by their name."""
+
+
+def register_variable_type(
+    name: str,
+    ty: Callable[[str], Any],
+    rx: Optional[str] = None,
+    validate: Optional[Callable[[str], bool]] = None) -> VariableType:
+  """
+  Registers a custom type for variables in template routes. Types have to be
+  registered before the templates using them are mounted. Variables of custom
+  types never match across `/`.
+
+  Without a regex, variables of the type match any single segment (`[^/]+`)
+  for engines that match whole paths and the validator decides. Such types
+  should make up a whole module of a template, as the validator is not
+  consulted on how a module is split between its variables.
+
+  Examples:
+    >>> register_variable_type("date", date.fromisoformat,
+    ...                        validate=_is_iso_date)
+    >>> register_variable_type("bool", lambda v: v == "true",
+    ...                        rx="true|false")
+    >>> register_variable_type("uuid_obj", uuid.UUID,
+    ...                        rx=VARIABLE_TYPES["uuid0"].rx)
+    >>> register_variable_type("page", int,
+    ...                        validate=lambda v: v.isdecimal() and
+    ...                        1 <= int(v) <= 1000)
+
+  Args:
+    name (str): name of type in template routes
+    ty (Callable[[str], Any]): converter from matched string to python value
+    rx (Optional[str], optional): regular expression for type without
+        capturing groups. Defaults to `[^/]+`.
+    validate (Optional[Callable[[str], bool]], optional): checks if a string
+        is a valid value. If given, it is called for every match, otherwise
+        the regex alone decides.
+
+  Returns:
+    VariableType: registered type
+
+  Raises:
+    ValueError: If name is invalid or already registered, if neither regex
+        nor validator are given or if the regex contains capturing groups.
+  """
+  if re.fullmatch(r"\w+", name) is None:
+    raise ValueError(f"invalid name of variable type: '{name}'")
+  if name in VARIABLE_TYPES:
+    raise ValueError(f"variable type already registered: '{name}'")
+  if rx is None and validate is None:
+    raise ValueError(f"variable type '{name}' needs a regex or a validator")
+  if rx is not None and re.compile(rx).groups:
+    raise ValueError(
+        f"regex of variable type '{name}' contains capturing groups: '{rx}'")
+
+  vt = VariableType(name, ty, rx or r"[^/]+", validate, validate is None)
+  VARIABLE_TYPES[name] = vt
+
+  # modules may have been parsed as literals before the type existed
+  _var_rx.cache_clear()
+  _parse_module.cache_clear()
+  _module_rx.cache_clear()
+  return vt
+
+
 @dataclass
 class RouteVariable():
   """
@@ -170,21 +373,433 @@ class RouteVariable():
     key (str): Key of variable.
   """
 
+  __slots__ = ("key", "rxt")
+
   key: str
-  rxt: RouteVariableType
+  rxt: VariableType
+
+
+class _Chars(NamedTuple):
+  """
+  Summary of the strings matched by a parsed regex with respect to a single
+  character, computed by `_scan()`.
+
+  Attributes:
+    empty (bool): The regex may match the empty string.
+    filled (bool): The regex may match a non-empty string.
+    first (bool): A match may start with the character.
+    inner (bool): A match may contain the character after its first one.
+  """
+
+  empty: bool
+  filled: bool
+  first: bool
+  inner: bool
+
+
+_ANY_CHARS = _Chars(True, True, True, True)
+"""_Chars: Summary of regexes, that can not be analyzed."""
+
+_NO_CHARS = _Chars(True, False, False, False)
+"""_Chars: Summary of zero-width assertions."""
+
+try:
+  _CATEGORIES = {
+      _sre_parse.CATEGORY_DIGIT: str.isdecimal,
+      _sre_parse.CATEGORY_NOT_DIGIT: lambda c: not c.isdecimal(),
+      _sre_parse.CATEGORY_SPACE: str.isspace,
+      _sre_parse.CATEGORY_NOT_SPACE: lambda c: not c.isspace(),
+      _sre_parse.CATEGORY_WORD: lambda c: c.isalnum() or c == "_",
+      _sre_parse.CATEGORY_NOT_WORD: lambda c: not (c.isalnum() or c == "_"),
+  }
+except AttributeError:
+  _sre_parse = None
+  _CATEGORIES = {}
+"""dict[Any, Callable[[str], bool]]: Character classes like `\\d` of re."""
+
+
+def _matches_char(op: Any, av: Any, char: str) -> Optional[bool]:
+  """
+  Checks if a single character item of a parsed regex matches a character.
+
+  Args:
+    op (Any): opcode of item
+    av (Any): argument of item
+    char (str): single character
+
+  Returns:
+    Optional[bool]: True if item matches char, None if item is no single
+        character.
+  """
+  if op is _sre_parse.LITERAL:
+    return ord(char) == av
+  if op is _sre_parse.NOT_LITERAL:
+    return ord(char) != av
+  if op is _sre_parse.ANY:
+    return True
+  if op is _sre_parse.RANGE:
+    return av[0] <= ord(char) <= av[1]
+  if op is _sre_parse.CATEGORY:
+    # unknown categories (e.g. of bytes or locales) match conservatively
+    return _CATEGORIES.get(av, lambda c: True)(char)
+  if op is _sre_parse.IN:
+    negate = bool(av) and av[0][0] is _sre_parse.NEGATE
+    # items that are not understood may match
+    hit = any(_matches_char(o, a, char) is not False for o, a in av[negate:])
+    return hit is not negate
+  return None
+
+
+def _scan(items: Any, char: str) -> _Chars:
+  """
+  Summarizes where a character may occur in the strings matched by a parsed
+  regex. Alternatives and repetitions are combined exactly, constructs that
+  are not understood (e.g. backreferences) match any string.
+
+  Args:
+    items (Any): sequence of items of a parsed regex (see `re._parser`)
+    char (str): single character
+
+  Returns:
+    _Chars: summary of matches
+  """
+  result = _NO_CHARS
+  for op, av in items:
+    matched = _matches_char(op, av, char)
+    if matched is not None:
+      part = _Chars(False, True, matched, False)
+    elif op is _sre_parse.SUBPATTERN:
+      part = _scan(av[-1], char)
+    elif op is getattr(_sre_parse, "ATOMIC_GROUP", None):
+      part = _scan(av, char)
+    elif op is _sre_parse.BRANCH:
+      branches = [_scan(branch, char) for branch in av[1]]
+      part = _Chars(*(any(field) for field in zip(*branches)))
+    elif op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT,
+                getattr(_sre_parse, "POSSESSIVE_REPEAT", None)):
+      lo, hi, item = av
+      once = _scan(item, char)
+      if hi == 0:
+        part = _NO_CHARS
+      else:
+        # a second repetition may start with the character
+        again = hi > 1 and once.filled and once.first
+        part = _Chars(lo == 0 or once.empty, once.filled, once.first,
+                      once.inner or again)
+    elif op in (_sre_parse.AT, _sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+      part = _NO_CHARS
+    else:
+      return _ANY_CHARS
+
+    result = _Chars(
+        result.empty and part.empty,
+        result.filled or part.filled,
+        result.first or (result.empty and part.first),
+        result.inner or part.inner or (result.filled and part.first),
+    )
+  return result
+
+
+@lru_cache(maxsize=None)
+def _contains(rxt: VariableType, char: str) -> bool:
+  """
+  Checks if values of a variable type can contain a character after their
+  first character. Derived from the parsed regex of type, so custom types are
+  analyzed like the built-in ones. If the private parser of `re` is missing or
+  its output is not understood, every character is assumed to be contained,
+  so that safe mode refuses the template rather than accepting an ambiguous
+  one.
+
+  Args:
+    rxt (VariableType): type of variable
+    char (str): single character
+
+  Returns:
+    bool: True if a value of type may contain char after its first character.
+  """
+  if _sre_parse is None:
+    return True
+  try:
+    parsed = _sre_parse.parse(rxt.rx)
+    # both cases are checked, as parts of the regex may ignore case
+    return any(
+        _scan(parsed, c).inner for c in {char, char.lower(), char.upper()})
+  except (AttributeError, TypeError, ValueError, re.error) as ex:
+    io.debug(f"Can not analyze regex of type '{rxt.name}': {ex!r}")
+    return True
+
+
+def analyze_template(segments: list[tuple]) -> list[str]:
+  """
+  Finds variables of a parsed template, whose matches are ambiguous, so that
+  a regex built from the template can backtrack polynomially on long paths.
+  Variables are ambiguous, if they are not separated by a literal, if the
+  separating literal may be part of the preceding variable, e.g.
+  `{name:str}.{ext:str}`, or if they follow a variable spanning multiple
+  segments. Whether a variable may contain a literal is derived from the
+  regex of its type (see `_contains()`), which works for custom types alike.
+
+  Args:
+    segments (list[tuple]): parsed modules of template path
+
+  Returns:
+    list[str]: description of every ambiguity, empty if there is none
+  """
+  problems = []
+  spanning = None
+  for tokens in segments:
+    prev = None
+    sep = ""
+    for tk in tokens:
+      if isinstance(tk, str):
+        sep += tk
+        continue
+
+      if spanning is not None:
+        problems.append(f"'{tk.key}' follows '{spanning.key}', which may "
+                        "contain '/'")
+      if prev is not None and not sep:
+        problems.append(f"'{prev.key}' and '{tk.key}' are not separated")
+      elif prev is not None and _contains(prev.rxt, sep[0]):
+        problems.append(f"'{prev.key}' may contain '{sep[0]}', which "
+                        f"separates it from '{tk.key}'")
+
+      prev, sep = tk, ""
+      if spanning is None and tk.rxt.spans:
+        spanning = tk
+  return problems
+
+
+@lru_cache(maxsize=None)
+def _var_rx() -> Pattern:
+  """
+  Returns the compiled regex for variable declarations (`{name:type}`) in
+  template routes.
+
+  Returns:
+    Pattern: regex with groups for name and type of variable
+  """
+  # longer names first, so `uuid4` does not backtrack over `uuid`
+  names = sorted(VARIABLE_TYPES, key=len, reverse=True)
+  return re.compile(f"{{(\\w+):({'|'.join(map(re.escape, names))})}}")
+
+
+@lru_cache(maxsize=4096)
+def _parse_module(module: str) -> tuple[Union[str, RouteVariable], ...]:
+  """
+  Splits a single module of a template route into its literal parts and
+  variables, e.g. `{name:str}.jpg` into `(RouteVariable("name", STR), ".jpg")`.
+  Results are cached, as modules like `api` or `{id:int}` repeat across many
+  templates, and therefore shared between routes.
+
+  Args:
+    module (str): module of template route (part between two `/`)
+
+  Returns:
+    tuple[Union[str, RouteVariable], ...]: literals and variables in order
+  """
+  tokens = []
+  pos = 0
+  for m in _var_rx().finditer(module):
+    if m.start() > pos:
+      tokens.append(module[pos:m.start()])
+    tokens.append(RouteVariable(m[1], VARIABLE_TYPES[m[2]]))
+    pos = m.end()
+  if pos < len(module):
+    tokens.append(module[pos:])
+  return tuple(tokens)
+
+
+@lru_cache(maxsize=4096)
+def _module_rx(module: str) -> str:
+  """
+  Returns the regular expression of a single module of a template route.
+
+  Args:
+    module (str): module of template route (part between two `/`)
+
+  Returns:
+    str: regular expression (without anchors) of module
+  """
+  return segments_to_rx([_parse_module(module)])
+
+
+def _shared_objects() -> dict[int, tuple[str, ...]]:
+  """
+  Returns the objects, that `Router.save()` references by name instead of
+  pickling them: all registered variable types, their converters and their
+  validators (closures can not be pickled) and the shared empty children of
+  trie nodes.
+
+  Returns:
+    dict[int, tuple[str, ...]]: key of every shared object by its id
+  """
+  shared = {id(_EMPTY): ("empty",)}
+  for name, vt in VARIABLE_TYPES.items():
+    shared[id(vt)] = ("type", name)
+    shared.setdefault(id(vt.ty), ("ty", name))
+    if vt.validate is not None:
+      shared.setdefault(id(vt.validate), ("validate", name))
+  return shared
+
+
+def _mapping_proxy(mapping: dict) -> MappingProxyType:
+  return MappingProxyType(mapping)
+
+
+def _reduce_mapping_proxy(proxy: MappingProxyType) -> tuple:
+  return _mapping_proxy, (dict(proxy),)
+
+
+class _ArtifactPickler(pickle.Pickler):
+  """
+  Pickler of `Router.save()`, referencing variable types by their name (see
+  `_shared_objects()`) and pickling the read-only mappings of frozen routers.
+  """
+
+  dispatch_table = copyreg.dispatch_table.copy()
+  dispatch_table[MappingProxyType] = _reduce_mapping_proxy
+
+  def __init__(self, file: Any) -> None:
+    super().__init__(file, pickle.HIGHEST_PROTOCOL)
+    self.shared = _shared_objects()
+
+  def persistent_id(self, obj: Any) -> Optional[tuple[str, ...]]:
+    return self.shared.get(id(obj))
+
+
+class _ArtifactUnpickler(pickle.Unpickler):
+  """
+  Unpickler of `Router.load()`, resolving variable types by their name.
+  """
+
+  def persistent_load(self, pid: tuple[str, ...]) -> Any:
+    if pid[0] == "empty":
+      return _EMPTY
+    vt = VARIABLE_TYPES[pid[1]]
+    return vt if pid[0] == "type" else getattr(vt, pid[0])
+
+
+def _types_fingerprint() -> str:
+  """
+  Returns a hash over all variable types and their regexes. Persisted routers
+  contain regexes built from these types and become invalid once they change.
+
+  Returns:
+    str: hex digest of variable types
+  """
+  types = [(vt.name, vt.rx, vt.exact, vt.spans)
+           for vt in VARIABLE_TYPES.values()]
+  return hashlib.sha256(json.dumps(types).encode()).hexdigest()
+
+
+def source_hash(*files: Union[str, Path]) -> str:
+  """
+  Computes a hash over the contents of source files, e.g. the modules that
+  declare the routes and handlers of an application. Used to decide, if a
+  persisted router is still up to date.
+
+  Args:
+    *files (Union[str, Path]): paths of source files
+
+  Returns:
+    str: hex digest of files
+  """
+  digest = hashlib.sha256()
+  for file in files:
+    digest.update(Path(file).read_bytes())
+  return digest.hexdigest()
+
+
+HTTP_METHOD_IDS = {method: i for i, method in enumerate(SUPPORTED_HTTP_METHODS)}
+"""dict[str, int]: Index of every supported HTTP method in handler tuples."""
+
+
+def _is_async(func: Callable) -> bool:
+  """
+  Checks if a handler has to be awaited. Partials are unwrapped and callable
+  objects are checked by their `__call__` method.
+
+  Args:
+    func (Callable): handler of a route
+
+  Returns:
+    bool: True if func is a coroutine function or an object, whose
+        `__call__` is one
+  """
+  while isinstance(func, partial):
+    func = func.func
+  return inspect.iscoroutinefunction(func) or (
+      not inspect.isroutine(func) and
+      inspect.iscoroutinefunction(getattr(func, "__call__", None)))
+
+
+@lru_cache(maxsize=None)
+def _allow(mask: int) -> tuple[str, dict[str, str]]:
+  """
+  Returns the `Allow` header for a bitmask of HTTP methods. Results are shared
+  between all routes accepting the same methods.
+
+  Args:
+    mask (int): bitmask of accepted HTTP methods
+
+  Returns:
+    tuple[str, dict[str, str]]: value of header and header as dictionary
+  """
+  allow = ", ".join(
+      m for m in SUPPORTED_HTTP_METHODS if mask & HTTP_METHOD_BITS[m])
+  return allow, {"Allow": allow}
 
 
 class HttpMethodsMap():
   """
   Class for storing an retrieving function-pointers corresponding to a
-  specific HTTP Method.
+  specific HTTP Method. `HEAD` is answered by the function of `GET` and
+  `OPTIONS` is always accepted, if they are not registered explicitly.
+
+  Attributes:
+    handlers (tuple[Optional[FunctionType], ...]): Function-pointers indexed
+        by the id of their HTTP method (see `HTTP_METHOD_IDS`), including the
+        implicit `HEAD` handler.
+    registered (int): Bitmask of explicitly registered HTTP methods.
+    mask (int): Bitmask of all accepted HTTP methods (see `HTTP_METHOD_BITS`).
+    allow (str): Accepted HTTP methods as value for the `Allow` header.
+    allow_headers (dict[str, str]): Precomputed `Allow` header.
+    awaitable (int): Bitmask of HTTP methods, whose function has to be
+        awaited. Handlers are checked once when they are registered, instead
+        of on every request (see `RouteHandle.awaitable`).
   """
 
-  _internal: dict[str, FunctionType]
-  """Dictionary for mapping HTTP methods to a function pointer"""
+  __slots__ = ("handlers", "registered", "mask", "allow", "allow_headers",
+               "awaitable")
+
+  handlers: tuple[Optional[FunctionType], ...]
+  registered: int
+  mask: int
+  allow: str
+  allow_headers: dict[str, str]
+  awaitable: int
 
   def __init__(self) -> None:
-    self._internal = {}
+    self.handlers = (None,) * len(SUPPORTED_HTTP_METHODS)
+    self.registered = 0
+    self._update()
+
+  def _update(self) -> None:
+    handlers = list(self.handlers)
+    get, head = HTTP_METHOD_IDS["GET"], HTTP_METHOD_IDS["HEAD"]
+    if not self.registered & HTTP_METHOD_BITS["HEAD"]:
+      handlers[head] = handlers[get]
+
+    self.handlers = tuple(handlers)
+    self.mask = self.registered | HTTP_METHOD_BITS["OPTIONS"]
+    if self.registered & HTTP_METHOD_BITS["GET"]:
+      self.mask |= HTTP_METHOD_BITS["HEAD"]
+    self.allow, self.allow_headers = _allow(self.mask)
+    self.awaitable = 0
+    for i, func in enumerate(self.handlers):
+      if func is not None and _is_async(func):
+        self.awaitable |= 1 << i
 
   def register(self, http_methods: list[str], func: FunctionType) -> None:
     """
@@ -199,33 +814,227 @@ class HttpMethodsMap():
       Exception: If HTTP method is unkown and therefore not in the
           `SUPPORTED_HTTP_METHODS` list.
     """
+    handlers = list(self.handlers)
     for method in http_methods:
       # check if `method` is valid http-method
       if method in SUPPORTED_HTTP_METHODS:
-        # map function pointer to key `method`
-        self._internal[method] = func
+        # map function pointer to index of `method`
+        handlers[HTTP_METHOD_IDS[method]] = func
+        self.registered |= HTTP_METHOD_BITS[method]
       else:
         # throw excpetion, if `method` is not a http-method
         raise Exception(f"unsupported rest-method: '{method}'")
+    self.handlers = tuple(handlers)
+    self._update()
+
+  def unregister(self, http_methods: list[str]) -> None:
+    """
+    Removes the function-pointers of specific HTTP Method(s).
+
+    Args:
+      http_methods (list[str]): List of HTTP Methods that are removed.
+
+    Raises:
+      Exception: If HTTP method is unkown and therefore not in the
+          `SUPPORTED_HTTP_METHODS` list.
+    """
+    handlers = list(self.handlers)
+    for method in http_methods:
+      if method in SUPPORTED_HTTP_METHODS:
+        handlers[HTTP_METHOD_IDS[method]] = None
+        self.registered &= ~HTTP_METHOD_BITS[method]
+      else:
+        raise Exception(f"unsupported rest-method: '{method}'")
+    self.handlers = tuple(handlers)
+    self._update()
 
   def get(self, http_method_type: str) -> Optional[FunctionType]:
     """
     Returns the function-pointer corresponding to HTTP request method.
 
     @return function-pointer for HTTP Method, None if invalid HTTP request
-    method
+    method or implicit `OPTIONS` request
     """
-    return self._internal.get(http_method_type)
+    i = HTTP_METHOD_IDS.get(http_method_type)
+    return None if i is None else self.handlers[i]
+
+  def items(self) -> list[tuple[str, FunctionType]]:
+    """
+    Returns the explicitly registered HTTP methods and their function-pointers.
+
+    Returns:
+      list[tuple[str, FunctionType]]: pairs of HTTP method and function
+    """
+    return [(m, self.handlers[i])
+            for m, i in HTTP_METHOD_IDS.items()
+            if self.registered & HTTP_METHOD_BITS[m]]
 
 
-@dataclass
 class VarFilter():
-  type_map: list[type]
+  """
+  Converters and validators for the variables of a route. Routes with the
+  same types of variables share one object (see `_var_filter()`).
+
+  Attributes:
+    type_map (tuple[type, ...]): Converters of the variables in order.
+    checks (tuple[tuple[int, Callable[[str], bool]], ...]): Index and
+        validator of variables, whose regex alone does not decide.
+
+  Args:
+    type_map (tuple[type, ...]): converters of the variables
+    checks (tuple, optional): index and validator of variables
+  """
+
+  __slots__ = ("type_map", "checks")
+
+  type_map: tuple[type, ...]
+  checks: tuple[tuple[int, Callable[[str], bool]], ...]
+
+  def __init__(self, type_map: tuple[type, ...], checks: tuple = ()) -> None:
+    self.type_map = type_map
+    self.checks = checks
+
+  def check(self, vars: Union[tuple, list]) -> bool:
+    """
+    Runs the validators of variables, whose regex alone does not decide, if
+    a string is a valid value.
+
+    Args:
+      vars (Union[tuple, list]): matched strings of all variables
+
+    Returns:
+      bool: True if all variables are valid
+    """
+    return all(validate(vars[i]) for i, validate in self.checks)
 
   def use(self, vars: Union[tuple, list]) -> list:
     return [t(v) for t, v in zip(self.type_map, vars)]
 
 
+@lru_cache(maxsize=None)
+def _var_filter(type_map: tuple[type, ...], checks: tuple) -> VarFilter:
+  """
+  Returns the shared VarFilter for a combination of converters and
+  validators, so that large route tables hold one object per combination
+  instead of one per route.
+
+  Args:
+    type_map (tuple[type, ...]): converters of the variables
+    checks (tuple): index and validator of variables
+
+  Returns:
+    VarFilter: shared filter
+  """
+  return VarFilter(type_map, checks)
+
+
+@lru_cache(maxsize=None)
+def _url_check(rxt: VariableType) -> Callable[[str], bool]:
+  """
+  Returns the check for values of a variable type in URLs built by
+  `Router.url_for()`, its validator or the compiled regex of the type.
+
+  Args:
+    rxt (VariableType): type of variable
+
+  Returns:
+    Callable[[str], bool]: check accepting valid values of type
+  """
+  if rxt.validate is not None:
+    return rxt.validate
+  return re.compile(rxt.rx).fullmatch
+
+
+class UrlBuilder():
+  """
+  Precompiled URL builder of a route, used by `Router.url_for()`. The template
+  is turned into a format string with one positional field per variable, so
+  building an URL only validates, percent-encodes and formats the values.
+
+  Attributes:
+    tpl (str): Template path of route.
+    fmt (str): Format string of URL, including the prefix of router.
+    slots (tuple[tuple[str, VariableType, Callable[[str], bool]], ...]):
+        Name, type and check of every variable in order of the template.
+    keys (frozenset[str]): Names of all variables.
+
+  Args:
+    prefix (str): prefix of router
+    tpl (str): normalized template path
+    segments (list[tuple]): parsed modules of template path
+  """
+
+  __slots__ = ("tpl", "fmt", "slots", "keys")
+
+  tpl: str
+  fmt: str
+  slots: tuple[tuple[str, VariableType, Callable[[str], bool]], ...]
+  keys: frozenset[str]
+
+  def __init__(self, prefix: str, tpl: str, segments: list[tuple]) -> None:
+    modules = []
+    slots = []
+    for tokens in segments:
+      module = []
+      for tk in tokens:
+        if isinstance(tk, str):
+          module.append(tk.replace("{", "{{").replace("}", "}}"))
+        else:
+          module.append(f"{{{len(slots)}}}")
+          slots.append((tk.key, tk.rxt, _url_check(tk.rxt)))
+      modules.append("".join(module))
+
+    self.tpl = tpl
+    self.fmt = prefix.replace("{", "{{").replace("}", "}}") + \
+        "/" + "/".join(modules)
+    self.slots = tuple(slots)
+    self.keys = frozenset(key for key, _, _ in slots)
+    if not slots:
+      # URLs of static routes are returned as they are
+      self.fmt = self.fmt.format()
+
+  def build(self, vars: dict[str, Any]) -> str:
+    """
+    Builds the URL of route for values of its variables. Values are converted
+    by `str()` and have to be valid for the type of their variable. They are
+    percent-encoded, except for `/` in variables spanning several segments,
+    so that the decoded path of the URL is matched by the route again.
+
+    Args:
+      vars (dict[str, Any]): values of all variables by name
+
+    Returns:
+      str: URL of route
+
+    Raises:
+      ValueError: If a variable is missing, unknown or has an invalid value.
+    """
+    if not self.slots:
+      if vars:
+        raise ValueError(f"unknown variables for route '{self.tpl}': "
+                         f"{', '.join(vars)}")
+      return self.fmt
+
+    if len(vars) != len(self.keys):
+      unknown = set(vars) - self.keys
+      if unknown:
+        raise ValueError(f"unknown variables for route '{self.tpl}': "
+                         f"{', '.join(sorted(unknown))}")
+
+    values = []
+    for key, rxt, check in self.slots:
+      try:
+        value = str(vars[key])
+      except KeyError:
+        raise ValueError(
+            f"missing variable '{key}' for route '{self.tpl}'") from None
+      if not check(value):
+        raise ValueError(f"invalid value for variable '{key}' of type "
+                         f"'{rxt.name}' in route '{self.tpl}': {value!r}")
+      values.append(quote(value, safe="/" if rxt.spans else ""))
+    return self.fmt.format(*values)
+
+
 class Route():
   """
   Defines a templated path object for Router to figure out the original
@@ -233,104 +1042,1102 @@ class Route():
   for specific HTTP method.
 
   Attributes:
-    tmpl_string (str): Original templated path string from which object was
-        built.
-    tmpl_vars (list[RouteVariable]): List of extracted path variables, with
-        position, type and name.
+    tpl (str): Original templated path string from which object was built.
+    pattern (str): Regular expression of the templated path.
+    rx (Optional[Pattern]): Compiled regular expression of the templated path,
+        None until compiled by `compile()`.
+    segments (tuple[tuple]): Modules of the templated path, each split into
+        literals and RouteVariable objects.
+    var_filter (VarFilter): Converters for the path variables.
     http_methods_map (HttpMethodsMap): Dictionary of HTTP methods mapped to
         corresponding function pointers.
+    url_builder (Optional[UrlBuilder]): Builder for URLs of the route, None
+        until first used by `Router.url_for()`.
 
   Args:
-    tmpl_string (str): string that describes route template
-    tmpl_vars (list[RouteVariable]): list of extracted vars from tmpl_string
+    tpl (str): string that describes route template
+    pattern (str): regular expression built from tpl
+    segments (list[tuple]): parsed modules of tpl
+    var_filter (VarFilter): converters for the path variables
     func (FunctionType): function-pointer
     http_methods (list[str]): list of HTTP Methods that are accepted
   """
 
+  __slots__ = ("tpl", "pattern", "rx", "segments", "var_filter",
+               "http_methods_map", "url_builder")
+
   tpl: str
+  pattern: str
+  rx: Optional[Pattern]
+  segments: tuple[tuple[Union[str, RouteVariable], ...], ...]
   var_filter: VarFilter
   http_methods_map: HttpMethodsMap
+  url_builder: Optional[UrlBuilder]
 
-  def __init__(self, tpl: str, var_filter: VarFilter, func: FunctionType,
+  def __init__(self, tpl: str, pattern: str, segments: list[tuple],
+               var_filter: VarFilter, func: FunctionType,
                http_methods: list[str]) -> None:
     self.tpl = tpl
+    self.pattern = pattern
+    self.rx = None
+    self.segments = tuple(segments)
     self.var_filter = var_filter
     self.http_methods_map = HttpMethodsMap()
     self.http_methods_map.register(http_methods, func)
+    self.url_builder = None
+
+  def compile(self) -> Pattern:
+    """
+    Compiles the regular expression of the route once. Only dispatch engines
+    that match whole paths against it need the compiled form, so the cost is
+    not paid by all engines on mount.
+
+    Returns:
+      Pattern: compiled regular expression of the route
+    """
+    if self.rx is None:
+      self.rx = re.compile(self.pattern)
+    return self.rx
+
+  def __getstate__(self) -> dict[str, Any]:
+    # URL builders contain the prefix of the router, which may be changed by
+    # `Router.load()`, so they are not persisted
+    return {k: getattr(self, k) for k in self.__slots__ if k != "url_builder"}
+
+  def __setstate__(self, state: dict[str, Any]) -> None:
+    for k, v in state.items():
+      setattr(self, k, v)
+    self.url_builder = None
 
 
 class RouteHandle(NamedTuple):
+  """
+  Result of `Router.match()`.
+
+  Attributes:
+    args (list): Converted path-variables of the request.
+    func (Optional[FunctionType]): Function mapped to the HTTP method. None for
+        `OPTIONS` requests without explicit handler, which providers answer
+        with an empty response carrying the `Allow` header.
+    allow (Optional[str]): Accepted HTTP methods of the route as value for the
+        `Allow` header.
+    awaitable (bool): True if func is a coroutine function, that has to be
+        awaited by asynchronous providers.
+  """
+
   args: list
-  func: FunctionType
+  func: Optional[FunctionType]
+  allow: Optional[str] = None
+  awaitable: bool = False
 
 
-class Router():
+class MatchBatch(NamedTuple):
   """
-  Class is a superset of the flask library. flask is used to serve the API and
-  also to handle the request via the request object, which flask provides. The
-  Router class only replaces the standard routing of flask, with a more
-  versatile regex router, than the default flask router.
+  Columnar result of `Router.match_many()`. All lists have one entry per
+  requested `(path, http_method)` pair, in order of the request.
 
   Attributes:
-    routes (dict[Pattern, TemplatedRoute]):
-    prefix (str):
-    cors (bool):
+    routes (list[int]): Index of matched route in `Router.get_routes()`, -1 if
+        no route matches the path.
+    statuses (list[int]): HTTP status of the lookup (200, 404 or 405).
+    args (list[Optional[list]]): Converted path-variables, None if no route
+        matches the path. Identical paths share the same list.
+  """
 
-  Args:
-    prefix (str, optional):
-    cors (bool, optional):
+  routes: list[int]
+  statuses: list[int]
+  args: list[Optional[list]]
+
+
+class MatchTrace(NamedTuple):
   """
+  Decision trace of `Router.explain()` for a single request.
 
-  routes: OrderedDict[Pattern, Route]
-  prefix: str
+  Attributes:
+    path (str): Requested path.
+    http_method (str): Requested HTTP method.
+    status (int): HTTP status of the lookup (200, 404, 405 or 414).
+    route (Optional[str]): Template of matched route, None if no route
+        matches the path.
+    args (Optional[list]): Converted path-variables, None if no route matches
+        the path.
+    steps (list[TraceStep]): Every step of the lookup in order.
+    ns (int): Duration of the whole lookup in nanoseconds, including tracing.
+  """
 
-  def __init__(self, prefix: str = "") -> None:
-    self.routes = OrderedDict()
-    self.prefix = prefix
+  path: str
+  http_method: str
+  status: int
+  route: Optional[str]
+  args: Optional[list]
+  steps: list[TraceStep]
+  ns: int
 
-  def mount(self, tpl: str, func: FunctionType,
-            http_methods: list[str]) -> Router:
+  def format(self) -> str:
     """
-    Registers a handler function for a specific template-route. Variables
-    have to be declared as "{name:type}" (supported types can be found in
-    RocketPathVariableTypes).
-
-    Args:
-      route_string (str): Template path for route as string.
-      func (FunctionType): Function that should be run on route-match.
-      accepted_http_methods (list[str]): List of HTTP Methods that are
-          accepted.
+    Formats the trace as a table for logging.
 
     Returns:
-      Router: Reference to self object, for chaining commands
+      str: multi-line description of trace
     """
-    # split route into individual modules
-    modules = tpl.split("/")
-    modules = list(filter(("").__ne__, modules))
-    tpl = "/".join(modules)
-    rxr = tpl
-    print(f"{rxr=}")
-    # initialize list for varibles found in path
-    var_rx = f"{{(\w+):({RouteVariableType.get_rx_types()})}}"
-    var_list = re.findall(var_rx, tpl)
-    var_filters = []
-    for key, ty in var_list:
-      rvt = RouteVariableType.from_string(ty).value
-      rxr = rxr.replace(f"{{{key}:{ty}}}", f"({rvt.rx})")
-      var_filters.append(rvt.ty)
-    rxr = f"^{rxr}$"
-
-    print(f"registered {rxr}")
-
-    # register route-template under regex in container 'routes'
+    lines = [
+        f"{self.http_method} {self.path} => {self.status} "
+        f"{self.route or '-'} {self.args or ''} ({self.ns / 1000:.1f}us)"
+    ]
+    for step in self.steps:
+      lines.append(f"  {step.ns / 1000:8.1f}us  {step.action:<9} "
+                   f"{step.target} -> {step.outcome!r}")
+    return "\n".join(lines)
+
+
+class CacheInfo(NamedTuple):
+  """
+  Statistics of a MatchCache.
+
+  Attributes:
+    hits (int): Lookups answered from the cache (including errors).
+    misses (int): Lookups that had to be resolved by the router.
+    size (int): Number of cached route handles.
+    maxsize (int): Maximum number of cached route handles.
+    errors (int): Number of cached 404 and 405 outcomes.
+    errors_maxsize (int): Maximum number of cached 404 and 405 outcomes.
+  """
+
+  hits: int
+  misses: int
+  size: int
+  maxsize: int
+  errors: int
+  errors_maxsize: int
+
+
+class PathFilter():
+  """
+  Filter over the first module of all templates. A path can only be matched
+  by a route, if its first segment is matched by the first module of the
+  template, so paths like `wp-admin/...` or `.env` are rejected by a set
+  lookup before any dispatch engine is asked.
+
+  The filter is updated incrementally by `add()` and `remove()` whenever a
+  route is mounted or unmounted. Every entry counts the templates sharing
+  it, so removing a route never requires to look at the other routes.
+
+  Attributes:
+    literals (dict[str, int]): Number of templates by their first module
+        without variables, `""` for the root route.
+    checks (tuple[Callable[[str], Any], ...]): Checks of first modules with
+        variables, returning a truthy value for matching segments.
+    accepts_all (int): Number of templates starting with a variable spanning
+        multiple segments. No path can be rejected while there is one.
+
+  Args:
+    routes (Iterable[Route], optional): initial routes of filter
+  """
+
+  __slots__ = ("literals", "checks", "accepts_all", "_checks")
+
+  literals: dict[str, int]
+  checks: tuple[Callable[[str], Any], ...]
+  accepts_all: int
+  _checks: dict[str, list]
+
+  def __init__(self, routes: Iterable[Route] = ()) -> None:
+    self.literals = {}
+    self.checks = ()
+    self.accepts_all = 0
+    self._checks = {}
+    for route in routes:
+      self.add(route)
+
+  @staticmethod
+  def _entry(
+      route: Route) -> tuple[str, Optional[str], Optional[Callable[[str], Any]]]:
+    """
+    Returns the entry of filter, that accepts the first segments of a route.
+
+    Args:
+      route (Route): route of router
+
+    Returns:
+      tuple[str, Optional[str], Optional[Callable[[str], Any]]]: kind of entry
+          (`literal`, `all` or `check`), its key and the validator of checks
+          of a single variable, that are not done by regex.
+    """
+    if not route.segments:
+      return "literal", "", None
+    tokens = route.segments[0]
+    if len(tokens) == 1 and isinstance(tokens[0], str):
+      return "literal", tokens[0], None
+    if any(tk.rxt.spans for tk in tokens if isinstance(tk, RouteVariable)):
+      return "all", None, None
+    if len(tokens) == 1 and tokens[0].rxt.validate is not None:
+      return "check", tokens[0].rxt.name, tokens[0].rxt.validate
+    return "check", segments_to_rx([tokens]), None
+
+  def add(self, route: Route) -> None:
+    """
+    Accepts the first segments of a new route.
+
+    Args:
+      route (Route): mounted route
+    """
+    kind, key, validate = self._entry(route)
+    if kind == "literal":
+      self.literals[key] = self.literals.get(key, 0) + 1
+    elif kind == "all":
+      self.accepts_all += 1
+    elif key in self._checks:
+      self._checks[key][1] += 1
+    else:
+      self._checks[key] = [validate or re.compile(key).fullmatch, 1]
+      self.checks = tuple(check for check, _ in self._checks.values())
+
+  def remove(self, route: Route) -> None:
+    """
+    Stops accepting the first segments of a removed route, unless they are
+    accepted for another route.
+
+    Args:
+      route (Route): unmounted route
+    """
+    kind, key, _ = self._entry(route)
+    if kind == "literal":
+      self.literals[key] -= 1
+      if not self.literals[key]:
+        del self.literals[key]
+    elif kind == "all":
+      self.accepts_all -= 1
+    else:
+      self._checks[key][1] -= 1
+      if not self._checks[key][1]:
+        del self._checks[key]
+        self.checks = tuple(check for check, _ in self._checks.values())
+
+  def rejects(self, path: str) -> bool:
+    """
+    Checks if no route can match a path.
+
+    Args:
+      path (str): requested path
+
+    Returns:
+      bool: True if path is matched by no route, False if it may be matched.
+    """
+    if self.accepts_all:
+      return False
+    first = path.partition("/")[0]
+    if first in self.literals:
+      return False
+    for check in self.checks:
+      if check(first):
+        return False
+    return True
+
+
+class MatchCache():
+  """
+  Cache for results of `Router.match()` keyed on `(path, http_method)`.
+  Resolved route handles and failed lookups (404 and 405) are kept in two
+  separate LRU caches, so that requests to unknown paths cannot evict the
+  handles of valid ones. The cache is thread-safe, only the hit and miss
+  counters are not synchronized, as they are statistics.
+
+  Attributes:
+    handles (LruCache): Cached RouteHandle objects.
+    errors (LruCache): Cached status and arguments of RaptorAbortException.
+    hits (int): Number of lookups answered from the cache.
+    misses (int): Number of lookups not found in the cache.
+
+  Args:
+    maxsize (int): Maximum number of cached route handles.
+    errors_maxsize (int): Maximum number of cached failed lookups.
+  """
+
+  handles: LruCache
+  errors: LruCache
+  hits: int
+  misses: int
+
+  def __init__(self, maxsize: int, errors_maxsize: int) -> None:
+    self.handles = LruCache(maxsize)
+    self.errors = LruCache(errors_maxsize)
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key: tuple[str, str]) -> Optional[RouteHandle]:
+    """
+    Returns cached route handle for key.
+
+    Args:
+      key (tuple[str, str]): requested path and HTTP method
+
+    Returns:
+      Optional[RouteHandle]: cached handle, None if key is not cached.
+
+    Raises:
+      RaptorAbortException: If a failed lookup is cached for key.
+    """
+    handle = self.handles.get(key)
+    if handle is not None:
+      self.hits += 1
+      return handle
+
+    error = self.errors.get(key)
+    if error is not None:
+      self.hits += 1
+      raise RaptorAbortException(error[0], *error[1], headers=error[2])
+
+    self.misses += 1
+    return None
+
+  def put(self, key: tuple[str, str], handle: RouteHandle) -> None:
+    self.handles.put(key, handle)
+
+  def put_error(self, key: tuple[str, str], ex: RaptorAbortException) -> None:
+    # only the arguments of the exception are stored, as raising the same
+    # exception object again would grow its traceback with every request
+    self.errors.put(key, (ex.http_status, ex.args, ex.headers))
+
+  def clear(self) -> None:
+    self.handles.clear()
+    self.errors.clear()
+
+  def discard(self, key: tuple[str, str]) -> None:
+    self.handles.discard(key)
+    self.errors.discard(key)
+
+  def evict(self, matches: Callable[[str], Any]) -> None:
+    """
+    Drops all cached lookups of paths, that fulfill a predicate.
+
+    Args:
+      matches (Callable[[str], Any]): returns a truthy value for paths, whose
+          lookups should be dropped
+    """
+    self.handles.evict(lambda key: matches(key[0]))
+    self.errors.evict(lambda key: matches(key[0]))
+
+  def __len__(self) -> int:
+    return len(self.handles) + len(self.errors)
+
+  def info(self) -> CacheInfo:
+    return CacheInfo(self.hits, self.misses, len(self.handles),
+                     self.handles.maxsize, len(self.errors),
+                     self.errors.maxsize)
+
+
+_TOO_LONG = object()
+"""object: Marker for paths exceeding the limits of router in `match_many()`."""
+
+
+class Router():
+  """
+  Class is a superset of the flask library. flask is used to serve the API and
+  also to handle the request via the request object, which flask provides. The
+  Router class only replaces the standard routing of flask, with a more
+  versatile regex router, than the default flask router.
+
+  Attributes:
+    routes (dict[str, Route]): Routes mapped by their regular expression.
+    prefix (str):
+    static_routes (dict[str, Route]): Routes without variables, mapped by
+        their exact path. Checked before the dispatch engine.
+    static_handles (dict[str, dict[str, RouteHandle]]): Precomputed handles
+        of routes without variables, mapped by HTTP method and exact path.
+    engine (AbstractEngine): Dispatch engine used to resolve request paths
+        with variables.
+    cache (Optional[MatchCache]): Cache for results of `match()`, None if
+        caching is disabled.
+    names (dict[Union[str, FunctionType], Route]): Routes by name and by
+        handler function, used by `url_for()`.
+    subrouters (dict[str, Router]): Included routers by their prefix without
+        surrounding slashes (see `include()`).
+    path_filter (PathFilter): Filter rejecting paths by their first segment,
+        updated by every mount and unmount.
+    not_found (LruCache): Negative cache of paths, that have been resolved to
+        no route.
+    max_path_length (Optional[int]): Longest path accepted by `match()`.
+    max_segments (Optional[int]): Most segments of a path accepted by
+        `match()`.
+    safe (bool): True if router refuses ambiguous templates and only uses
+        engines, that match segment by segment.
+    frozen (bool): True if route table has been locked by `freeze()`.
+    cors (bool):
+
+  Args:
+    prefix (str, optional):
+    engine (Union[str, AbstractEngine], optional): Name of dispatch engine
+        (`trie`, `regex`, `combined` or `codegen`) or engine object, e.g.
+        `RegexEngine(reorder_interval=1000)`. Defaults to `trie`.
+    cache_size (int, optional): Number of `(path, method)` lookups cached by
+        `match()`. Defaults to 0, which disables the cache.
+    errors_cache_size (int, optional): Number of cached 404 and 405 outcomes.
+        Defaults to a quarter of `cache_size`.
+    not_found_cache_size (int, optional): Number of paths remembered as
+        matching no route, independent of the HTTP method. Defaults to 1024.
+    max_path_length (Optional[int], optional): Longer paths are answered with
+        `414 URI Too Long` without being matched. Defaults to no limit, or
+        2048 in safe mode.
+    max_segments (Optional[int], optional): Paths with more segments are
+        answered with `414 URI Too Long`. Defaults to no limit, or 64 in
+        safe mode.
+    safe (bool, optional): Safe mode for untrusted input. Ambiguous
+        templates (see `analyze_template()`) are refused on mount instead of
+        only logged at debug level and only the `trie` and `codegen` engines
+        are accepted. Their matchers only see single segments of bounded
+        paths and the regexes of unambiguous segments match in linear time,
+        provided that the regexes of custom variable types do so themselves.
+    cors (bool, optional):
+  """
+
+  routes: dict[str, Route]
+  prefix: str
+  static_routes: dict[str, Route]
+  static_handles: dict[str, dict[str, RouteHandle]]
+  engine: AbstractEngine
+  cache: Optional[MatchCache]
+  names: dict[Union[str, FunctionType], Route]
+  subrouters: dict[str, Router]
+  path_filter: PathFilter
+  not_found: LruCache
+  max_path_length: Optional[int]
+  max_segments: Optional[int]
+  safe: bool
+  frozen: bool
+  # incremented by every change of the route table, see `_invalidate()`
+  _generation: int
+  # distinct numbers of segments of included prefixes, longest first
+  _include_depths: tuple[int, ...]
+
+  def __init__(self,
+               prefix: str = "",
+               engine: Union[str, AbstractEngine] = "trie",
+               cache_size: int = 0,
+               errors_cache_size: Optional[int] = None,
+               not_found_cache_size: int = 1024,
+               max_path_length: Optional[int] = None,
+               max_segments: Optional[int] = None,
+               safe: bool = False) -> None:
+    self.routes = {}
+    self.prefix = prefix
+    self.static_routes = {}
+    self.static_handles = {m: {} for m in SUPPORTED_HTTP_METHODS}
+    self.names = {}
+    self.subrouters = {}
+    self._include_depths = ()
+    self.path_filter = PathFilter()
+    self.not_found = LruCache(not_found_cache_size)
+    self._generation = 0
+    self.safe = safe
+    self.frozen = False
+
+    if safe:
+      max_path_length = max_path_length or 2048
+      max_segments = max_segments or 64
+    self.max_path_length = max_path_length
+    self.max_segments = max_segments
+
+    if isinstance(engine, str):
+      if engine.lower() not in ENGINES:
+        raise RuntimeError(f"unsupported routing engine: '{engine}'")
+      engine = ENGINES[engine.lower()]()
+    if safe and not isinstance(engine, TrieEngine):
+      raise RuntimeError(
+          f"routing engine not supported in safe mode: {type(engine).__name__}")
+    self.engine = engine
+
+    if cache_size > 0:
+      if errors_cache_size is None:
+        errors_cache_size = max(cache_size // 4, 1)
+      self.cache = MatchCache(cache_size, errors_cache_size)
+    else:
+      self.cache = None
+
+  def mount(self,
+            tpl: str,
+            func: FunctionType,
+            http_methods: list[str],
+            name: Optional[str] = None) -> Router:
+    """
+    Registers a handler function for a specific template-route. Variables
+    have to be declared as "{name:type}" (supported types can be found in
+    RocketPathVariableTypes).
+
+    Args:
+      route_string (str): Template path for route as string.
+      func (FunctionType): Function that should be run on route-match.
+      accepted_http_methods (list[str]): List of HTTP Methods that are
+          accepted.
+      name (Optional[str], optional): Name of route for `url_for()`. Defaults
+          to the name of the function.
+
+    Returns:
+      Router: Reference to self object, for chaining commands
+
+    Raises:
+      RuntimeError: If router has already been frozen.
+    """
+    route = self._register(tpl, func, http_methods, name)
+    io.debug(f"Mounted {route.tpl} {','.join(http_methods)}")
+
+    # cached lookups of paths matched by the template may be outdated
+    self._invalidate(route)
+
+    return self
+
+  def mount_many(
+      self, routes: Iterable[tuple[str, FunctionType, list[str]]]) -> Router:
+    """
+    Registers many routes at once, e.g. from a declarative route table. Same
+    as calling `mount()` for every route, but all templates are parsed first
+    and the new routes are then handed to the dispatch engine as one batch
+    (see `AbstractEngine.insert_many()`). Work that concerns the whole table
+    (logging, invalidating the match cache) is only done once at the end.
+
+    Examples:
+
+      >>> router.mount_many([
+      ...     ("/", index_handler, ["GET"]),
+      ...     ("/items/{id:int}", item_handler, ["GET", "PUT"]),
+      ... ])
+
+    Args:
+      routes (Iterable[tuple[str, FunctionType, list[str]]]): Triples of
+          template route, function and accepted HTTP methods.
+
+    Returns:
+      Router: Reference to self object, for chaining commands
+
+    Raises:
+      RuntimeError: If router has already been frozen.
+    """
+    count = 0
+    pending = []
+    try:
+      for tpl, func, http_methods in routes:
+        self._register(tpl, func, http_methods, pending=pending)
+        count += 1
+    finally:
+      # routes registered before an invalid one stay mounted, so cached
+      # lookups have to be dropped in any case
+      self.engine.insert_many(pending)
+      self._invalidate()
+    io.debug(f"Mounted {count} routes")
+
+    return self
+
+  def unmount(self,
+              tpl: str,
+              http_methods: Optional[list[str]] = None) -> Router:
+    """
+    Removes the handlers of a template-route for specific HTTP methods, e.g.
+    for endpoints behind feature flags. Once no method is left, the route is
+    removed from the route table and the dispatch engine, and only cached
+    lookups of paths matched by the template are dropped. Like `mount()`,
+    this is possible while the router is served, until it is frozen.
+
+    The cost of removing a route depends on the engine: the `trie` and
+    `codegen` engines only touch the nodes on the path of the template, the
+    `regex` engine copies its list of routes without compiling any regex
+    again and the `combined` engine rebuilds its alternation of all routes on
+    the next lookup.
+
+    Examples:
+
+      >>> router.unmount("/items/{id:int}", ["PUT"])
+      >>> router.unmount("/items/{id:int}")  # remove route completely
+
+    Args:
+      tpl (str): Template path of route, as it has been mounted.
+      http_methods (Optional[list[str]], optional): HTTP methods, whose
+          handlers are removed. Defaults to all methods of the route.
+
+    Returns:
+      Router: Reference to self object, for chaining commands
+
+    Raises:
+      RuntimeError: If router has already been frozen or no route is mounted
+          for template.
+    """
+    if self.frozen:
+      raise RuntimeError("cannot unmount route from frozen router")
+
+    modules = [module for module in tpl.split("/") if module]
+    rxr = "/".join(_module_rx(module) for module in modules)
+    route = self.routes.get(rxr)
+    if route is None:
+      raise RuntimeError(f"no route mounted for: '{tpl}'")
+
+    methods = route.http_methods_map
+    if http_methods is None:
+      http_methods = [m for m, _ in methods.items()]
+    methods.unregister(http_methods)
+    remaining = methods.items()
+
+    if not remaining:
+      del self.routes[rxr]
+      self.path_filter.remove(route)
+      if route.tpl in self.static_routes:
+        del self.static_routes[route.tpl]
+      else:
+        self.engine.remove(route)
+
+    if route.tpl in self.static_routes or not remaining:
+      for handles in self.static_handles.values():
+        handles.pop(route.tpl, None)
+    if remaining and route.tpl in self.static_routes:
+      self._index_static(route)
+
+    # names of removed routes and handlers are free again
+    funcs = {func for _, func in remaining}
+    for key in [key for key, r in self.names.items() if r is route]:
+      if not remaining or (not isinstance(key, str) and key not in funcs):
+        del self.names[key]
+
+    io.debug(f"Unmounted {route.tpl} {','.join(http_methods)}")
+    self._invalidate(route)
+
+    return self
+
+  def include(self, prefix: str, router: Router) -> Router:
+    """
+    Composes an independent router into this one under a prefix, e.g. to
+    serve `/v1` and `/admin` from separate route tables. Requests are
+    dispatched to the included router by a dictionary lookup on their leading
+    segments before any route of this router is tried, so paths below the
+    prefix are matched by the included router only. Other paths, including
+    those sharing only some segments with a prefix of several segments, are
+    still matched by this router. Nested prefixes are dispatched to the
+    router of the longest one.
+
+    The prefix of the included router is set to its full mount point, so
+    that its `url_for()` builds complete URLs. Included routers are not
+    persisted by `save()`.
+
+    Examples:
+      >>> api = Router().mount("/users/{id:uint}", get_user, ["GET"])
+      >>> admin = Router().mount("/stats", get_stats, ["GET"])
+      >>> router = Router().include("/v1", api).include("/admin", admin)
+      >>> router.match("v1/users/7", "GET").args
+      [7]
+
+    Args:
+      prefix (str): Path without variables, under which router is mounted.
+      router (Router): Router to include.
+
+    Returns:
+      Router: Reference to self object, for chaining commands
+
+    Raises:
+      RuntimeError: If router has already been frozen.
+      ValueError: If prefix is empty, contains variables or is already used
+          by another included router.
+    """
+    if self.frozen:
+      raise RuntimeError("cannot include router in frozen router")
+
+    modules = [module for module in prefix.split("/") if module]
+    if not modules or any(
+        not isinstance(tk, str) for m in modules for tk in _parse_module(m)):
+      raise ValueError(f"invalid prefix of included router: '{prefix}'")
+
+    head = "/".join(modules)
+    if head in self.subrouters:
+      raise ValueError(f"prefix already included: '{head}'")
+    self.subrouters[head] = router
+    self._include_depths = tuple(
+        sorted({h.count("/") + 1 for h in self.subrouters}, reverse=True))
+    router._set_prefix(f"{self.prefix}/{head}")
+    io.debug(f"Included router at {router.prefix}")
+    self._invalidate()
+    return self
+
+  def _included(self, req_route: str) -> Optional[tuple[str, Router, str]]:
+    """
+    Returns the included router responsible for a path, if any.
+
+    Args:
+      req_route (str): requested path
+
+    Returns:
+      Optional[tuple[str, Router, str]]: prefix, included router and path
+          relative to it, None if the path is below no included prefix.
+    """
+    for depth in self._include_depths:
+      parts = req_route.split("/", depth)
+      if len(parts) < depth:
+        continue
+      head = "/".join(parts[:depth])
+      sub = self.subrouters.get(head)
+      if sub is not None:
+        return head, sub, parts[depth] if len(parts) > depth else ""
+    return None
+
+  def _set_prefix(self, prefix: str) -> None:
+    self.prefix = prefix
+    # URL builders contain the old prefix
+    for route in self.routes.values():
+      route.url_builder = None
+    for head, sub in self.subrouters.items():
+      sub._set_prefix(f"{prefix}/{head}")
+
+  def _all_routes(self) -> list[tuple[str, Route]]:
+    """
+    Returns all routes of this and all included routers, the latter with the
+    template relative to this router.
+
+    Returns:
+      list[tuple[str, Route]]: pairs of template and route
+    """
+    routes = [(route.tpl, route) for route in self.routes.values()]
+    for head, sub in self.subrouters.items():
+      routes.extend(
+          (f"{head}/{tpl}", route) for tpl, route in sub._all_routes())
+    return routes
+
+  def _invalidate(self, route: Optional[Route] = None) -> None:
+    """
+    Drops lookups cached for the previous route table. Lookups, that were
+    resolved concurrently against the previous table, are not cached
+    afterwards, as the generation of the table has changed.
+
+    Args:
+      route (Optional[Route], optional): Mounted or unmounted route, only
+          lookups of paths matched by its template are dropped. Defaults to
+          all lookups.
+    """
+    self._generation += 1
+    if route is None:
+      if self.cache is not None:
+        self.cache.clear()
+      self.not_found.clear()
+    elif len(self.not_found) or (self.cache is not None and len(self.cache)):
+      matches = re.compile(route.pattern).fullmatch
+      self.not_found.evict(matches)
+      if self.cache is not None:
+        self.cache.evict(matches)
+
+  def _register(self,
+                tpl: str,
+                func: FunctionType,
+                http_methods: list[str],
+                name: Optional[str] = None,
+                pending: Optional[list[Route]] = None) -> Route:
+    """
+    Parses a template route and registers it in the route table and all
+    dispatch structures.
+
+    Args:
+      tpl (str): Template path for route as string.
+      func (FunctionType): Function that should be run on route-match.
+      http_methods (list[str]): List of HTTP Methods that are accepted.
+      name (Optional[str], optional): Name of route for `url_for()`.
+      pending (Optional[list[Route]], optional): Collects new routes for the
+          dispatch engine instead of inserting them one by one.
+
+    Returns:
+      Route: new or updated route
+    """
+    if self.frozen:
+      raise RuntimeError("cannot mount route on frozen router")
+
+    # split route into individual modules
+    modules = [module for module in tpl.split("/") if module]
+    tpl = "/".join(modules)
+    # split modules into literals and variables found in path
+    segments = [_parse_module(module) for module in modules]
+    rxr = "/".join(_module_rx(module) for module in modules)
+
+    return self._insert(tpl, rxr, segments, func, http_methods, name,
+                        pending)
+
+  def _insert(self,
+              tpl: str,
+              rxr: str,
+              segments: list[tuple],
+              func: FunctionType,
+              http_methods: list[str],
+              name: Optional[str] = None,
+              pending: Optional[list[Route]] = None) -> Route:
+    """
+    Registers an already parsed template route in the route table and all
+    dispatch structures.
+
+    Args:
+      tpl (str): normalized template path
+      rxr (str): regular expression of template path
+      segments (list[tuple]): parsed modules of template path
+      func (FunctionType): Function that should be run on route-match.
+      http_methods (list[str]): List of HTTP Methods that are accepted.
+      name (Optional[str], optional): Name of route for `url_for()`.
+          Defaults to the name of the function.
+      pending (Optional[list[Route]], optional): Collects new routes for the
+          dispatch engine, which are inserted by the caller.
+
+    Returns:
+      Route: new or updated route
+    """
+    variables = [
+        tk for tokens in segments for tk in tokens
+        if isinstance(tk, RouteVariable)
+    ]
+    var_filters = [tk.rxt.ty for tk in variables]
+
+    # register route-template under regex in container 'routes' and index it
+    # by exact path (if it has no variables) or in the dispatch engine
     if self.routes.get(rxr) is None:
-      self.routes[rxr] = Route(tpl, VarFilter(var_filters), func, http_methods)
+      problems = analyze_template(segments)
+      if problems and self.safe:
+        raise ValueError(
+            f"ambiguous template '{tpl}': {'; '.join(problems)}")
+      for problem in problems:
+        io.debug(f"Ambiguous template {tpl}: {problem}")
+
+      checks = tuple((i, tk.rxt.validate)
+                     for i, tk in enumerate(variables)
+                     if not tk.rxt.exact)
+      route = Route(tpl, rxr, segments,
+                    _var_filter(tuple(var_filters), checks), func,
+                    http_methods)
+      self.routes[rxr] = route
+      self.path_filter.add(route)
+      if var_filters and pending is not None:
+        pending.append(route)
+      elif var_filters:
+        self.engine.insert(route)
+      else:
+        self.static_routes[tpl] = route
     else:
-      self.routes[rxr].http_methods_map.register(http_methods, func)
+      route = self.routes[rxr]
+      route.http_methods_map.register(http_methods, func)
+
+    if not var_filters:
+      self._index_static(route)
+
+    # the first route mounted under a name or for a handler keeps it,
+    # unhashable handlers are only found by their name
+    for key in (name or getattr(func, "__name__", None), func):
+      if key is not None and isinstance(key, Hashable):
+        self.names.setdefault(key, route)
+
+    return route
+
+  def save(self, path: Union[str, Path], source_hash: str = "") -> None:
+    """
+    Persists the route table together with the dispatch structures of the
+    engine, so that `load()` restores the router without parsing templates,
+    analyzing them or inserting routes again. A frozen router is restored
+    frozen, including the code generated by CodegenEngine.
+
+    The file is a pickle: handlers and variable types are stored by
+    reference, so handlers have to be module-level functions or methods of
+    module-level classes and variable types have to be registered before
+    loading. As any pickle, the file may run arbitrary code when loaded and
+    has to be as trusted as the code of the application. Routers added by
+    `include()` are not part of the file and have to be saved separately.
+
+    Args:
+      path (Union[str, Path]): file the router is written to
+      source_hash (str, optional): hash of the sources the routes were built
+          from (see `source_hash()`). `load()` only accepts the file, if it is
+          called with the same hash.
+
+    Raises:
+      ValueError: If a handler can not be referenced by its import path.
+    """
+    import raptor
+
+    header = {
+        "format": ARTIFACT_FORMAT,
+        "raptor": raptor.__version__,
+        "python": sys.implementation.cache_tag,
+        "types": _types_fingerprint(),
+        "source_hash": source_hash,
+    }
+    state = {
+        "prefix": self.prefix,
+        "safe": self.safe,
+        "frozen": self.frozen,
+        "routes": dict(self.routes),
+        "static_routes": self.static_routes,
+        "static_handles": self.static_handles,
+        "names": self.names,
+        "engine": self.engine,
+        "path_filter": self.path_filter,
+    }
+
+    # write to temporary file first, so that concurrently starting workers
+    # never read a partially written file
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+      with open(tmp, "wb") as file:
+        # the header is a separate pickle, so that outdated files are
+        # rejected without importing anything they reference
+        pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+        _ArtifactPickler(file).dump(state)
+    except (pickle.PicklingError, AttributeError, TypeError) as ex:
+      tmp.unlink()
+      raise ValueError(f"router can not be persisted: {ex}") from None
+    os.replace(tmp, path)
+
+  @classmethod
+  def load(cls,
+           path: Union[str, Path],
+           source_hash: str = "",
+           **kwargs: Any) -> Optional[Router]:
+    """
+    Restores a router persisted by `save()`. The file is only accepted, if it
+    was written in the current format by the same versions of raptor and
+    python, with the same variable types and for the same source hash. The
+    file has to be trusted (see `save()`).
+
+    Args:
+      path (Union[str, Path]): file the router was written to
+      source_hash (str, optional): hash of the sources the routes are built
+          from, has to be equal to the hash passed to `save()`.
+      **kwargs (Any): additional arguments for the constructor of Router,
+          e.g. `cache_size`. If an engine is passed, the routes are inserted
+          into it instead of restoring the persisted engine.
+
+    Returns:
+      Optional[Router]: restored router, None if file is missing or outdated.
+
+    Raises:
+      ValueError: If the router is loaded in safe mode, but was saved without
+          and a template is ambiguous.
+    """
+    import raptor
+
+    try:
+      with open(path, "rb") as file:
+        header = pickle.load(file)
+        if not isinstance(header, dict) or \
+           header.get("format") != ARTIFACT_FORMAT or \
+           header.get("raptor") != raptor.__version__ or \
+           header.get("python") != sys.implementation.cache_tag or \
+           header.get("types") != _types_fingerprint() or \
+           header.get("source_hash") != source_hash:
+          return None
+        # the file holds no garbage, so collecting while its objects are
+        # created is wasted time
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+          state = _ArtifactUnpickler(file).load()
+        finally:
+          if enabled:
+            gc.enable()
+    except (OSError, EOFError, ImportError, AttributeError, KeyError,
+            pickle.UnpicklingError) as ex:
+      io.debug(f"Can not load router from {path}: {ex!r}")
+      return None
+
+    kwargs.setdefault("prefix", state["prefix"])
+    engine = kwargs.setdefault("engine", state["engine"])
+    router = cls(**kwargs)
+    router.routes = state["routes"]
+    router.static_routes = state["static_routes"]
+    router.static_handles = state["static_handles"]
+    router.names = state["names"]
+    router.path_filter = state["path_filter"]
+
+    if router.safe and not state["safe"]:
+      # templates were only validated for ambiguities in safe mode
+      for route in router.routes.values():
+        problems = analyze_template(route.segments)
+        if problems:
+          raise ValueError(
+              f"ambiguous template '{route.tpl}': {'; '.join(problems)}")
+
+    if engine is not state["engine"]:
+      router.engine.insert_many(
+          [r for r in router.routes.values() if r.var_filter.type_map])
+      if state["frozen"]:
+        router.freeze()
+    elif state["frozen"]:
+      # the engine is already frozen, so it must not be frozen again
+      router.routes = MappingProxyType(router.routes)
+      router.frozen = True
+
+    io.debug(f"Loaded {len(router.routes)} routes from {path}")
+    return router
+
+  @classmethod
+  def cached(cls, path: Union[str, Path], build: Callable[[], Router],
+             *sources: Union[str, Path]) -> Router:
+    """
+    Loads a router persisted at path, if it is still up to date with the
+    source files, otherwise builds it and persists it for the next start.
+
+    Examples:
+
+      >>> router = Router.cached("routes.pickle", build_router, __file__)
+
+    Args:
+      path (Union[str, Path]): file the router is persisted in
+      build (Callable[[], Router]): function building the router
+      *sources (Union[str, Path]): source files the routes are built from
+
+    Returns:
+      Router: restored or newly built router
+    """
+    digest = source_hash(*sources)
+    router = cls.load(path, digest)
+    if router is None:
+      router = build()
+      router.save(path, digest)
+    return router
+
+  def freeze(self) -> Router:
+    """
+    Locks the route table for serving. The routes become a read-only mapping,
+    the dispatch engine finalizes its index into immutable structures and
+    further calls to `mount()` or `unmount()` will raise. Freezing an already
+    frozen router has no effect.
 
+    Returns:
+      Router: Reference to self object, for chaining commands
+    """
+    if not self.frozen:
+      self.routes = MappingProxyType(self.routes)
+      self.engine.freeze()
+      for sub in self.subrouters.values():
+        sub.freeze()
+      self.frozen = True
+    return self
+
+  def seal(self) -> Router:
+    """
+    Prepares the process for forking workers, that share the memory of the
+    route table. The router is frozen, then all garbage is collected and all
+    remaining objects are moved to the permanent generation of the garbage
+    collector (`gc.freeze()`). The collectors of the workers will never
+    traverse them, so the pages holding routes, filters and handlers stay
+    shared between the workers, until objects on them are modified or their
+    reference counts change.
+
+    Should be called right before the fork, after all other objects of the
+    application have been created. The shared and private memory of workers
+    can be logged through `raptor.tools.prefork.Supervisor.report()`.
+
+    Returns:
+      Router: Reference to self object, for chaining commands
+    """
+    self.freeze()
+    gc.collect()
+    gc.freeze()
+
+    usage = prefork.memory_usage()
+    io.info(f"Sealed router with {len(self._all_routes())} routes, "
+            f"{gc.get_freeze_count()} objects frozen"
+            f"{f', {usage.format()}' if usage else ''}")
     return self
 
-  def match(self, req_route: str, http_method: str) -> RouteHandle:
+  def match(self,
+            req_route: str,
+            http_method: str,
+            checked: bool = False) -> RouteHandle:
     """
     Will try to find a match for a given route in internal template-paths. If
     none can be found, None will be returned. If a route has been found, a
@@ -338,39 +2145,397 @@ class Router():
 
     @param  route   api path with variables set
     @param  http_method   HTTP method that was used for request as string
+    @param  checked   path has passed `rejects()` before, the path filter is
+                      not run a second time
 
     @return RocketSpecificPath for first parameter in tuple. If an error occurs,
     second parameter will be set to an Error object of scheme
     `Error(Msg, HttpStatus)`.
     """
-    r = None
-    args = None
-
-    # get templates that match regex and path
-    for rx, route in self.routes.items():
-      if re.match(rx, req_route):
-        r = route
-        uargs = re.findall(rx, req_route)[0]
-        args = route.var_filter.use(uargs)
-        break
-
-    # only one template should be returned for a route. If more then one are
-    # returned, raise RaptorAbortException.
-    if r is None:
-      raise RaptorAbortException(
-          HTTPStatus.NOT_FOUND,
-          "Route could not be matched to a registered template")
-
-    # check if function is supported by
-    func = r.http_methods_map.get(http_method)
-    if func is None:
+    if self._exceeds_limits(req_route):
+      raise RaptorAbortException(HTTPStatus.REQUEST_URI_TOO_LONG,
+                                 "Route exceeds limits of router")
+
+    if self.subrouters:
+      included = self._included(req_route)
+      if included is not None:
+        return included[1].match(included[2], http_method, checked)
+
+    if self.cache is None:
+      return self._match(req_route, http_method, checked)
+
+    key = (req_route, http_method)
+    handle = self.cache.get(key)
+    if handle is None:
+      generation = self._generation
+      try:
+        handle = self._match(req_route, http_method, checked)
+      except RaptorAbortException as ex:
+        self.cache.put_error(key, ex)
+        raise
+      else:
+        self.cache.put(key, handle)
+      finally:
+        # drop lookups resolved against a route table, that has changed
+        # meanwhile and may have been invalidated before they were stored
+        if self._generation != generation:
+          self.cache.discard(key)
+    return handle
+
+  def explain(self, req_route: str, http_method: str) -> MatchTrace:
+    """
+    Resolves a request like `match()`, but records every decision on the way:
+    the static lookup, the path filter, every pattern or segment tried by the
+    dispatch engine, validators and conversions of path-variables and the
+    check of the HTTP method, each with its duration. The match cache is
+    bypassed and nothing is raised or logged.
+
+    Examples:
+      >>> print(router.explain("items/42", "GET").format())
+      GET items/42 => 200 items/{id:int} [42] (14.2us)
+             0.2us  limits    items/42 -> False
+             0.3us  static    items/42 -> None
+             ...
+
+    Args:
+      req_route (str): requested path
+      http_method (str): HTTP method of request
+
+    Returns:
+      MatchTrace: trace of the lookup
+    """
+    steps = []
+    begin = perf_counter_ns()
+
+    def step(action: str, target: str, outcome: Any, start: int) -> None:
+      steps.append(TraceStep(action, target, outcome,
+                             perf_counter_ns() - start))
+
+    def trace(status: HTTPStatus, route: Optional[Route] = None,
+              args: Optional[list] = None) -> MatchTrace:
+      return MatchTrace(req_route, http_method, status.value,
+                        route and route.tpl, args, steps,
+                        perf_counter_ns() - begin)
+
+    start = perf_counter_ns()
+    exceeds = self._exceeds_limits(req_route)
+    step("limits", req_route, exceeds, start)
+    if exceeds:
+      return trace(HTTPStatus.REQUEST_URI_TOO_LONG)
+
+    if self.subrouters:
+      start = perf_counter_ns()
+      included = self._included(req_route)
+      step("include", req_route, included and included[1].prefix, start)
+      if included is not None:
+        head, sub, rest = included
+        inner = sub.explain(rest, http_method)
+        steps.extend(inner.steps)
+        return inner._replace(path=req_route,
+                              route=inner.route and f"{head}/{inner.route}",
+                              steps=steps,
+                              ns=perf_counter_ns() - begin)
+
+    start = perf_counter_ns()
+    r = self.static_routes.get(req_route)
+    step("static", req_route, r and r.tpl, start)
+    if r is not None:
+      args = []
+    else:
+      start = perf_counter_ns()
+      rejected = self._rejects(req_route)
+      step("filter", req_route.partition("/")[0], rejected, start)
+      result = None if rejected else self.engine.explain(req_route, steps)
+      if result is None:
+        return trace(HTTPStatus.NOT_FOUND)
+      r, args = result
+
+    start = perf_counter_ns()
+    methods = r.http_methods_map
+    allowed = bool(methods.mask & HTTP_METHOD_BITS.get(http_method, 0))
+    step("method", methods.allow, allowed, start)
+    if not allowed:
+      return trace(HTTPStatus.METHOD_NOT_ALLOWED, r, args)
+    return trace(HTTPStatus.OK, r, args)
+
+  def sample_traces(self, every: int,
+                    hook: Optional[Callable[[MatchTrace], None]]) -> None:
+    """
+    Records the trace of `explain()` for 1 in `every` calls of `match()` and
+    passes it to hook, e.g. to log slow dispatch of live requests. Sampling is
+    installed by shadowing `match()` on this router object, so there is no
+    cost at all while it is disabled. Traced requests are resolved twice.
+
+    Examples:
+      >>> router.sample_traces(1000, lambda t: io.info(t.format()))
+      >>> router.sample_traces(0, None)  # disable sampling
+
+    Args:
+      every (int): sampling interval, 0 disables sampling
+      hook (Optional[Callable[[MatchTrace], None]]): receives sampled traces
+    """
+    # remove previously installed sampling
+    self.__dict__.pop("match", None)
+    if every <= 0 or hook is None:
+      return
+
+    match = self.match
+    counter = itertools.count(1)
+
+    def sampled_match(req_route: str,
+                      http_method: str,
+                      checked: bool = False) -> RouteHandle:
+      if next(counter) % every == 0:
+        try:
+          hook(self.explain(req_route, http_method))
+        except Exception as ex:
+          io.error(f"Trace hook failed: {ex!r}")
+      return match(req_route, http_method, checked)
+
+    self.match = sampled_match
+
+  def _exceeds_limits(self, req_route: str) -> bool:
+    """
+    Checks if a path is longer or has more segments than accepted by router.
+
+    Args:
+      req_route (str): requested path
+
+    Returns:
+      bool: True if path exceeds `max_path_length` or `max_segments`
+    """
+    return (self.max_path_length is not None and
+            len(req_route) > self.max_path_length) or \
+        (self.max_segments is not None and
+         req_route.count("/") >= self.max_segments)
+
+  def _index_static(self, route: Route) -> None:
+    """
+    Precomputes the handles of a route without variables for every accepted
+    HTTP method.
+
+    Args:
+      route (Route): route without variables
+    """
+    methods = route.http_methods_map
+    for method, bit in HTTP_METHOD_BITS.items():
+      if methods.mask & bit:
+        self.static_handles[method][route.tpl] = RouteHandle(
+            [], methods.get(method), methods.allow,
+            bool(methods.awaitable & bit))
+
+  def _match(self, req_route: str, http_method: str,
+             checked: bool) -> RouteHandle:
+    # precomputed handles of routes without variables for this method
+    handles = self.static_handles.get(http_method)
+    if handles is not None:
+      handle = handles.get(req_route)
+      if handle is not None:
+        if io.debug_enabled():
+          io.debug(f"    => Matched: {http_method} {req_route}")
+        return handle
+
+    # routes without variables are resolved by a single lookup, all others
+    # by the first template that matches path in the dispatch engine
+    r = self.static_routes.get(req_route)
+    if r is not None:
+      args = []
+    else:
+      generation = self._generation
+      # paths, that have passed `rejects()` already, are not filtered again
+      result = None if not checked and self._rejects(req_route) else \
+          self.engine.lookup(req_route)
+
+      # only one template should be returned for a route. If more then one
+      # are returned, raise RaptorAbortException.
+      if result is None:
+        self.not_found.put(req_route, True)
+        if self._generation != generation:
+          self.not_found.discard(req_route)
+        raise RaptorAbortException(
+            HTTPStatus.NOT_FOUND,
+            "Route could not be matched to a registered template")
+      r, args = result
+
+    # check if HTTP method is accepted by route
+    methods = r.http_methods_map
+    bit = HTTP_METHOD_BITS.get(http_method, 0)
+    if not methods.mask & bit:
       raise RaptorAbortException(HTTPStatus.METHOD_NOT_ALLOWED,
-                                 "No function was mapped to HTTP method")
+                                 "No function was mapped to HTTP method",
+                                 headers=methods.allow_headers)
+    func = methods.get(http_method)
+
+    # return route object for specific route, messages are only formatted
+    # if they are logged
+    if io.debug_enabled():
+      io.debug(f"    => Matched: ({getattr(func, '__name__', None)}) "
+               f"{http_method} {r.tpl}")
+      io.debug(f"    => Vars: {args}")
+    return RouteHandle(args, func, methods.allow, bool(methods.awaitable & bit))
+
+  def rejects(self, req_route: str) -> bool:
+    """
+    Checks in constant time, if a path is known to match no route. Paths are
+    rejected by their first segment (see `PathFilter`) or because they have
+    been resolved to no route before. Providers use this to answer scanner
+    traffic like `wp-admin/...` without dispatching it.
+
+    Args:
+      req_route (str): requested path
+
+    Returns:
+      bool: True if no route matches path, False if a route may match it.
+    """
+    if self.subrouters:
+      included = self._included(req_route)
+      if included is not None:
+        return included[1].rejects(included[2])
+    return req_route not in self.static_routes and self._rejects(req_route)
+
+  def _rejects(self, req_route: str) -> bool:
+    return self.path_filter.rejects(req_route) or \
+        self.not_found.get(req_route) is not None
+
+  def _classify(self, req_route: str) -> Optional[EngineMatch]:
+    """
+    Resolves a path to a route without checking the HTTP method. Unlike
+    `match()`, the lookup does not count as hit of the route for engines
+    that reorder their routes (see `AbstractEngine.classify()`).
+
+    Args:
+      req_route (str): requested path
+
+    Returns:
+      Optional[EngineMatch]: matched route and converted path-variables, None
+          if no route matches the path.
+    """
+    if self.subrouters:
+      included = self._included(req_route)
+      if included is not None:
+        return included[1]._classify(included[2])
+
+    r = self.static_routes.get(req_route)
+    if r is not None:
+      return EngineMatch(r, [])
+    if self._rejects(req_route):
+      return None
+    return self.engine.classify(req_route)
+
+  def match_many(self, requests: Iterable[tuple[str, str]]) -> MatchBatch:
+    """
+    Classifies many requests at once, e.g. paths from access-logs. Unlike
+    `match()`, no exception is raised and nothing is logged for single
+    requests, every distinct path is only resolved once and the hits of
+    routes are not counted, so the batch does not reorder the routes.
+
+    Args:
+      requests (Iterable[tuple[str, str]]): pairs of path and HTTP method, may
+          also be rows of an array
+
+    Returns:
+      MatchBatch: route indexes, HTTP status and path-variables in columns
+    """
+    index = {route: i for i, (_, route) in enumerate(self._all_routes())}
+    paths = {}
+    outcomes = {}
+    routes = []
+    statuses = []
+    args = []
+
+    for path, http_method in requests:
+      # identical requests are classified once and then only copied
+      request = (path, http_method)
+      outcome = outcomes.get(request)
+      if outcome is None:
+        try:
+          result = paths[path]
+        except KeyError:
+          result = paths[path] = _TOO_LONG if self._exceeds_limits(path) \
+              else self._classify(path)
+
+        if result is _TOO_LONG:
+          outcome = (-1, HTTPStatus.REQUEST_URI_TOO_LONG.value, None)
+        elif result is None:
+          outcome = (-1, HTTPStatus.NOT_FOUND.value, None)
+        elif result.route.http_methods_map.mask & HTTP_METHOD_BITS.get(
+            http_method, 0):
+          outcome = (index[result.route], HTTPStatus.OK.value, result.args)
+        else:
+          outcome = (index[result.route], HTTPStatus.METHOD_NOT_ALLOWED.value,
+                     result.args)
+        outcomes[request] = outcome
+
+      routes.append(outcome[0])
+      statuses.append(outcome[1])
+      args.append(outcome[2])
+
+    return MatchBatch(routes, statuses, args)
+
+  def url_for(self, name_or_handler: Union[str, FunctionType],
+              **vars: Any) -> str:
+    """
+    Builds the URL of a mounted route from values for its variables. Values
+    are converted by `str()`, validated against the type of their variable
+    and percent-encoded, so the decoded paths of built URLs are always
+    matched by the route again.
+
+    Examples:
+      >>> router.mount("/items/{id:uint}", get_item, ["GET"])
+      >>> router.url_for("get_item", id=42)
+      '/items/42'
+      >>> router.url_for(get_item, id=42)
+      '/items/42'
+
+    Args:
+      name_or_handler (Union[str, FunctionType]): name of route (see
+          `mount()`) or handler function of route
+      **vars (Any): values of the variables of route
 
-    # return route object for specific route
-    io.debug(f"    => Matched: ({func.__name__}) {http_method} {r.tpl}")
-    io.debug(f"    => Vars: {args}")
-    return RouteHandle(args, func)
+    Returns:
+      str: URL of route including the prefix of router
+
+    Raises:
+      RuntimeError: If no route is mounted under name or for handler.
+      ValueError: If a variable is missing, unknown or has an invalid value.
+    """
+    found = self._named(name_or_handler)
+    if found is None:
+      raise RuntimeError(f"no route mounted for: {name_or_handler!r}")
+    router, route = found
+
+    # builders are compiled on first use, as most routes of large route
+    # tables are never linked to
+    builder = route.url_builder
+    if builder is None:
+      builder = route.url_builder = UrlBuilder(router.prefix, route.tpl,
+                                               route.segments)
+    return builder.build(vars)
+
+  def _named(
+      self, name_or_handler: Union[str,
+                                   FunctionType]) -> Optional[tuple[Router,
+                                                                    Route]]:
+    route = self.names.get(name_or_handler)
+    if route is not None:
+      return self, route
+    for sub in self.subrouters.values():
+      found = sub._named(name_or_handler)
+      if found is not None:
+        return found
+    return None
+
+  def cache_info(self) -> Optional[CacheInfo]:
+    """
+    Returns statistics of the match cache.
+
+    Returns:
+      Optional[CacheInfo]: hit and miss counters and sizes of the cache, None
+          if caching is disabled.
+    """
+    if self.cache is None:
+      return None
+    return self.cache.info()
 
   def print_debug_information(self, host: str, port: int,
                               provider: AbstractProvider) -> None:
@@ -406,7 +2571,7 @@ class Router():
     Returns:
       list[str]: List of routes as string.
     """
-    return [t.tpl for t in self.routes.values()]
+    return [tpl for tpl, _ in self._all_routes()]
 
   def get_routes_detailed(self) -> list[str]:
     """
@@ -421,19 +2586,39 @@ class Router():
     results = []
 
     # iterate through routes
-    for t in self.routes.values():
+    for tpl, t in self._all_routes():
       # get all methods, for which the function-pointer is not None and
       # therefore accepted by the route
-      methods = t.http_methods_map._internal.keys()
-      methods = ",".join(methods)
+      methods = ",".join(m for m, _ in t.http_methods_map.items())
       # append combined string to results
-      results.append(f"{t.tpl} {methods}")
+      results.append(f"{tpl} {methods}")
 
     return results
 
+  def get_route_hits(self) -> dict[str, int]:
+    """
+    Will return the number of requests resolved to each route by the dispatch
+    engine, most popular first. Only engines that count hits (like the
+    `regex` engine with a `reorder_interval`) report any routes.
+
+    Returns:
+      dict[str, int]: Templated path of routes mapped to their hits.
+    """
+    hits = {route.tpl: count for route, count in self.engine.get_hits().items()}
+    for head, sub in self.subrouters.items():
+      hits.update(
+          (f"{head}/{tpl}", count) for tpl, count in sub.get_route_hits().items())
+    return dict(sorted(hits.items(), key=lambda item: item[1], reverse=True))
+
   def build_provider(self, name: str = "flask") -> AbstractProvider:
     name = name.lower()
     if name == "flask":
       return FlaskProvider(self)
+    elif name == "wsgi":
+      return WsgiProvider(self)
+    elif name == "asgi":
+      return AsgiProvider(self)
+    elif name == "asyncio":
+      return AsyncioProvider(self)
     else:
       raise RuntimeError()
@@ -16,5 +16,8 @@
 # this program.  If not, see <https://www.gnu.org/licenses/>.                  #
 ################################################################################
 
+from . import cache
 from . import errors
-from . import io
\ No newline at end of file
+from . import http
+from . import io
+from . import prefork
\ No newline at end of file
@@ -0,0 +1,111 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+from __future__ import annotations
+
+# -- STL
+from collections import OrderedDict
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+
+class LruCache():
+  """
+  Bounded mapping, that evicts the least recently used entry once more than
+  `maxsize` entries are stored.
+
+  The cache is thread-safe. Every access reorders the entries, so even
+  lookups are done under a lock, otherwise concurrent threads could evict an
+  entry between finding and reordering it.
+
+  Attributes:
+    maxsize (int): Maximum number of entries.
+
+  Args:
+    maxsize (int): Maximum number of entries.
+  """
+
+  maxsize: int
+  _data: OrderedDict[Hashable, Any]
+  _lock: threading.Lock
+
+  def __init__(self, maxsize: int) -> None:
+    self.maxsize = maxsize
+    self._data = OrderedDict()
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._data)
+
+  def get(self, key: Hashable) -> Optional[Any]:
+    """
+    Returns the entry for key and marks it as most recently used.
+
+    Args:
+      key (Hashable): key of entry
+
+    Returns:
+      Optional[Any]: stored value, None if key is not cached.
+    """
+    with self._lock:
+      value = self._data.get(key)
+      if value is not None:
+        self._data.move_to_end(key)
+      return value
+
+  def put(self, key: Hashable, value: Any) -> None:
+    """
+    Stores value under key and evicts the least recently used entry, if the
+    cache is full.
+
+    Args:
+      key (Hashable): key of entry
+      value (Any): value of entry, must not be None
+    """
+    if self.maxsize <= 0:
+      return
+    with self._lock:
+      self._data[key] = value
+      self._data.move_to_end(key)
+      if len(self._data) > self.maxsize:
+        self._data.popitem(last=False)
+
+  def discard(self, key: Hashable) -> None:
+    with self._lock:
+      self._data.pop(key, None)
+
+  def evict(self, predicate: Callable[[Hashable], Any]) -> int:
+    """
+    Removes all entries whose key fulfills a predicate.
+
+    Args:
+      predicate (Callable[[Hashable], Any]): returns a truthy value for keys
+          of entries, that should be removed
+
+    Returns:
+      int: number of removed entries
+    """
+    with self._lock:
+      keys = [key for key in self._data if predicate(key)]
+      for key in keys:
+        del self._data[key]
+    return len(keys)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._data.clear()
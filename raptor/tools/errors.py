@@ -26,17 +26,22 @@
 # Package containing additional Error types.
 
 from http import HTTPStatus
-from typing import Any
+from typing import Any, Optional
 import traceback
 
 
 class RaptorAbortException(Exception):
 
   http_status: HTTPStatus
+  headers: dict[str, str]
 
-  def __init__(self, http_status: HTTPStatus, *args: object) -> None:
+  def __init__(self,
+               http_status: HTTPStatus,
+               *args: object,
+               headers: Optional[dict[str, str]] = None) -> None:
     super().__init__(*args)
     self.http_status = http_status
+    self.headers = headers or {}
 
   def payload(self) -> Any:
     payload = {}
@@ -14,5 +14,11 @@ def make_status_response(http_status: HTTPStatus) -> Response:
   return resp
 
 
+def make_allow_response(allow: str) -> Response:
+  resp = make_response("", HTTPStatus.NO_CONTENT.value)
+  resp.headers["Allow"] = allow
+  return resp
+
+
 def abort(http_status: HTTPStatus, *args: object) -> NoReturn:
   raise RaptorAbortException(http_status, *args)
\ No newline at end of file
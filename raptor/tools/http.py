@@ -0,0 +1,238 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# Lightweight request and response objects for the providers, that dispatch
+# requests straight through the Router without a web framework. Handlers get
+# the current request through `get_request()`, which works for threaded and
+# asynchronous servers alike.
+
+from __future__ import annotations
+
+# -- STL
+from contextvars import ContextVar
+from http import HTTPStatus
+import json
+from typing import Any, Optional, Union
+from urllib.parse import parse_qs
+
+STATUS_LINES = {status.value: f"{status.value} {status.phrase}"
+                for status in HTTPStatus}
+"""dict[int, str]: Precomputed status lines by status code."""
+
+_request: ContextVar[Request] = ContextVar("raptor_request")
+
+
+class Request():
+  """
+  Request as seen by a handler. Only method and path are read eagerly,
+  headers, query arguments and body are parsed on first access.
+
+  Attributes:
+    method (str): HTTP method of request.
+    path (str): Full requested path, including the prefix of the router.
+    query_string (str): Undecoded query string without `?`.
+    remote_addr (Optional[str]): Address of client, if known.
+    scheme (str): URL scheme, `http` or `https`.
+  """
+
+  __slots__ = ("method", "path", "query_string", "remote_addr", "scheme",
+               "_headers", "_body", "_args")
+
+  method: str
+  path: str
+  query_string: str
+  remote_addr: Optional[str]
+  scheme: str
+  _headers: Optional[dict[str, str]]
+  _body: Optional[bytes]
+  _args: Optional[dict[str, list[str]]]
+
+  def __init__(self,
+               method: str,
+               path: str,
+               query_string: str = "",
+               headers: Optional[dict[str, str]] = None,
+               body: Optional[bytes] = None,
+               remote_addr: Optional[str] = None,
+               scheme: str = "http") -> None:
+    self.method = method
+    self.path = path
+    self.query_string = query_string
+    self.remote_addr = remote_addr
+    self.scheme = scheme
+    self._headers = headers
+    self._body = body
+    self._args = None
+
+  @property
+  def headers(self) -> dict[str, str]:
+    """dict[str, str]: Headers of request with lowercase names."""
+    if self._headers is None:
+      self._headers = self.read_headers()
+    return self._headers
+
+  @property
+  def args(self) -> dict[str, list[str]]:
+    """dict[str, list[str]]: Decoded query arguments."""
+    if self._args is None:
+      self._args = parse_qs(self.query_string, keep_blank_values=True)
+    return self._args
+
+  def get_data(self) -> bytes:
+    """
+    Returns:
+      bytes: raw body of request, empty if request has no body
+    """
+    if self._body is None:
+      self._body = self.read_body()
+    return self._body
+
+  def read_headers(self) -> dict[str, str]:
+    """
+    Reads the headers from the server, for requests whose headers have not
+    been passed on creation. Overwritten by providers.
+
+    Returns:
+      dict[str, str]: headers with lowercase names
+    """
+    return {}
+
+  def read_body(self) -> bytes:
+    """
+    Reads the body from the server, for requests whose body has not been
+    passed on creation. Overwritten by providers, that stream the body.
+
+    Returns:
+      bytes: raw body of request
+    """
+    return b""
+
+  def get_json(self) -> Any:
+    """
+    Returns:
+      Any: body of request decoded as JSON, None if body is empty
+    """
+    data = self.get_data()
+    return json.loads(data) if data else None
+
+
+class Response():
+  """
+  Response returned by a handler or built from its return value (see
+  `make_response()`).
+
+  Attributes:
+    status (int): HTTP status code.
+    headers (list[tuple[str, str]]): Headers of response.
+    body (bytes): Encoded body of response.
+  """
+
+  __slots__ = ("status", "headers", "body")
+
+  status: int
+  headers: list[tuple[str, str]]
+  body: bytes
+
+  def __init__(self,
+               body: Union[str, bytes] = b"",
+               status: int = HTTPStatus.OK.value,
+               headers: Optional[dict[str, str]] = None,
+               mimetype: str = "text/html") -> None:
+    if isinstance(body, str):
+      body = body.encode()
+    self.status = int(status)
+    self.body = body
+    self.headers = [("Content-Type", f"{mimetype}; charset=utf-8")]
+    if headers:
+      self.headers.extend(headers.items())
+
+  @property
+  def status_line(self) -> str:
+    """str: Status line of response, e.g. `200 OK`."""
+    line = STATUS_LINES.get(self.status)
+    return line if line is not None else f"{self.status} Unknown"
+
+  def wsgi_headers(self) -> list[tuple[str, str]]:
+    """
+    Returns:
+      list[tuple[str, str]]: headers including `Content-Length`
+    """
+    return self.headers + [("Content-Length", str(len(self.body)))]
+
+
+def get_request() -> Request:
+  """
+  Returns the request currently handled in this thread or task.
+
+  Raises:
+    LookupError: If called outside of a request.
+  """
+  return _request.get()
+
+
+def make_response(rv: Any) -> Response:
+  """
+  Converts the return value of a handler into a response, following the
+  conventions of flask: strings and bytes are sent as HTML, dictionaries and
+  lists as JSON and tuples may add the status and headers, as `(body,
+  status)`, `(body, headers)` or `(body, status, headers)`.
+
+  Args:
+    rv (Any): return value of handler
+
+  Returns:
+    Response: response for return value
+
+  Raises:
+    TypeError: If return value can not be converted.
+  """
+  if isinstance(rv, Response):
+    return rv
+
+  status, headers = HTTPStatus.OK.value, None
+  if isinstance(rv, tuple):
+    if len(rv) == 3:
+      rv, status, headers = rv
+    elif len(rv) == 2 and isinstance(rv[1], dict):
+      rv, headers = rv
+    elif len(rv) == 2:
+      rv, status = rv
+    else:
+      raise TypeError(f"invalid response tuple of length {len(rv)}")
+
+  if isinstance(rv, (str, bytes)):
+    return Response(rv, status, headers)
+  if isinstance(rv, (dict, list)):
+    return Response(json.dumps(rv), status, headers, "application/json")
+  raise TypeError(f"invalid return type of handler: {type(rv).__name__}")
+
+
+def make_status_response(http_status: HTTPStatus) -> Response:
+  return Response(f"{http_status.value} {http_status.phrase}",
+                  http_status.value,
+                  mimetype="text/plain")
+
+
+def make_allow_response(allow: str) -> Response:
+  resp = Response(b"", HTTPStatus.NO_CONTENT.value)
+  resp.headers.append(("Allow", allow))
+  return resp
@@ -38,7 +38,7 @@ from datetime import datetime
 import logging
 import sys
 import time
-from typing import Optional
+from typing import Callable, Optional
 
 TZ_NAME = time.tzname[0]
 
@@ -239,6 +239,24 @@ Examples:
   2022/04/05 10:42:35 (UTC) DEBUG    | Hello World!
 """
 
+
+def debug_enabled() -> bool:
+  """
+  Checks if debug messages are logged at all. Hot paths check this before
+  formatting debug messages, that would otherwise be built for every call
+  and then be dropped by the logger.
+
+  Examples:
+
+    >>> if io.debug_enabled():
+    ...   io.debug(f"    => Vars: {args}")
+
+  Returns:
+    bool: True if level of logger is `DEBUG`
+  """
+  return _logger.isEnabledFor(logging.DEBUG)
+
+
 info = _logger.info
 """Alias for `logging.info` function over static `_logger`.
 
@@ -297,3 +315,79 @@ Examples:
 """
 
 get_prefix = _cli_formatter.get_prefix
+
+
+class AggregateLog():
+  """
+  Counts repeated events, e.g. requests rejected as unknown paths, and logs a
+  single summary per interval instead of one message per event.
+
+  Examples:
+
+    >>> rejected = AggregateLog("Rejected requests to unknown paths")
+    >>> rejected.add("/wp-admin/setup.php")
+    2022/04/05 10:41:28 (UTC) WARNING  | Rejected requests to unknown paths: 1 (/wp-admin/setup.php: 1)
+
+  Attributes:
+    message (str): Prefix of logged summary.
+    interval (float): Minimum number of seconds between two summaries.
+    log (Callable[[str], None]): Logging function used for summaries.
+    top (int): Number of most frequent keys listed in summary.
+    max_keys (int): Maximum number of distinct keys counted per interval,
+        further keys are counted as `...`.
+  """
+
+  message: str
+  interval: float
+  log: Callable[[str], None]
+  top: int
+  max_keys: int
+  _counts: dict[str, int]
+  _since: float
+
+  def __init__(self,
+               message: str,
+               interval: float = 60.0,
+               log: Optional[Callable[[str], None]] = None,
+               top: int = 5,
+               max_keys: int = 1024) -> None:
+    self.message = message
+    self.interval = interval
+    self.log = log or warning
+    self.top = top
+    self.max_keys = max_keys
+    self._counts = {}
+    # the first event is logged right away
+    self._since = time.monotonic() - interval
+
+  def add(self, key: str) -> None:
+    """
+    Counts an event and logs the summary, if the interval has passed.
+
+    Args:
+      key (str): key of event, e.g. requested path
+    """
+    counts = self._counts
+    if key not in counts and len(counts) >= self.max_keys:
+      key = "..."
+    counts[key] = counts.get(key, 0) + 1
+
+    now = time.monotonic()
+    if now - self._since >= self.interval:
+      self.flush(now)
+
+  def flush(self, now: Optional[float] = None) -> None:
+    """
+    Logs the summary of all events counted since the last summary.
+
+    Args:
+      now (Optional[float], optional): current value of `time.monotonic()`
+    """
+    self._since = time.monotonic() if now is None else now
+    counts, self._counts = self._counts, {}
+    if not counts:
+      return
+
+    top = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    keys = ", ".join(f"{key}: {count}" for key, count in top[:self.top])
+    self.log(f"{self.message}: {sum(counts.values())} ({keys})")
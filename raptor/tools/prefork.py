@@ -0,0 +1,314 @@
+################################################################################
+# raptor, a regex based REST routing library                                   #
+# Copyright (C) 2022, Hendrik Boeck <hendrikboeck.dev@protonmail.com>          #
+#                                                                              #
+# This program is free software: you can redistribute it and/or modify it      #
+# under the terms of the GNU General Public License as published by the Free   #
+# Software Foundation, either version 3 of the License, or (at your option)    #
+# any later version.                                                           #
+#                                                                              #
+# This program is distributed in the hope that it will be useful, but WITHOUT  #
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or        #
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for    #
+# more details.                                                                #
+#                                                                              #
+# You should have received a copy of the GNU General Public License along with #
+# this program.  If not, see <https://www.gnu.org/licenses/>.                  #
+################################################################################
+
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# Pre-fork serving on POSIX systems. The parent process builds the router and
+# forks worker processes, that run the server and share the listening port,
+# either through a socket bound before the fork or by binding it with
+# `SO_REUSEPORT` themselves.
+
+from __future__ import annotations
+
+# -- STL
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import Callable, NamedTuple, Optional, Union
+
+# -- PROJECT
+from raptor.tools import io
+
+STOP_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+"""tuple[signal.Signals, ...]: Signals stopping the supervisor and workers."""
+
+RESTART_SIGNAL = signal.SIGHUP
+"""signal.Signals: Signal making the supervisor restart all workers."""
+
+REPORT_SIGNAL = signal.SIGUSR1
+"""signal.Signals: Signal making the supervisor log the memory of workers."""
+
+
+class MemoryUsage(NamedTuple):
+  """
+  Resident memory of a process, split into pages shared with other processes
+  (e.g. workers forked from the same parent) and pages private to it.
+
+  Attributes:
+    rss (int): Resident memory in bytes.
+    pss (int): Proportional share of resident memory in bytes.
+    shared (int): Resident memory shared with other processes in bytes.
+    private (int): Resident memory private to the process in bytes.
+  """
+
+  rss: int
+  pss: int
+  shared: int
+  private: int
+
+  def format(self) -> str:
+    mib = 1024 * 1024
+    return (f"{self.shared / mib:.1f}MiB shared, "
+            f"{self.private / mib:.1f}MiB private, "
+            f"{self.pss / mib:.1f}MiB pss")
+
+
+def memory_usage(pid: Union[int, str] = "self") -> Optional[MemoryUsage]:
+  """
+  Reads the memory of a process from `/proc/<pid>/smaps_rollup`.
+
+  Args:
+    pid (Union[int, str], optional): process id. Defaults to the current
+        process.
+
+  Returns:
+    Optional[MemoryUsage]: memory of process, None if it is not available,
+        e.g. on systems other than linux.
+  """
+  fields = {}
+  try:
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+      for line in f:
+        name, _, value = line.partition(":")
+        parts = value.split()
+        if len(parts) == 2 and parts[1] == "kB":
+          fields[name] = int(parts[0]) * 1024
+  except OSError:
+    return None
+
+  return MemoryUsage(
+      fields.get("Rss", 0), fields.get("Pss", 0),
+      fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+      fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0))
+
+
+def bind_socket(host: str,
+                port: int,
+                backlog: int = 1024,
+                reuse_port: bool = False) -> socket.socket:
+  """
+  Creates a listening TCP socket, that is inherited by forked workers.
+
+  Args:
+    host (str): address to listen on
+    port (int): port to listen on
+    backlog (int, optional): size of queue of pending connections
+    reuse_port (bool, optional): set `SO_REUSEPORT`, so that every worker can
+        bind a socket of its own to the same port
+
+  Returns:
+    socket.socket: listening socket
+  """
+  family = socket.AF_INET6 if ":" in host else socket.AF_INET
+  sock = socket.socket(family, socket.SOCK_STREAM)
+  sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  if reuse_port:
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+  sock.bind((host, port))
+  sock.listen(backlog)
+  sock.set_inheritable(True)
+  return sock
+
+
+class Supervisor():
+  """
+  Forks worker processes and keeps them running. Workers that die are
+  restarted, `SIGINT` and `SIGTERM` stop all workers and the supervisor,
+  `SIGUSR1` logs the shared and private memory of every worker (see
+  `report()`) and `SIGHUP` restarts all workers, e.g. to reload their
+  configuration. Workers are restarted by `SIGTERM`, so targets that handle
+  `SIGTERM` themselves have to exit on it.
+
+  Workers that die right after being started are restarted with a growing
+  delay, so a server that fails on start, e.g. because the port is in use,
+  does not make the supervisor fork in a tight loop.
+
+  Examples:
+
+    >>> sock = bind_socket("0.0.0.0", 8080)
+    >>> Supervisor(lambda: waitress.serve(app, sockets=[sock]), 4).run()
+
+  Attributes:
+    target (Callable[[], None]): Function run by every worker.
+    workers (int): Number of workers.
+    grace (float): Seconds to wait for workers to exit after a stop signal,
+        before they are killed.
+    pids (dict[int, float]): Running workers and the time they were started.
+    on_fork (Optional[Callable[[], None]]): Function run in every worker
+        before target.
+
+  Args:
+    target (Callable[[], None]): Function run by every worker.
+    workers (int): Number of workers.
+    grace (float, optional): Defaults to 10 seconds.
+    on_fork (Optional[Callable[[], None]], optional): Defaults to None.
+  """
+
+  target: Callable[[], None]
+  workers: int
+  grace: float
+  pids: dict[int, float]
+  on_fork: Optional[Callable[[], None]]
+  _stopping: Optional[int]
+  # workers asked to exit by the restart signal
+  _restarting: set[int]
+  _delay: float
+
+  def __init__(self,
+               target: Callable[[], None],
+               workers: int,
+               grace: float = 10.0,
+               on_fork: Optional[Callable[[], None]] = None) -> None:
+    if workers < 1:
+      raise ValueError(f"invalid number of workers: {workers}")
+    self.target = target
+    self.workers = workers
+    self.grace = grace
+    self.pids = {}
+    self.on_fork = on_fork
+    self._stopping = None
+    self._restarting = set()
+    self._delay = 0.0
+
+  def run(self) -> None:
+    """
+    Starts the workers and supervises them until a stop signal is received
+    and all workers have exited.
+    """
+    previous = {
+        sig: signal.signal(sig, self._handle_signal)
+        for sig in STOP_SIGNALS + (RESTART_SIGNAL, REPORT_SIGNAL)
+    }
+    try:
+      for _ in range(self.workers):
+        self._spawn()
+      self._supervise()
+    finally:
+      for sig, handler in previous.items():
+        signal.signal(sig, handler)
+
+  def _spawn(self) -> None:
+    pid = os.fork()
+    if pid > 0:
+      self.pids[pid] = time.monotonic()
+      io.info(f"Started worker {pid}")
+      return
+
+    # -- worker process, never returns
+    code = 0
+    try:
+      for sig in STOP_SIGNALS + (RESTART_SIGNAL, REPORT_SIGNAL):
+        signal.signal(sig, signal.SIG_DFL)
+      signal.signal(signal.SIGINT, signal.default_int_handler)
+      if self.on_fork is not None:
+        self.on_fork()
+      self.target()
+    except KeyboardInterrupt:
+      pass
+    except BaseException:
+      io.error(f"Worker {os.getpid()} failed:")
+      for line in traceback.format_exc().split("\n"):
+        io.error(f"⋮  {line}")
+      code = 1
+    os._exit(code)
+
+  def _supervise(self) -> None:
+    deadline = None
+    while self.pids:
+      if self._stopping is not None and deadline is None:
+        deadline = time.monotonic() + self.grace
+      if deadline is not None and time.monotonic() > deadline:
+        io.warning(f"Killing {len(self.pids)} workers after grace period")
+        self._forward(signal.SIGKILL)
+        deadline = float("inf")
+
+      try:
+        # poll instead of blocking, as a stop signal arriving right before a
+        # blocking waitpid() would only be handled after a worker exits, and
+        # so that the grace period is enforced
+        pid, status = os.waitpid(-1, os.WNOHANG)
+      except ChildProcessError:
+        break
+      if pid == 0:
+        time.sleep(0.1)
+        continue
+
+      started = self.pids.pop(pid, None)
+      if started is None or self._stopping is not None:
+        continue
+      if pid in self._restarting:
+        self._restarting.discard(pid)
+        self._spawn()
+        continue
+
+      io.error(f"Worker {pid} died ({_describe(status)}), restarting it")
+      # back off, if workers die right after they have been started
+      if time.monotonic() - started < 1.0:
+        self._delay = min(max(self._delay * 2, 0.1), 10.0)
+        time.sleep(self._delay)
+      else:
+        self._delay = 0.0
+      if self._stopping is None:
+        self._spawn()
+
+  def report(self) -> dict[int, Optional[MemoryUsage]]:
+    """
+    Logs the memory of every worker. Pages of objects created before the
+    fork stay shared, as long as no worker writes to them (see
+    `Router.seal()`).
+
+    Returns:
+      dict[int, Optional[MemoryUsage]]: memory per process id of worker
+    """
+    usage = {pid: memory_usage(pid) for pid in self.pids}
+    for pid, mem in usage.items():
+      io.info(f"Worker {pid}: {mem.format() if mem else 'unknown'}")
+    return usage
+
+  def _handle_signal(self, sig: int, _frame: object) -> None:
+    if sig == REPORT_SIGNAL:
+      self.report()
+      return
+    if sig == RESTART_SIGNAL:
+      if self._stopping is None:
+        io.info(f"Restarting {len(self.pids)} workers")
+        self._restarting.update(self.pids)
+        self._forward(signal.SIGTERM)
+      return
+    if sig in STOP_SIGNALS:
+      if self._stopping is None:
+        io.info(f"Stopping {len(self.pids)} workers")
+      self._stopping = sig
+    self._forward(sig)
+
+  def _forward(self, sig: int) -> None:
+    for pid in list(self.pids):
+      try:
+        os.kill(pid, sig)
+      except ProcessLookupError:
+        pass
+
+
+def _describe(status: int) -> str:
+  if os.WIFSIGNALED(status):
+    return f"signal {signal.Signals(os.WTERMSIG(status)).name}"
+  return f"exit code {os.waitstatus_to_exitcode(status)}"
@@ -0,0 +1,118 @@
+import asyncio
+from functools import partial
+
+from raptor import Router
+from raptor.routing import PathFilter, _is_async
+
+
+async def hello(name: str, greeting: str = "hello") -> str:
+  return f"{greeting} {name}"
+
+
+class AsyncHandler():
+
+  async def __call__(self, name: str) -> str:
+    return f"object {name}"
+
+
+class UnhashableHandler(AsyncHandler):
+
+  def __eq__(self, other: object) -> bool:
+    return isinstance(other, UnhashableHandler)
+
+
+def sync_hello(name: str) -> str:
+  return f"sync {name}"
+
+
+def returns_coroutine(name: str):
+  return hello(name, "wrapped")
+
+
+def call(provider, path: str, method: str = "GET") -> tuple[int, bytes]:
+  scope = {"type": "http", "method": method, "path": path, "headers": []}
+  sent = []
+
+  async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+  async def send(message: dict) -> None:
+    sent.append(message)
+
+  asyncio.run(provider(scope, receive, send))
+  return sent[0]["status"], sent[1]["body"]
+
+
+def test_async_handlers_are_awaited() -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  router.mount("/object/{name:str}", AsyncHandler(), ["GET"])
+  router.mount("/partial/{name:str}", partial(hello, greeting="hi"), ["GET"])
+  router.mount("/sync/{name:str}", sync_hello, ["GET"])
+  router.mount("/wrapped/{name:str}", returns_coroutine, ["GET"])
+  router.mount("/unhashable/{name:str}", UnhashableHandler(), ["GET"])
+  provider = router.build_provider("asgi")
+
+  assert call(provider, "/hello/a") == (200, b"hello a")
+  assert call(provider, "/object/b") == (200, b"object b")
+  assert call(provider, "/partial/c") == (200, b"hi c")
+  assert call(provider, "/sync/d") == (200, b"sync d")
+  assert call(provider, "/wrapped/e") == (200, b"wrapped e")
+  assert call(provider, "/unhashable/f") == (200, b"object f")
+
+
+def test_async_callables_are_detected() -> None:
+  assert _is_async(hello)
+  assert _is_async(AsyncHandler())
+  assert _is_async(partial(partial(hello), greeting="hi"))
+  assert not _is_async(sync_hello)
+  assert not _is_async(returns_coroutine)
+
+
+def test_handles_carry_flag_computed_on_mount() -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  router.mount("/hello/{name:str}", sync_hello, ["POST"])
+  router.mount("/ping", hello, ["GET"])
+
+  assert router.match("hello/a", "GET").awaitable
+  assert router.match("hello/a", "HEAD").awaitable
+  assert not router.match("hello/a", "POST").awaitable
+  assert not router.match("hello/a", "OPTIONS").awaitable
+  assert router.match("ping", "GET").awaitable
+
+
+def test_rejects_is_checked_once_per_request(monkeypatch) -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("asgi")
+  calls = []
+  rejects = router.rejects
+  monkeypatch.setattr(router, "rejects",
+                      lambda path: calls.append(path) or rejects(path))
+  filtered = []
+  filter_rejects = PathFilter.rejects
+  monkeypatch.setattr(
+      PathFilter, "rejects",
+      lambda self, path: filtered.append(path) or filter_rejects(self, path))
+
+  assert call(provider, "/hello/raptor") == (200, b"hello raptor")
+  assert call(provider, "/wp-admin/setup.php")[0] == 404
+  assert calls == ["hello/raptor", "wp-admin/setup.php"]
+  # the matching of accepted paths does not run the path filter again
+  assert filtered == calls
+
+
+def test_startup_does_not_freeze_router() -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("asgi")
+  messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+  sent = []
+
+  async def receive() -> dict:
+    return messages.pop(0)
+
+  async def send(message: dict) -> None:
+    sent.append(message["type"])
+
+  asyncio.run(provider({"type": "lifespan"}, receive, send))
+
+  assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+  assert not router.frozen
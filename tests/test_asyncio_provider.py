@@ -0,0 +1,51 @@
+import asyncio
+
+from raptor import Router
+
+
+def hello(name: str) -> str:
+  return f"hello {name}"
+
+
+async def request(provider, raw: bytes) -> bytes:
+  server = await asyncio.start_server(provider.handle_connection, "127.0.0.1",
+                                      0)
+  port = server.sockets[0].getsockname()[1]
+  async with server:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+  return response
+
+
+def test_requests_are_answered_over_streams() -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("asyncio")
+
+  response = asyncio.run(
+      request(provider, b"GET /hello/raptor HTTP/1.1\r\n"
+              b"Connection: close\r\n\r\n"))
+
+  assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+  assert response.endswith(b"\r\n\r\nhello raptor")
+
+
+def test_serve_does_not_freeze_by_default(monkeypatch) -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("asyncio")
+
+  async def serve_forever(host: str, port: int) -> None:
+    pass
+
+  monkeypatch.setattr(provider, "serve_forever", serve_forever)
+  provider.serve("127.0.0.1", 0)
+  assert not router.frozen
+  router.unmount("/hello/{name:str}")
+  response = asyncio.run(
+      request(provider, b"GET /hello/raptor HTTP/1.0\r\n\r\n"))
+  assert response.startswith(b"HTTP/1.1 404 Not Found\r\n")
+
+  provider.serve("127.0.0.1", 0, freeze=True)
+  assert router.frozen
@@ -0,0 +1,33 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+def load_benchmark(name: str):
+  spec = importlib.util.spec_from_file_location(name,
+                                                BENCHMARKS / f"{name}.py")
+  module = importlib.util.module_from_spec(spec)
+  # handlers of the benchmarks are pickled by `Router.save()`
+  sys.modules[name] = module
+  spec.loader.exec_module(module)
+  return module
+
+
+def test_bench_routing_runs_on_small_tables() -> None:
+  bench = load_benchmark("bench_routing")
+  assert bench.__doc__ and "Usage" in bench.__doc__
+
+  report = bench.run(["trie", "regex"], [10], 10)
+  assert [r["engine"] for r in report["results"]] == ["trie", "regex"]
+  assert all(r["routes"] == 10 for r in report["results"])
+  assert all(r["load_s"] > 0 for r in report["results"])
+
+
+def test_bench_providers_runs_on_small_tables() -> None:
+  bench = load_benchmark("bench_providers")
+  assert bench.__doc__ and "Usage" in bench.__doc__
+
+  report = bench.run(["wsgi"], 10, 10)
+  assert [r["provider"] for r in report["results"]] == ["wsgi"]
@@ -0,0 +1,131 @@
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+from raptor import Router
+from raptor.tools.cache import LruCache
+from raptor.tools.errors import RaptorAbortException
+
+
+def get_item(id: int) -> str:
+  return f"item {id}"
+
+
+@pytest.fixture
+def switch_often():
+  # switch threads as often as possible, to provoke races
+  interval = sys.getswitchinterval()
+  sys.setswitchinterval(1e-6)
+  yield
+  sys.setswitchinterval(interval)
+
+
+class YieldingKey(str):
+  """
+  Key that gives up the GIL while it is hashed, so that other threads run
+  between the lookup of a key and the reordering of the cache.
+  """
+
+  def __hash__(self) -> int:
+    time.sleep(0)
+    return str.__hash__(self)
+
+
+def run_threads(target, count: int = 8) -> list[BaseException]:
+  errors = []
+
+  def run() -> None:
+    try:
+      target()
+    except BaseException as ex:
+      errors.append(ex)
+
+  threads = [threading.Thread(target=run) for _ in range(count)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  return errors
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+  cache = LruCache(2)
+  cache.put("a", 1)
+  cache.put("b", 2)
+  assert cache.get("a") == 1
+  cache.put("c", 3)
+
+  assert cache.get("b") is None
+  assert cache.get("a") == 1
+  assert cache.get("c") == 3
+  assert len(cache) == 2
+
+
+def test_lru_cache_is_thread_safe(switch_often) -> None:
+  cache = LruCache(4)
+  keys = [YieldingKey(f"k{i}") for i in range(6)]
+
+  def hammer() -> None:
+    for i in range(500):
+      key = keys[i % len(keys)]
+      cache.get(key)
+      cache.put(key, i)
+
+  assert run_threads(hammer) == []
+  assert len(cache) == 4
+
+
+def test_match_cache_is_thread_safe(switch_often) -> None:
+  router = Router(cache_size=8, errors_cache_size=4)
+  router.mount("/items/{id:int}", get_item, ["GET"])
+
+  paths = [YieldingKey(f"items/{i}") for i in range(10)]
+
+  def hammer() -> None:
+    rnd = random.Random(threading.get_ident())
+    for _ in range(300):
+      i = rnd.randrange(len(paths))
+      assert router.match(paths[i], "GET").args == [i]
+      with pytest.raises(RaptorAbortException):
+        router.match(paths[i], "PUT")
+
+  assert run_threads(hammer) == []
+  info = router.cache_info()
+  assert info.size == 8 and info.errors == 4
+
+
+def test_not_found_cache_is_thread_safe(switch_often) -> None:
+  router = Router(not_found_cache_size=4)
+  router.mount("/items/{id:int}", get_item, ["GET"])
+
+  paths = [YieldingKey(f"items/x{i}") for i in range(10)]
+
+  def hammer() -> None:
+    rnd = random.Random(threading.get_ident())
+    for _ in range(300):
+      with pytest.raises(RaptorAbortException) as info:
+        router.match(paths[rnd.randrange(len(paths))], "GET")
+      assert info.value.http_status == 404
+
+  assert run_threads(hammer) == []
+  assert len(router.not_found) == 4
+
+
+def test_match_cache_answers_repeated_lookups_until_routes_change() -> None:
+  router = Router(cache_size=8, errors_cache_size=2)
+  router.mount("/items/{id:int}", get_item, ["GET"])
+
+  first = router.match("items/1", "GET")
+  assert router.match("items/1", "GET") is first
+  for _ in range(2):
+    with pytest.raises(RaptorAbortException):
+      router.match("items/1", "PUT")
+  info = router.cache_info()
+  assert (info.hits, info.misses, info.size, info.errors) == (2, 2, 1, 1)
+
+  router.mount("/items/{id:int}", get_item, ["PUT"])
+  assert router.match("items/1", "PUT").func is get_item
+  assert router.match("items/1", "GET") is not first
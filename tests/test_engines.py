@@ -0,0 +1,207 @@
+from functools import partial
+
+import pytest
+
+from raptor import Router
+from raptor.engines import RegexEngine
+from raptor.routing import VARIABLE_TYPES, register_variable_type
+from raptor.tools.errors import RaptorAbortException
+
+ENGINES = ["trie", "regex", "combined", "codegen"]
+
+TEMPLATES = [
+    "/",
+    "/items/{id:int}",
+    "/items/{id:int}/tags/{tag:str}",
+    "/files/{name:str}.{ext:str}",
+    "/static/{file:path}",
+    "/hash/{h:md5}",
+    "/users/{id:uuid4}",
+    "/num/{x:float}",
+    "/range/{lo:uint}-{hi:int}",
+    "/hex/{h:hex}",
+    "/mixed/{a:uint}/x/{b:str}",
+]
+
+UUID = "123e4567-e89b-42d3-a456-426614174000"
+
+TABLE = [
+    ("", "/", []),
+    ("items/42", "/items/{id:int}", [42]),
+    ("items/-3", "/items/{id:int}", [-3]),
+    ("items/x", None, None),
+    ("items/1/tags/new", "/items/{id:int}/tags/{tag:str}", [1, "new"]),
+    ("items/1/tags", None, None),
+    ("files/a.b.c", "/files/{name:str}.{ext:str}", ["a.b", "c"]),
+    ("static/css/site.css", "/static/{file:path}", ["css/site.css"]),
+    (f"hash/{'a' * 32}", "/hash/{h:md5}", ["a" * 32]),
+    (f"hash/{'a' * 31}", None, None),
+    (f"hash/{'g' * 32}", None, None),
+    (f"users/{UUID}", "/users/{id:uuid4}", [UUID]),
+    (f"users/{UUID.replace('-42d3', '-12d3')}", None, None),
+    ("num/3.5", "/num/{x:float}", [3.5]),
+    ("num/.5", "/num/{x:float}", [0.5]),
+    ("range/7--2", "/range/{lo:uint}-{hi:int}", [7, -2]),
+    ("range/-7-2", None, None),
+    ("hex/00fF", "/hex/{h:hex}", ["00fF"]),
+    ("mixed/1/x/y", "/mixed/{a:uint}/x/{b:str}", [1, "y"]),
+    ("mixed/1/y/y", None, None),
+    ("nothing/here", None, None),
+]
+"""Requested path, expected template and arguments, equal for all engines."""
+
+
+def handler(tpl: str, *args) -> str:
+  return tpl
+
+
+def build(engine: str, frozen: bool) -> Router:
+  router = Router(engine=engine)
+  for tpl in TEMPLATES:
+    router.mount(tpl, partial(handler, tpl), ["GET"])
+  return router.freeze() if frozen else router
+
+
+@pytest.mark.parametrize("frozen", [False, True])
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("path,tpl,args", TABLE)
+def test_engines_resolve_paths_alike(engine, frozen, path, tpl, args) -> None:
+  router = build(engine, frozen)
+
+  if tpl is None:
+    with pytest.raises(RaptorAbortException):
+      router.match(path, "GET")
+    assert router.explain(path, "GET").status == 404
+  else:
+    handle = router.match(path, "GET")
+    assert handle.func() == tpl and handle.args == args
+    trace = router.explain(path, "GET")
+    assert trace.route == tpl.lstrip("/") and trace.args == args
+
+
+@pytest.mark.parametrize("engine", ["regex", "combined"])
+def test_linear_engines_prefer_the_first_mounted_route(engine) -> None:
+  router = Router(engine=engine)
+  router.mount("/user/{name:str}", partial(handler, "name"), ["GET"])
+  router.mount("/user/me", partial(handler, "me"), ["GET"])
+  router.mount("/user/{id:int}", partial(handler, "id"), ["GET"])
+
+  # static routes are resolved before any engine
+  assert router.match("user/me", "GET").func() == "me"
+  assert router.match("user/42", "GET").func() == "name"
+
+
+@pytest.mark.parametrize("engine", ["trie", "codegen"])
+def test_trie_engines_prefer_literal_segments(engine) -> None:
+  router = Router(engine=engine)
+  router.mount("/user/{name:str}/{post:int}", partial(handler, "name"), ["GET"])
+  router.mount("/user/me/{post:int}", partial(handler, "me"), ["GET"])
+  router.freeze()
+
+  assert router.match("user/me/1", "GET").func() == "me"
+  assert router.match("user/you/1", "GET").func() == "name"
+
+
+def test_combined_engine_resumes_after_rejected_validator() -> None:
+  if "even" not in VARIABLE_TYPES:
+    register_variable_type("even", int, rx=r"\d+",
+                           validate=lambda v: int(v) % 2 == 0)
+  router = Router(engine="combined")
+  router.mount("/n/{x:even}", partial(handler, "even"), ["GET"])
+  router.mount("/n/{x:int}", partial(handler, "int"), ["GET"])
+  assert router.engine.compiled is None
+
+  assert router.match("n/4", "GET").func() == "even"
+  assert router.match("n/3", "GET").func() == "int"
+  assert router.engine.compiled is not None
+  router.mount("/m/{x:int}", partial(handler, "m"), ["GET"])
+  assert router.engine.compiled is None
+
+
+def test_combined_engine_ignores_regex_compiled_from_old_routes() -> None:
+  router = Router(engine="combined")
+  router.mount("/a/{x:int}", partial(handler, "a"), ["GET"])
+  outdated = router.engine.compile()
+  router.mount("/b/{x:int}", partial(handler, "b"), ["GET"])
+  # a lookup compiling concurrently with the mount publishes its regex last
+  router.engine.compiled = outdated
+
+  assert router.match("b/1", "GET").func() == "b"
+  assert router.engine.compiled.routes == tuple(router.engine.routes)
+
+
+def test_codegen_engine_generates_lookup_on_freeze() -> None:
+  router = Router(engine="codegen")
+  router.mount("/items/{id:int}", partial(handler, "int"), ["GET"])
+  router.mount("/files/{h:md5}", partial(handler, "md5"), ["GET"])
+  assert router.engine.source is None
+  assert router.match("items/1", "GET").args == [1]
+
+  router.freeze()
+
+  assert "lookup" in vars(router.engine)
+  assert "isdecimal()" in router.engine.source
+  # inlined checks accept the same digits as the regex of the type
+  for engine in ("codegen", "regex"):
+    other = Router(engine=engine)
+    other.mount("/items/{id:int}", partial(handler, "int"), ["GET"])
+    assert other.freeze().match("items/٣", "GET").args == [3]
+
+
+def test_regex_engine_reorders_only_exclusive_routes() -> None:
+  router = Router(engine=RegexEngine(reorder_interval=10))
+  router.mount("/a/{x:int}", partial(handler, "int"), ["GET"])
+  router.mount("/a/{y:str}", partial(handler, "str"), ["GET"])
+  router.mount("/b/{z:int}", partial(handler, "b"), ["GET"])
+
+  for i in range(20):
+    router.match(f"a/x{i}", "GET")
+  for i in range(30):
+    router.match(f"b/{i}", "GET")
+  hits = router.get_route_hits()
+
+  assert hits == {"b/{z:int}": 30, "a/{y:str}": 20, "a/{x:int}": 0}
+  assert list(hits) == ["b/{z:int}", "a/{y:str}", "a/{x:int}"]
+  # the popular string route must stay behind the overlapping int route
+  assert [r.tpl for r in router.engine.routes] == [
+      "b/{z:int}", "a/{x:int}", "a/{y:str}"]
+  assert router.match("a/1", "GET").func() == "int"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_validator_only_types_match_single_segments(engine) -> None:
+  if "page" not in VARIABLE_TYPES:
+    register_variable_type(
+        "page", int, validate=lambda v: v.isdecimal() and 1 <= int(v) <= 1000)
+  router = Router(engine=engine)
+  router.mount("/list/{p:page}", partial(handler, "page"), ["GET"])
+  router.mount("/list/{p:page}/{q:page}", partial(handler, "pages"), ["GET"])
+
+  assert router.match("list/7", "GET").args == [7]
+  assert router.match("list/7/1000", "GET").args == [7, 1000]
+  for path in ("list/0", "list/1001", "list/x", "list/7/0", "list/7/8/9"):
+    with pytest.raises(RaptorAbortException):
+      router.match(path, "GET")
+
+
+def test_route_tables_share_containers_filters_and_matchers() -> None:
+  from raptor.engines.trie import _EMPTY
+
+  router = Router(engine="trie")
+  router.mount("/a/{x:int}", partial(handler, "a"), ["GET"])
+  router.mount("/b/{y:int}", partial(handler, "b"), ["GET"])
+  router.mount("/c/{y:int}/d", partial(handler, "c"), ["GET"])
+  a, b, c = router.routes.values()
+  root = router.engine.root
+  leaf_a = root.static["a"].dynamic[0][2]
+
+  assert leaf_a.static is _EMPTY
+  assert root.static["a"].dynamic[0][1] is root.static["b"].dynamic[0][1]
+  assert a.var_filter is b.var_filter is c.var_filter
+  assert a.http_methods_map.allow_headers is b.http_methods_map.allow_headers
+  assert not hasattr(a, "__dict__")
+
+  # emptied nodes are pruned and share the empty container again
+  for tpl in ("/a/{x:int}", "/b/{y:int}", "/c/{y:int}/d"):
+    router.unmount(tpl)
+  assert root.static is _EMPTY
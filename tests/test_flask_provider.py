@@ -0,0 +1,62 @@
+from raptor import Router
+from raptor.providers import flask as flask_provider
+from raptor.routing import PathFilter
+
+
+def hello(name: str) -> str:
+  return f"hello {name}"
+
+
+def ping() -> str:
+  return "pong"
+
+
+def test_routes_mounted_after_build_are_served() -> None:
+  router = Router()
+  provider = router.build_provider("flask")
+  router.mount("/hello/{name:str}", hello, ["GET"])
+
+  client = provider._flask.test_client()
+  assert client.get("/hello/raptor").data == b"hello raptor"
+  assert client.get("/unknown").status_code == 404
+
+
+def test_serve_does_not_freeze_by_default(monkeypatch) -> None:
+  monkeypatch.setattr(flask_provider.waitress, "serve", lambda **kw: None)
+  router = Router().mount("/ping", ping, ["GET"])
+  provider = router.build_provider("flask")
+
+  provider.serve("127.0.0.1", 0)
+  assert not router.frozen
+  router.mount("/hello/{name:str}", hello, ["GET"])
+  assert provider._flask.test_client().get("/hello/x").data == b"hello x"
+
+  provider.serve("127.0.0.1", 0, freeze=True)
+  assert router.frozen
+
+
+def test_routes_can_be_unmounted_while_served(monkeypatch) -> None:
+  monkeypatch.setattr(flask_provider.waitress, "serve", lambda **kw: None)
+  router = Router(cache_size=8).mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("flask")
+  provider.serve("127.0.0.1", 0)
+  client = provider._flask.test_client()
+  assert client.get("/hello/x").status_code == 200
+
+  router.unmount("/hello/{name:str}")
+
+  assert client.get("/hello/x").status_code == 404
+
+
+def test_path_filter_runs_once_per_request(monkeypatch) -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  client = router.build_provider("flask")._flask.test_client()
+  filtered = []
+  rejects = PathFilter.rejects
+  monkeypatch.setattr(
+      PathFilter, "rejects",
+      lambda self, path: filtered.append(path) or rejects(self, path))
+
+  assert client.get("/hello/raptor").data == b"hello raptor"
+  assert client.get("/wp-admin/setup.php").status_code == 404
+  assert filtered == ["hello/raptor", "wp-admin/setup.php"]
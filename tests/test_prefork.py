@@ -0,0 +1,115 @@
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from raptor.tools import io
+from raptor.tools.prefork import Supervisor, bind_socket, memory_usage
+
+pytestmark = pytest.mark.skipif(sys.platform != "linux",
+                                reason="requires fork and /proc")
+
+
+def test_memory_usage_splits_shared_and_private_pages() -> None:
+  mem = memory_usage()
+
+  assert mem is not None
+  assert mem.rss > 0
+  assert mem.shared + mem.private == mem.rss
+  assert "MiB shared" in mem.format()
+  assert memory_usage(2**22 + 1) is None
+
+
+def test_bind_socket_listens_for_inheriting_workers() -> None:
+  sock = bind_socket("127.0.0.1", 0, reuse_port=True)
+  port = sock.getsockname()[1]
+  # workers may bind sockets of their own to the same port
+  other = bind_socket("127.0.0.1", port, reuse_port=True)
+  try:
+    assert sock.get_inheritable()
+    with socket.create_connection(("127.0.0.1", port), timeout=1):
+      pass
+  finally:
+    other.close()
+    sock.close()
+
+
+def test_supervisor_rejects_invalid_number_of_workers() -> None:
+  with pytest.raises(ValueError):
+    Supervisor(lambda: None, 0)
+
+
+def test_supervisor_stops_workers_on_stop_signal() -> None:
+  read, write = os.pipe()
+
+  def target() -> None:
+    os.write(write, b"x")
+    signal.pause()
+
+  supervisor = Supervisor(target, 2, grace=5.0)
+
+  reports = []
+
+  def stop() -> None:
+    # wait for both workers to run, then stop the supervisor
+    try:
+      os.read(read, 1)
+      os.read(read, 1)
+      reports.append(supervisor.report())
+    finally:
+      # deliver the signal to the thread running the supervisor
+      signal.pthread_kill(threading.main_thread().ident, signal.SIGTERM)
+
+  stopper = threading.Thread(target=stop)
+  stopper.start()
+  try:
+    supervisor.run()
+  finally:
+    stopper.join()
+    os.close(read)
+    os.close(write)
+
+  assert supervisor.pids == {}
+  assert reports and all(reports[0].values())
+  assert supervisor._stopping == signal.SIGTERM
+
+
+def test_supervisor_restarts_workers_on_restart_signal(monkeypatch) -> None:
+  read, write = os.pipe()
+  errors = []
+  monkeypatch.setattr(io, "error", errors.append)
+
+  def target() -> None:
+    os.write(write, b"x")
+    signal.pause()
+
+  supervisor = Supervisor(target, 1, grace=5.0)
+
+  def restart_and_stop() -> None:
+    main = threading.main_thread().ident
+    try:
+      os.read(read, 1)
+      # the worker may run before the supervisor has recorded its pid
+      while not supervisor.pids:
+        time.sleep(0.01)
+      signal.pthread_kill(main, signal.SIGHUP)
+      # the restarted worker writes again
+      os.read(read, 1)
+    finally:
+      signal.pthread_kill(main, signal.SIGTERM)
+
+  helper = threading.Thread(target=restart_and_stop)
+  helper.start()
+  try:
+    supervisor.run()
+  finally:
+    helper.join()
+    os.close(read)
+    os.close(write)
+
+  assert errors == []
+  assert supervisor.pids == {} and supervisor._restarting == set()
@@ -0,0 +1,520 @@
+import gc
+import logging
+from urllib.parse import unquote
+
+import pytest
+
+from raptor import Router, routing
+from raptor.routing import VARIABLE_TYPES, register_variable_type
+from raptor.tools import io
+from raptor.tools.errors import RaptorAbortException
+
+
+def index() -> str:
+  return "index"
+
+
+def get_item(id: int) -> str:
+  return f"item {id}"
+
+
+def test_static_routes_are_matched_by_exact_path() -> None:
+  router = Router().mount("/", index, ["GET"]).mount("/health", index, ["GET"])
+
+  assert "health" in router.static_routes
+  assert router.match("", "GET").func is index
+  assert router.match("health", "GET").args == []
+  with pytest.raises(RaptorAbortException):
+    router.match("health/x", "GET")
+
+
+def test_match_formats_no_debug_messages_when_debug_is_disabled(
+    monkeypatch) -> None:
+
+  def fail(msg: str) -> None:
+    raise AssertionError(f"debug message formatted: {msg}")
+
+  router = Router().mount("/health", index, ["GET"])
+  router.mount("/items/{id:int}", get_item, ["GET"])
+  monkeypatch.setattr(io, "debug", fail)
+  level = io._logger.level
+  io._logger.setLevel(logging.INFO)
+  try:
+    assert router.match("health", "GET").func is index
+    assert router.match("items/3", "GET").args == [3]
+  finally:
+    io._logger.setLevel(level)
+
+
+@pytest.mark.parametrize("engine", ["trie", "regex", "combined", "codegen"])
+def test_mount_many_inserts_routes_as_one_batch(engine, monkeypatch) -> None:
+  table = [("/", index, ["GET"]), ("/items/{id:int}", get_item, ["GET"]),
+           ("/items/{id:int}/tags/{tag:str}", get_item, ["GET", "PUT"])]
+  router = Router(engine=engine)
+  batches = []
+  insert_many = router.engine.insert_many
+  monkeypatch.setattr(router.engine, "insert_many",
+                      lambda routes: batches.append(routes) or
+                      insert_many(routes))
+
+  router.mount_many(table)
+  monkeypatch.undo()
+  router.freeze()
+
+  assert [len(batch) for batch in batches] == [2]
+  assert router.match("", "GET").func is index
+  assert router.match("items/7", "GET").args == [7]
+  assert router.match("items/7/tags/new", "PUT").args == [7, "new"]
+
+
+def test_mount_many_keeps_routes_before_an_invalid_one() -> None:
+  router = Router()
+  with pytest.raises(Exception, match="unsupported rest-method"):
+    router.mount_many([("/items/{id:int}", get_item, ["GET"]),
+                       ("/other/{id:int}", get_item, ["FETCH"])])
+
+  assert router.match("items/7", "GET").args == [7]
+
+
+def test_failed_mount_many_drops_cached_lookups() -> None:
+  router = Router(cache_size=8)
+  for _ in range(2):
+    with pytest.raises(RaptorAbortException):
+      router.match("items/7", "GET")
+  assert router.rejects("items/7")
+
+  with pytest.raises(Exception, match="unsupported rest-method"):
+    router.mount_many([("/items/{id:int}", get_item, ["GET"]),
+                       ("/other/{id:int}", get_item, ["FETCH"])])
+
+  assert not router.rejects("items/7")
+  assert router.match("items/7", "GET").args == [7]
+
+
+def build_items_router(engine: str) -> Router:
+  return Router(engine=engine).mount_many([
+      ("/", index, ["GET"]),
+      ("/items/{id:int}", get_item, ["GET", "PUT"]),
+      ("/items/{id:int}/tags/{tag:str}", get_item, ["GET"]),
+      ("/files/{name:hex}", get_item, ["GET"]),
+  ])
+
+
+@pytest.mark.parametrize("frozen", [False, True])
+@pytest.mark.parametrize("engine", ["trie", "regex", "combined", "codegen"])
+def test_load_restores_saved_router(engine, frozen, tmp_path) -> None:
+  router = build_items_router(engine)
+  if frozen:
+    router.freeze()
+  router.save(tmp_path / "router.pickle", "v1")
+
+  loaded = Router.load(tmp_path / "router.pickle", "v1")
+
+  assert loaded is not None and loaded.frozen == frozen
+  assert type(loaded.engine) is type(router.engine)
+  assert loaded.match("", "GET").func is index
+  handle = loaded.match("items/7", "PUT")
+  assert handle.func is get_item and handle.args == [7]
+  assert loaded.match("items/7/tags/new", "GET").args == [7, "new"]
+  assert loaded.match("files/00ff", "GET").args == ["00ff"]
+  with pytest.raises(RaptorAbortException):
+    loaded.match("files/xyz", "GET")
+  assert loaded.url_for("get_item", id=3) == "/items/3"
+  if not frozen:
+    loaded.mount("/health", index, ["GET"])
+    assert loaded.match("health", "GET").func is index
+
+
+def test_load_builds_urls_with_the_passed_prefix(tmp_path) -> None:
+  router = Router(prefix="/v1").mount("/items/{id:int}", get_item, ["GET"])
+  assert router.url_for("get_item", id=3) == "/v1/items/3"
+  router.save(tmp_path / "router.pickle")
+
+  loaded = Router.load(tmp_path / "router.pickle", prefix="/v2")
+
+  assert loaded.url_for("get_item", id=3) == "/v2/items/3"
+  assert Router.load(tmp_path / "router.pickle").url_for(
+      "get_item", id=3) == "/v1/items/3"
+
+
+def test_load_inserts_routes_into_passed_engine(tmp_path) -> None:
+  build_items_router("codegen").freeze().save(tmp_path / "router.pickle")
+
+  loaded = Router.load(tmp_path / "router.pickle", engine="regex")
+
+  assert type(loaded.engine).__name__ == "RegexEngine" and loaded.frozen
+  assert loaded.match("items/7/tags/new", "GET").args == [7, "new"]
+
+
+def test_load_rejects_outdated_or_missing_files(tmp_path) -> None:
+  build_items_router("trie").save(tmp_path / "router.pickle", "v1")
+
+  assert Router.load(tmp_path / "router.pickle", "v2") is None
+  assert Router.load(tmp_path / "missing.pickle", "v1") is None
+
+
+def test_save_rejects_handlers_without_import_path(tmp_path) -> None:
+  router = Router().mount("/items/{id:int}", lambda id: id, ["GET"])
+
+  with pytest.raises(ValueError):
+    router.save(tmp_path / "router.pickle")
+  assert list(tmp_path.iterdir()) == []
+
+
+def test_safe_mode_refuses_custom_types_containing_the_separator() -> None:
+  if "slug" not in VARIABLE_TYPES:
+    register_variable_type("slug", str, rx="[a-z]+(?:-[a-z0-9]+)*")
+  router = Router(safe=True)
+
+  router.mount("/posts/{slug:slug}_{page:uint}", get_item, ["GET"])
+  with pytest.raises(ValueError, match="'slug' may contain '-'"):
+    router.mount("/posts/{slug:slug}-{page:uint}", get_item, ["GET"])
+  with pytest.raises(ValueError, match="'id' may contain '-'"):
+    router.mount("/users/{id:uuid}-{page:uint}", get_item, ["GET"])
+
+
+@pytest.mark.parametrize("parser", [None, object()])
+def test_safe_mode_refuses_templates_without_usable_regex_parser(
+    parser, monkeypatch) -> None:
+  monkeypatch.setattr(routing, "_sre_parse", parser)
+  routing._contains.cache_clear()
+  try:
+    router = Router(safe=True)
+    router.mount("/posts/{page:uint}", get_item, ["GET"])
+    with pytest.raises(ValueError, match="'page' may contain '_'"):
+      router.mount("/posts/{page:uint}_{id:uint}", get_item, ["GET"])
+  finally:
+    routing._contains.cache_clear()
+
+
+def test_ambiguous_templates_are_only_logged_at_debug_level(
+    monkeypatch) -> None:
+
+  def fail(msg: str) -> None:
+    raise AssertionError(f"warning logged: {msg}")
+
+  monkeypatch.setattr(io, "warning", fail)
+  router = Router().mount("/files/{name:str}.{ext:str}", get_item, ["GET"])
+
+  assert router.match("files/a.b.c", "GET").args == ["a.b", "c"]
+
+
+def test_match_many_does_not_count_hits() -> None:
+  from raptor.engines import RegexEngine
+
+  router = Router(engine=RegexEngine(reorder_interval=1))
+  router.mount("/items/{id:int}", get_item, ["GET"])
+  router.mount("/tags/{tag:str}", get_item, ["GET"])
+  order = list(router.engine.routes)
+
+  batch = router.match_many([("tags/a", "GET")] * 3 + [("items/1", "PUT")])
+
+  assert batch.statuses == [200, 200, 200, 405]
+  assert set(router.engine.get_hits().values()) == {0}
+  assert list(router.engine.routes) == order
+  router.match("tags/a", "GET")
+  assert list(router.engine.routes) == order[::-1]
+
+
+def test_path_filter_is_updated_on_mount_and_unmount() -> None:
+  router = Router().mount("/items/{id:int}", get_item, ["GET"])
+  router.mount("/items/{id:int}/tags", get_item, ["GET"])
+  path_filter = router.path_filter
+
+  router.unmount("/items/{id:int}")
+  assert not router.rejects("items/1/tags")
+  router.unmount("/items/{id:int}/tags")
+  assert router.rejects("items/1/tags")
+  router.mount("/{id:int}", get_item, ["GET"])
+  assert not router.rejects("12") and router.rejects("abc")
+
+  assert router.path_filter is path_filter
+
+
+def test_changes_only_drop_cached_lookups_of_their_template() -> None:
+  router = Router(cache_size=8).mount("/items/{id:int}", get_item, ["GET"])
+  router.match("items/1", "GET")
+  with pytest.raises(RaptorAbortException):
+    router.match("tags/a", "GET")
+
+  router.mount("/tags/{tag:str}", get_item, ["GET"])
+
+  assert router.cache_info().size == 1 and len(router.not_found) == 0
+  assert router.match("tags/a", "GET").args == ["a"]
+  router.unmount("/tags/{tag:str}")
+  assert router.cache_info().size == 1
+  with pytest.raises(RaptorAbortException):
+    router.match("tags/a", "GET")
+
+
+def test_lookups_racing_a_mount_are_not_cached(monkeypatch) -> None:
+  router = Router().mount("/items/{id:int}", get_item, ["GET"])
+  lookup = router.engine.lookup
+
+  def racing_lookup(path: str):
+    # resolved against the previous table, while another thread mounts
+    result = lookup(path)
+    monkeypatch.undo()
+    router.mount("/items/{name:str}", get_item, ["GET"])
+    return result
+
+  monkeypatch.setattr(router.engine, "lookup", racing_lookup)
+  with pytest.raises(RaptorAbortException):
+    router.match("items/a", "GET")
+
+  assert router.match("items/a", "GET").args == ["a"]
+
+
+def test_freeze_locks_the_route_table() -> None:
+  router = Router(engine="regex").mount("/items/{id:int}", get_item, ["GET"])
+  route = router.routes[next(iter(router.routes))]
+  rx = route.rx
+
+  assert router.freeze() is router.freeze()
+  assert router.frozen and route.rx is rx
+  with pytest.raises(TypeError):
+    router.routes["x"] = route
+  with pytest.raises(RuntimeError):
+    router.mount("/health", index, ["GET"])
+  with pytest.raises(RuntimeError):
+    router.unmount("/items/{id:int}")
+  assert router.match("items/1", "GET").args == [1]
+
+
+def test_route_regexes_are_only_compiled_by_linear_engines() -> None:
+  trie = Router().mount("/items/{id:int}", get_item, ["GET"])
+  regex = Router(engine="regex").mount("/items/{id:int}", get_item, ["GET"])
+
+  assert all(route.rx is None for route in trie.routes.values())
+  assert all(route.rx is not None for route in regex.routes.values())
+
+
+def test_head_and_options_are_answered_implicitly() -> None:
+  router = Router().mount("/items/{id:int}", get_item, ["GET"])
+
+  head = router.match("items/1", "HEAD")
+  assert head.func is get_item and head.args == [1]
+  options = router.match("items/1", "OPTIONS")
+  assert options.func is None
+  assert options.allow == "GET, HEAD, OPTIONS"
+
+
+def test_explicit_head_handler_is_preferred_over_get() -> None:
+  router = Router().mount("/items/{id:int}", get_item, ["GET"])
+  router.mount("/items/{id:int}", index, ["HEAD"])
+
+  assert router.match("items/1", "HEAD").func is index
+  assert router.match("items/1", "GET").func is get_item
+
+
+def test_method_not_allowed_carries_allow_header() -> None:
+  router = Router(cache_size=8)
+  router.mount("/items/{id:int}", get_item, ["GET", "DELETE"])
+
+  for _ in range(2):  # second lookup is answered by the match cache
+    with pytest.raises(RaptorAbortException) as info:
+      router.match("items/1", "POST")
+    assert info.value.http_status == 405
+    assert info.value.headers == {"Allow": "GET, DELETE, HEAD, OPTIONS"}
+
+  info = router.cache_info()
+  assert (info.hits, info.misses, info.errors) == (1, 1, 1)
+
+
+def test_match_many_returns_columns_in_order_of_requests() -> None:
+  router = Router(max_path_length=16)
+  router.mount("/health", index, ["GET"])
+  router.mount("/items/{id:int}", get_item, ["GET"])
+  routes = router.get_routes()
+
+  batch = router.match_many([
+      ("items/1", "GET"),
+      ("health", "GET"),
+      ("items/1", "POST"),
+      ("items/x", "GET"),
+      ("items/" + "1" * 16, "GET"),
+      ("items/1", "GET"),
+  ])
+
+  assert batch.statuses == [200, 200, 405, 404, 414, 200]
+  assert [routes[i] if i >= 0 else None for i in batch.routes] == [
+      "items/{id:int}", "health", "items/{id:int}", None, None,
+      "items/{id:int}"
+  ]
+  assert batch.args == [[1], [], [1], None, None, [1]]
+  # identical paths share the converted variables
+  assert batch.args[0] is batch.args[2] is batch.args[5]
+
+
+@pytest.mark.parametrize("name, kwargs", [
+    ("no-word", {"rx": "x"}),
+    ("int", {"rx": r"\d+"}),
+    ("nothing", {}),
+    ("grouped", {"rx": r"(a|b)+"}),
+])
+def test_register_variable_type_rejects_invalid_types(name, kwargs) -> None:
+  with pytest.raises(ValueError):
+    register_variable_type(name, str, **kwargs)
+  assert name == "int" or name not in VARIABLE_TYPES
+
+
+def test_url_for_builds_urls_matched_by_their_route() -> None:
+  router = Router(prefix="/api")
+  router.mount("/items/{id:uint}/{slug:str}", get_item, ["GET"])
+  router.mount("/health", index, ["GET"], name="hc")
+  router.include("v1", Router().mount("/x/{n:int}", index, ["GET"],
+                                      name="x"))
+
+  url = router.url_for(get_item, id=4, slug="ab")
+  assert url == router.url_for("get_item", id=4, slug="ab") == "/api/items/4/ab"
+  assert router.match(url[len("/api/"):], "GET").args == [4, "ab"]
+  assert router.url_for("hc") == "/api/health"
+  assert router.url_for("x", n=-1) == "/api/v1/x/-1"
+
+
+def test_url_for_percent_encodes_reserved_characters() -> None:
+  router = Router(prefix="/api")
+  router.mount("/p/{name:str}", get_item, ["GET"])
+  router.mount("/f/{file:path}", index, ["GET"])
+
+  url = router.url_for("get_item", name="a#b%c")
+  assert url == "/api/p/a%23b%25c"
+  assert router.match(unquote(url)[len("/api/"):], "GET").args == ["a#b%c"]
+  url = router.url_for("index", file="docs/a=b#c")
+  assert url == "/api/f/docs/a%3Db%23c"
+  assert router.match(unquote(url)[len("/api/"):], "GET").args == [
+      "docs/a=b#c"
+  ]
+
+
+@pytest.mark.parametrize("name, vars", [
+    ("get_item", {"id": 4}),
+    ("get_item", {"id": 4, "slug": "ab", "page": 1}),
+    ("get_item", {"id": -4, "slug": "ab"}),
+    ("get_item", {"id": 4, "slug": "a/b"}),
+    ("hc", {"id": 4}),
+])
+def test_url_for_rejects_invalid_variables(name, vars) -> None:
+  router = Router().mount("/items/{id:uint}/{slug:str}", get_item, ["GET"])
+  router.mount("/health", index, ["GET"], name="hc")
+
+  with pytest.raises(ValueError):
+    router.url_for(name, **vars)
+
+
+def test_url_for_rejects_unknown_routes() -> None:
+  router = Router().mount("/health", index, ["GET"])
+
+  with pytest.raises(RuntimeError):
+    router.url_for("missing")
+  with pytest.raises(RuntimeError):
+    router.url_for(get_item, id=1)
+
+
+def test_paths_exceeding_limits_are_rejected_before_lookup() -> None:
+  router = Router(max_path_length=12, max_segments=2)
+  router.mount("/items/{id:int}", get_item, ["GET"])
+  router.mount("/{a:str}/{b:str}/{c:str}", get_item, ["GET"])
+
+  assert router.match("items/12345", "GET").args == [12345]
+  for path in ("items/1234567", "a/b/c"):
+    with pytest.raises(RaptorAbortException) as info:
+      router.match(path, "GET")
+    assert info.value.http_status == 414
+    assert router.explain(path, "GET").status == 414
+
+
+@pytest.mark.parametrize("engine", ["regex", "combined"])
+def test_safe_mode_refuses_backtracking_engines(engine) -> None:
+  with pytest.raises(RuntimeError):
+    Router(engine=engine, safe=True)
+
+
+@pytest.mark.parametrize("engine, actions", [
+    ("trie", ["limits", "static", "filter", "static", "static", "segment",
+              "end", "method"]),
+    ("regex", ["limits", "static", "filter", "pattern", "convert", "method"]),
+])
+def test_explain_records_every_decision(engine, actions) -> None:
+  router = Router(engine=engine).mount("/items/{id:int}", get_item, ["GET"])
+
+  trace = router.explain("items/4", "PUT")
+
+  assert (trace.status, trace.route, trace.args) == (405, "items/{id:int}", [4])
+  assert [step.action for step in trace.steps] == actions
+  assert trace.steps[-1].outcome is False
+  assert trace.format().startswith("PUT items/4 => 405 items/{id:int} [4]")
+  trace = router.explain("nothing", "GET")
+  assert (trace.status, trace.steps[-1].action) == (404, "filter")
+
+
+def test_sample_traces_passes_every_nth_lookup_to_hook() -> None:
+  router = Router().mount("/items/{id:int}", get_item, ["GET"])
+  traces = []
+
+  router.sample_traces(2, traces.append)
+  for i in range(5):
+    assert router.match(f"items/{i}", "GET").args == [i]
+  router.sample_traces(0, None)
+  router.match("items/9", "GET")
+
+  assert [trace.path for trace in traces] == ["items/1", "items/3"]
+  assert "match" not in vars(router)
+
+
+def test_included_routers_own_the_paths_below_their_prefix() -> None:
+  api = Router(engine="regex").mount("/items/{id:int}", get_item, ["GET"])
+  router = Router().mount("/{a:str}/items/{b:int}", index, ["GET"])
+  router.mount("/api/health", index, ["GET"])
+  router.include("/api/v1", api)
+
+  assert router.match("api/v1/items/3", "GET").func is get_item
+  assert router.match("web/items/3", "GET").func is index
+  # paths sharing only the first segment of the prefix stay with the parent
+  assert router.match("api/health", "GET").func is index
+  assert router.match("api/items/3", "GET").args == ["api", 3]
+  assert not router.rejects("api/health")
+  with pytest.raises(RaptorAbortException):
+    router.match("api/v1/health", "GET")
+  assert router.rejects("api/v1/health")
+  assert "api/v1/items/{id:int}" in router.get_routes()
+  assert router.url_for("get_item", id=3) == "/api/v1/items/3"
+  assert router.match_many([("api/v1/items/3", "GET"),
+                            ("api/health", "GET")]).statuses == [200, 200]
+  assert router.explain("api/health", "GET").status == 200
+
+
+def test_nested_prefixes_are_dispatched_to_the_longest() -> None:
+  v1 = Router().mount("/items", get_item, ["GET"])
+  api = Router().mount("/items", index, ["GET"])
+  router = Router().include("/api/v1", v1).include("/api", api)
+
+  assert router.match("api/v1/items", "GET").func is get_item
+  assert router.match("api/items", "GET").func is index
+  assert router.url_for("get_item") == "/api/v1/items"
+
+
+@pytest.mark.parametrize("prefix", ["", "/", "/{x:int}", "/api"])
+def test_include_rejects_invalid_or_used_prefixes(prefix) -> None:
+  router = Router().include("/api", Router())
+
+  with pytest.raises(ValueError):
+    router.include(prefix, Router())
+
+
+def test_include_is_refused_by_frozen_routers() -> None:
+  router = Router().freeze()
+
+  with pytest.raises(RuntimeError):
+    router.include("/api", Router())
+
+
+def test_seal_freezes_router_and_garbage_collector() -> None:
+  router = Router().mount("/items/{id:int}", get_item, ["GET"])
+  try:
+    assert router.seal() is router
+    assert router.frozen
+    assert gc.get_freeze_count() > 0
+    assert router.match("items/1", "GET").args == [1]
+  finally:
+    gc.unfreeze()
@@ -0,0 +1,70 @@
+import io
+
+from raptor import Router
+from raptor.routing import PathFilter
+from raptor.providers.wsgi import WsgiRequest
+
+
+def hello(name: str) -> str:
+  return f"hello {name}"
+
+
+def call(provider, path: str, method: str = "GET") -> tuple[str, bytes]:
+  environ = {
+      "REQUEST_METHOD": method,
+      "PATH_INFO": path,
+      "wsgi.input": io.BytesIO(),
+  }
+  status = []
+  body = provider(environ, lambda line, headers: status.append(line))
+  return status[0], b"".join(body)
+
+
+def count_rejects(router: Router, monkeypatch) -> list[str]:
+  calls = []
+  rejects = router.rejects
+  monkeypatch.setattr(router, "rejects",
+                      lambda path: calls.append(path) or rejects(path))
+  return calls
+
+
+def test_rejects_is_checked_once_per_request(monkeypatch) -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("wsgi")
+  calls = count_rejects(router, monkeypatch)
+  filtered = []
+  filter_rejects = PathFilter.rejects
+  monkeypatch.setattr(
+      PathFilter, "rejects",
+      lambda self, path: filtered.append(path) or filter_rejects(self, path))
+
+  assert call(provider, "/hello/raptor") == ("200 OK", b"hello raptor")
+  assert call(provider, "/wp-admin/setup.php")[0] == "404 Not Found"
+  assert calls == ["hello/raptor", "wp-admin/setup.php"]
+  # the matching of accepted paths does not run the path filter again
+  assert filtered == calls
+
+
+def test_respond_rejects_and_dispatches_requests() -> None:
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("wsgi")
+
+  def request(path: str) -> WsgiRequest:
+    return WsgiRequest({"REQUEST_METHOD": "GET", "PATH_INFO": path})
+
+  assert provider.respond(request("/hello/raptor")).body == b"hello raptor"
+  assert provider.respond(request("/wp-admin")).status == 404
+
+
+def test_serve_does_not_freeze_by_default(monkeypatch) -> None:
+  monkeypatch.setattr("waitress.serve", lambda **kw: None)
+  router = Router().mount("/hello/{name:str}", hello, ["GET"])
+  provider = router.build_provider("wsgi")
+
+  provider.serve("127.0.0.1", 0)
+  assert not router.frozen
+  router.unmount("/hello/{name:str}")
+  assert call(provider, "/hello/raptor")[0] == "404 Not Found"
+
+  provider.serve("127.0.0.1", 0, freeze=True)
+  assert router.frozen